@@ -0,0 +1,151 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Compares message throughput of the inproc, TCP pub/sub and TCP pair paths
+# across every installed event loop, e.g.
+#
+#   python benchmarks/event_loops.py --messages 50000
+#
+# Each combination runs in a fresh interpreter so loops don't share state.
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import subprocess  # nosec - runs this same script with sys.executable
+import sys
+import time
+
+from plexo import loop
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.plexus import Plexus
+
+paths = ("inproc", "tcp-pubsub", "tcp-pair")
+neuron = Neuron(bytes, Namespace(["benchmark", "loop"]), PickleCodec())
+localhost = ipaddress.ip_address("127.0.0.1")
+
+
+def _ganglia(path: str, port: int):
+    if path == "inproc":
+        plexus = Plexus()
+        return plexus, plexus
+
+    if path == "tcp-pubsub":
+        from plexo.ganglion.tcp_pubsub import GanglionZmqTcpPubSub
+
+        sender = GanglionZmqTcpPubSub("127.0.0.1", port)
+        receiver = GanglionZmqTcpPubSub(
+            "127.0.0.1", port + 1, peers=[(localhost, port)]
+        )
+        return sender, receiver
+
+    from plexo.ganglion.tcp_pair import GanglionZmqTcpPair
+
+    sender = GanglionZmqTcpPair("127.0.0.1", port)
+    receiver = GanglionZmqTcpPair("127.0.0.1", port + 1, peer=(localhost, port))
+    return sender, receiver
+
+
+async def _benchmark(path: str, messages: int, payload_bytes: int, port: int):
+    sender, receiver = _ganglia(path, port)
+    received = 0
+    done = asyncio.Event()
+
+    async def reactant(data, neuron, reaction_id=None):
+        nonlocal received
+        received += 1
+        if received == messages:
+            done.set()
+
+    await receiver.adapt(neuron, reactants=(reactant,))
+    await sender.adapt(neuron)
+    await asyncio.sleep(0.5)
+
+    payload = bytes(payload_bytes)
+    start = time.perf_counter()
+    for _ in range(messages):
+        await sender.transmit(payload, neuron)
+    try:
+        await asyncio.wait_for(done.wait(), 30)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+
+    return {"received": received, "messages_per_second": received / elapsed}
+
+
+def _worker(args):
+    result = loop.run(
+        _benchmark(args.path, args.messages, args.payload_bytes, args.port),
+        event_loop=args.event_loop,
+    )
+    print(json.dumps(result), flush=True)
+    # The ganglia's sockets and tasks die with the process
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--payload-bytes", type=int, default=64)
+    parser.add_argument("--port", type=int, default=25570)
+    parser.add_argument("--event-loop", action="append")
+    parser.add_argument("--path", action="append", choices=paths)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.event_loop = args.event_loop[0]
+        args.path = args.path[0]
+        return _worker(args)
+
+    event_loops = args.event_loop or list(loop.available_event_loops())
+    print(f"{'path':<12} {'event loop':<12} {'msgs/s':>12} {'received':>10}")
+    for path in args.path or paths:
+        for event_loop in event_loops:
+            completed = subprocess.run(  # nosec
+                [
+                    sys.executable,
+                    __file__,
+                    "--worker",
+                    f"--path={path}",
+                    f"--event-loop={event_loop}",
+                    f"--messages={args.messages}",
+                    f"--payload-bytes={args.payload_bytes}",
+                    f"--port={args.port}",
+                ],
+                capture_output=True,
+                text=True,
+            )
+            try:
+                result = json.loads(completed.stdout.splitlines()[-1])
+            except (IndexError, ValueError):
+                error = completed.stderr.strip().splitlines() or ["no output"]
+                print(f"{path:<12} {event_loop:<12} failed: {error[-1]}")
+                continue
+
+            print(
+                f"{path:<12} {event_loop:<12} "
+                f"{result['messages_per_second']:>12.0f} {result['received']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
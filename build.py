@@ -49,6 +49,7 @@ schema_files = [
     "src/plexo/schema/plexo_multicast/plexo_promise.capnp",
     "src/plexo/schema/plexo_multicast/plexo_proposal.capnp",
     "src/plexo/schema/plexo_multicast/plexo_rejection.capnp",
+    "src/plexo/schema/plexo_multicast/plexo_snapshot_request.capnp",
 ]
 
 
@@ -0,0 +1,77 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from ipaddress import IPv4Address
+
+from plexo.axon import Axon
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.ganglion.tcp_pair import GanglionZmqTcpPair
+from plexo.host_information import get_primary_ip
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.plexus import Plexus
+from plexo.request import correlated
+
+
+test_port_connect = 5581
+
+
+@dataclass
+class Foo:
+    message: str
+    message_num: int
+
+
+@dataclass
+class Bar:
+    message_num: int
+
+
+async def _reply_to_foo(foo: Foo) -> Bar:
+    return Bar(message_num=foo.message_num)
+
+
+async def run_async(foo_plexus_axon: Axon[Foo], bar_neuron: Neuron):
+    await foo_plexus_axon.respond(_reply_to_foo, bar_neuron)
+    await asyncio.Event().wait()
+
+
+def run():
+    logging.basicConfig(level=logging.INFO)
+
+    namespace = Namespace(["dev", "plexo", "test"])
+    foo_neuron = correlated(Neuron(Foo, namespace, PickleCodec()))
+    bar_neuron = correlated(Neuron(Bar, namespace, PickleCodec()))
+
+    tcp_pair_ganglion = GanglionZmqTcpPair(
+        peer=(IPv4Address(get_primary_ip()), test_port_connect),
+        allowed_codecs=(type(foo_neuron.codec),),
+    )
+    plexus = Plexus(ganglia=(tcp_pair_ganglion,))
+
+    foo_plexus_axon = Axon(foo_neuron, plexus)
+
+    asyncio.run(run_async(foo_plexus_axon, bar_neuron))
+
+    plexus.close()
+
+
+if __name__ == "__main__":
+    run()
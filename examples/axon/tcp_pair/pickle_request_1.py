@@ -0,0 +1,88 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from timeit import default_timer as timer
+
+from plexo.axon import Axon
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.ganglion.tcp_pair import GanglionZmqTcpPair
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.plexus import Plexus
+from plexo.request import correlated
+
+
+test_port_bind = 5581
+
+
+@dataclass
+class Foo:
+    message: str
+    message_num: int
+
+
+@dataclass
+class Bar:
+    message_num: int
+
+
+async def request_foos(foo_axon: Axon[Foo], bar_neuron: Neuron, in_flight: int):
+    i = 0
+    while True:
+        start_time = timer()
+        # Requests are pipelined, each caller only waits for its own reply
+        bars = await asyncio.gather(
+            *(
+                foo_axon.request(
+                    Foo(message="Hello, Plexo+TcpPair", message_num=i + j),
+                    bar_neuron,
+                    timeout=5,
+                )
+                for j in range(in_flight)
+            )
+        )
+        i += in_flight
+        logging.info(
+            f"Received {len(bars)} Bars, requests/s: {in_flight / (timer() - start_time)}"
+        )
+
+
+def run():
+    logging.basicConfig(level=logging.INFO)
+
+    namespace = Namespace(["dev", "plexo", "test"])
+    foo_neuron = correlated(Neuron(Foo, namespace, PickleCodec()))
+    bar_neuron = correlated(Neuron(Bar, namespace, PickleCodec()))
+
+    tcp_pair_ganglion = GanglionZmqTcpPair(
+        port=test_port_bind,
+        relevant_neurons=(bar_neuron, foo_neuron),
+    )
+    plexus = Plexus(ganglia=(tcp_pair_ganglion,))
+
+    foo_plexus_axon = Axon(foo_neuron, plexus, max_outstanding_requests=256)
+
+    asyncio.run(request_foos(foo_plexus_axon, bar_neuron, in_flight=256))
+
+    plexus.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,86 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from ipaddress import IPv4Address
+
+from returns.curry import partial
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.ganglion.tcp_pubsub import GanglionZmqTcpPubSub
+from plexo.host_information import get_primary_ip
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.plexus import Plexus
+from plexo.workers import Supervisor, WorkerContext
+
+
+test_port_pub = 5600
+test_port_sub = 5571
+
+namespace = Namespace(["dev", "plexo", "test"])
+
+
+@dataclass
+class Reading:
+    sensor: str
+    value: float
+
+
+# One neuron per sensor, spread across the workers
+sensor_neurons = [
+    Neuron(Reading, namespace, PickleCodec(), type_name_alias=f"Reading{i}")
+    for i in range(16)
+]
+
+
+async def _reading_reaction(worker_id: int, reading: Reading, _, _2):
+    logging.info(f"Worker {worker_id} received {reading}")
+
+
+async def worker(context: WorkerContext):
+    # Every worker publishes on its own port and only subscribes to the
+    # sensors it owns
+    tcp_pubsub_ganglion = GanglionZmqTcpPubSub(
+        port_pub=test_port_pub + context.worker_id,
+        peers=[(IPv4Address(get_primary_ip()), test_port_sub)],
+        allowed_codecs=(PickleCodec,),
+    )
+    plexus = Plexus(ganglia=(tcp_pubsub_ganglion,))
+
+    for neuron in sensor_neurons:
+        await context.adapt(
+            plexus,
+            neuron,
+            reactants=[partial(_reading_reaction, context.worker_id)],
+        )
+
+    await asyncio.Event().wait()
+
+
+def run():
+    logging.basicConfig(level=logging.INFO)
+
+    supervisor = Supervisor(worker, num_workers=os.cpu_count())
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    run()
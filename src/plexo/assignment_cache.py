@@ -0,0 +1,103 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import logging
+import os
+import tempfile
+from ipaddress import ip_address
+from pathlib import Path
+from typing import NamedTuple, Union
+
+from pyrsistent import pmap
+from pyrsistent.typing import PMap
+
+from plexo.typing import IPAddress
+
+ASSIGNMENT_CACHE_VERSION = 1
+
+
+class CachedAssignment(NamedTuple):
+    multicast_address: IPAddress
+    proposal_id: int
+    instance_id: int
+
+
+class AssignmentCache:
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+
+    def load(self) -> PMap[str, CachedAssignment]:
+        try:
+            with open(self.path, "r", encoding="UTF-8") as cache_file:
+                cache = json.load(cache_file)
+        except FileNotFoundError:
+            return pmap()
+        except (OSError, ValueError) as e:
+            logging.warning(f"AssignmentCache:load: ignoring {self.path}: {e}")
+            return pmap()
+
+        if cache.get("version") != ASSIGNMENT_CACHE_VERSION:
+            logging.warning(
+                f"AssignmentCache:load: ignoring {self.path}: unknown version"
+            )
+            return pmap()
+
+        assignments = {}
+        for name, assignment in cache.get("assignments", {}).items():
+            try:
+                assignments[name] = CachedAssignment(
+                    multicast_address=ip_address(assignment["multicast_ip"]),
+                    proposal_id=int(assignment["proposal_id"]),
+                    instance_id=int(assignment["instance_id"]),
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                logging.warning(
+                    f"AssignmentCache:load: ignoring assignment for {name}: {e}"
+                )
+
+        return pmap(assignments)
+
+    def save(self, assignments: PMap[str, CachedAssignment]):
+        cache = {
+            "version": ASSIGNMENT_CACHE_VERSION,
+            "assignments": {
+                name: {
+                    "multicast_ip": assignment.multicast_address.compressed,
+                    "proposal_id": assignment.proposal_id,
+                    "instance_id": assignment.instance_id,
+                }
+                for name, assignment in assignments.items()
+            },
+        }
+
+        directory = self.path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file in the same directory and rename it over the
+        # cache so a crash never leaves a partially written cache behind
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            prefix=f".{self.path.name}.", dir=directory
+        )
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="UTF-8") as cache_file:
+                json.dump(cache, cache_file, separators=(",", ":"))
+                cache_file.flush()
+                os.fsync(cache_file.fileno())
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
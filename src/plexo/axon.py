@@ -14,9 +14,18 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
 import asyncio
-from typing import Generic, Iterable, Optional
+from time import perf_counter_ns
+from typing import Any, Awaitable, Callable, Generic, Iterable, Optional
+from uuid import UUID, uuid4
+
+from pyrsistent import pset
+from pyrsistent.typing import PSet
 
 from plexo.neuron.neuron import Neuron
+from plexo.producer import ThreadSafeProducer
+from plexo.rate_limit import RateLimit
+from plexo.request import Correlated, PendingRequests
+from plexo.tracing import tracer
 from plexo.typing import UnencodedType
 from plexo.typing.ganglion import Ganglion
 from plexo.typing.reactant import Reactant
@@ -27,12 +36,20 @@ class Axon(Generic[UnencodedType]):
         self,
         neuron: Neuron[UnencodedType],
         ganglion: Ganglion,
+        rate_limit: Optional[RateLimit] = None,
+        max_outstanding_requests: int = 1024,
     ):
         self.neuron = neuron
         self.ganglion = ganglion
+        self.rate_limit = rate_limit
 
         self._startup_done = False
 
+        # Requests and replies are sent on correlated neurons, see plexo.request
+        self._pending_requests = PendingRequests(max_outstanding_requests)
+        self._reply_neurons: PSet[Neuron] = pset()
+        self._reply_neurons_lock = asyncio.Lock()
+
     async def adapt(self):
         await self.ganglion.adapt(self.neuron)
         self._startup_done = True
@@ -53,4 +70,63 @@ class Axon(Generic[UnencodedType]):
         if not self._startup_done:
             await self.adapt()
 
-        return await self.ganglion.transmit(data, self.neuron)
+        if self.rate_limit is not None:
+            return await self.rate_limit.submit(self._transmit, data)
+
+        return await self._transmit(data)
+
+    async def _transmit(self, data: UnencodedType):
+        if not tracer.enabled:
+            return await self.ganglion.transmit(data, self.neuron)
+
+        # A reaction id is assigned up front so every span of this message shares it
+        reaction_id = uuid4()
+        start = perf_counter_ns()
+        try:
+            return await self.ganglion.transmit(data, self.neuron, reaction_id)
+        finally:
+            tracer.record(
+                "Axon.transmit", "axon", start, reaction_id, neuron=self.neuron.name
+            )
+
+    async def _reply_reaction(
+        self, reply: Correlated, neuron: Neuron, reaction_id: Optional[UUID] = None
+    ):
+        self._pending_requests.resolve(reply)
+
+    async def request(
+        self: "Axon[Correlated]",
+        data: Any,
+        reply_neuron: Neuron[Correlated],
+        timeout: Optional[float] = None,
+    ):
+        async with self._reply_neurons_lock:
+            if reply_neuron not in self._reply_neurons:
+                await self.ganglion.adapt(
+                    reply_neuron, reactants=(self._reply_reaction,)
+                )
+                self._reply_neurons = self._reply_neurons.add(reply_neuron)
+
+        return await self._pending_requests.request(self.transmit, data, timeout)
+
+    async def respond(
+        self: "Axon[Correlated]",
+        handler: Callable[[Any], Awaitable[Any]],
+        reply_neuron: Neuron[Correlated],
+    ):
+        async def reaction(
+            request: Correlated, neuron: Neuron, reaction_id: Optional[UUID] = None
+        ):
+            reply = await handler(request.data)
+            # A reply is a new reaction, reusing the request's reaction id would
+            # keep a Plexus from sending it back out the ganglion it came from
+            await self.ganglion.transmit(
+                Correlated(request.correlation_id, reply), reply_neuron
+            )
+
+        await self.ganglion.adapt(reply_neuron)
+        return await self.react((reaction,))
+
+    def producer(self, max_pending: Optional[int] = None) -> ThreadSafeProducer:
+        # Call from the event loop, the returned handle's put() is thread-safe
+        return ThreadSafeProducer(self.transmit, max_pending)
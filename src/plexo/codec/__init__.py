@@ -13,3 +13,26 @@
 #
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+from typing import TYPE_CHECKING
+
+from plexo.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from plexo.codec.capnpy_codec import CapnpyCodec
+    from plexo.codec.json_codec import JsonCodec
+    from plexo.codec.pickle_codec import PickleCodec
+    from plexo.codec.string_codec import StringCodec
+
+# Codecs are imported on first use, see plexo.lazy
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "CapnpyCodec": "plexo.codec.capnpy_codec",
+        "JsonCodec": "plexo.codec.json_codec",
+        "PickleCodec": "plexo.codec.pickle_codec",
+        "StringCodec": "plexo.codec.string_codec",
+    },
+)
+
+__all__ = ["CapnpyCodec", "JsonCodec", "PickleCodec", "StringCodec"]
@@ -15,8 +15,6 @@
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
 from typing import Optional
 
-import python_jsonschema_objects as pjs
-
 from plexo.typing import EncodedType
 from plexo.typing.codec import Codec
 
@@ -35,6 +33,9 @@ class JsonCodec(Codec):
     def load_from_schema(
         cls, json_schema: dict, schema_name: str, serialize_args: Optional[dict] = None
     ):
+        # Deferred so importing the codec doesn't pull in the schema builder
+        import python_jsonschema_objects as pjs
+
         builder = pjs.ObjectBuilder(json_schema)
         namespace = builder.build_classes()
 
@@ -21,6 +21,7 @@ from plexo.schema.plexo_multicast import (
     PlexoPromise,
     PlexoProposal,
     PlexoRejection,
+    PlexoSnapshotRequest,
 )
 
 from plexo.codec.capnpy_codec import CapnpyCodec
@@ -31,3 +32,4 @@ plexo_preparation_codec = CapnpyCodec(PlexoPreparation)
 plexo_promise_codec = CapnpyCodec(PlexoPromise)
 plexo_proposal_codec = CapnpyCodec(PlexoProposal)
 plexo_rejection_codec = CapnpyCodec(PlexoRejection)
+plexo_snapshot_request_codec = CapnpyCodec(PlexoSnapshotRequest)
@@ -0,0 +1,72 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Optional, Tuple
+
+from plexo.metrics import metrics
+
+if TYPE_CHECKING:
+    from plexo.neuron.neuron import Neuron
+    from plexo.typing import EncodedType
+
+# (neuron name, key of the value within the neuron)
+ConflationKey = Tuple[str, Hashable]
+
+
+def _field_getter(field: str) -> Callable[[Any], Hashable]:
+    def get_field(value: Any) -> Hashable:
+        try:
+            return getattr(value, field)
+        except AttributeError:
+            return value[field]
+
+    return get_field
+
+
+class Conflation:
+    def __init__(
+        self,
+        key: Optional[Callable[[Any], Hashable]] = None,
+        field: Optional[str] = None,
+    ):
+        # Without a key or field only the newest message of the neuron is kept,
+        # otherwise the newest message for each key
+        if key is not None and field is not None:
+            raise ValueError("Conflation takes either a key or a field, not both")
+
+        self.key = _field_getter(field) if field is not None else key
+
+    def __repr__(self):
+        return f"Conflation(key={self.key!r})"
+
+
+def conflation_key(neuron: Neuron, data: EncodedType) -> Optional[ConflationKey]:
+    conflation = neuron.conflation
+    if conflation is None:
+        return None
+
+    if conflation.key is None:
+        return neuron.name, None
+
+    return neuron.name, conflation.key(neuron.decode(data))
+
+
+def record_conflated(key: ConflationKey):
+    if metrics.enabled:
+        metrics.counter("conflated_messages", neuron=key[0]).inc()
@@ -17,13 +17,19 @@
 from __future__ import annotations
 
 import asyncio
+from time import perf_counter_ns
 from typing import Iterable, Optional, Generic
 from uuid import UUID
 
 from pyrsistent import pset, pvector
 from pyrsistent.typing import PVector
 
+from plexo.loop_monitor import dispatch_codec, dispatch_reactant, monitoring
+from plexo.metrics import metrics, record_duration
 from plexo.neuron.neuron import Neuron
+from plexo.profiling import profiler
+from plexo.reactant import as_reactant, close_reactants
+from plexo.tracing import tracer
 from plexo.typing import EncodedType, UnencodedType
 from plexo.typing.reactant import Reactant, RawReactant
 
@@ -33,9 +39,11 @@ class Dendrite(Generic[UnencodedType]):
         self,
         neuron: Neuron[UnencodedType],
         reactants: Iterable[Reactant[UnencodedType]] = (),
+        ganglion: str = "",
     ):
         self.neuron = neuron
-        self._reactants = pvector(pset(reactants))
+        self.ganglion = ganglion
+        self._reactants = pvector(pset(map(as_reactant, reactants)))
         self._reactants_write_lock = asyncio.Lock()
 
     @property
@@ -43,16 +51,35 @@ class Dendrite(Generic[UnencodedType]):
         return self._reactants
 
     async def add_reactants(self, reactants: Iterable[Reactant[UnencodedType]]):
+        reactants = pvector(map(as_reactant, reactants))
         async with self._reactants_write_lock:
             self._reactants = pvector(pset(self._reactants).update(reactants))
 
     async def remove_reactants(self, reactants: Iterable[Reactant[UnencodedType]]):
+        reactants = pset(reactants)
         async with self._reactants_write_lock:
+            removed = [
+                reactant for reactant in self._reactants if reactant in reactants
+            ]
             self._reactants = pvector(pset(self._reactants).difference(reactants))
+        close_reactants(removed)
+
+    def close(self):
+        close_reactants(self._reactants)
 
     async def transduce(self, data: UnencodedType, reaction_id: Optional[UUID] = None):
         neuron = self.neuron
         try:
+            if metrics.enabled or tracer.enabled or profiler.enabled or monitoring():
+                return await asyncio.gather(
+                    *(
+                        _react_instrumented(
+                            reactant, data, neuron, reaction_id, self.ganglion
+                        )
+                        for reactant in self.reactants
+                    )
+                )
+
             return await asyncio.gather(
                 *(reactant(data, neuron, reaction_id) for reactant in self.reactants)
             )
@@ -67,10 +94,12 @@ class DecoderDendrite(Generic[UnencodedType]):
         neuron: Neuron[UnencodedType],
         reactants: Iterable[Reactant[UnencodedType]] = (),
         raw_reactants: Iterable[RawReactant[UnencodedType]] = (),
+        ganglion: str = "",
     ):
         self.neuron = neuron
-        self._reactants = pvector(pset(reactants))
-        self._raw_reactants = pvector(pset(raw_reactants))
+        self.ganglion = ganglion
+        self._reactants = pvector(pset(map(as_reactant, reactants)))
+        self._raw_reactants = pvector(pset(map(as_reactant, raw_reactants)))
         self._reactants_write_lock = asyncio.Lock()
 
     @property
@@ -82,32 +111,53 @@ class DecoderDendrite(Generic[UnencodedType]):
         return self._raw_reactants
 
     async def add_reactants(self, reactants: Iterable[Reactant[UnencodedType]]):
+        reactants = pvector(map(as_reactant, reactants))
         async with self._reactants_write_lock:
             self._reactants = pvector(pset(self._reactants).update(reactants))
 
     async def add_raw_reactants(
         self, raw_reactants: Iterable[RawReactant[UnencodedType]]
     ):
+        raw_reactants = pvector(map(as_reactant, raw_reactants))
         async with self._reactants_write_lock:
             self._raw_reactants = pvector(
                 pset(self._raw_reactants).update(raw_reactants)
             )
 
     async def remove_reactants(self, reactants: Iterable[Reactant[UnencodedType]]):
+        reactants = pset(reactants)
         async with self._reactants_write_lock:
+            removed = [
+                reactant for reactant in self._reactants if reactant in reactants
+            ]
             self._reactants = pvector(pset(self._reactants).difference(reactants))
+        close_reactants(removed)
 
     async def remove_raw_reactants(
         self, raw_reactants: Iterable[RawReactant[UnencodedType]]
     ):
+        raw_reactants = pset(raw_reactants)
         async with self._reactants_write_lock:
+            removed = [
+                raw_reactant
+                for raw_reactant in self._raw_reactants
+                if raw_reactant in raw_reactants
+            ]
             self._raw_reactants = pvector(
                 pset(self._raw_reactants).difference(raw_reactants)
             )
+        close_reactants(removed)
+
+    def close(self):
+        close_reactants(self._reactants)
+        close_reactants(self._raw_reactants)
 
     async def transduce(self, data: EncodedType, reaction_id: Optional[UUID] = None):
         neuron = self.neuron
         try:
+            if metrics.enabled or tracer.enabled or profiler.enabled or monitoring():
+                return await self._transduce_instrumented(data, reaction_id)
+
             decoded_data = self.neuron.decode(data)
             return await asyncio.gather(
                 *(
@@ -122,3 +172,74 @@ class DecoderDendrite(Generic[UnencodedType]):
         except ValueError:
             # Got empty list, continue
             pass
+
+    async def _transduce_instrumented(
+        self, data: EncodedType, reaction_id: Optional[UUID] = None
+    ):
+        neuron = self.neuron
+
+        start = perf_counter_ns()
+        if profiler.enabled and profiler.sample():
+            decoded_data = profiler.call("decode", neuron.name, neuron.decode, data)
+        elif monitoring():
+            decoded_data = dispatch_codec("decode", neuron.name, neuron.decode, data)
+        else:
+            decoded_data = neuron.decode(data)
+        if metrics.enabled:
+            record_duration("decode_ns", self.ganglion, neuron.name, start)
+        if tracer.enabled:
+            tracer.record("decode", "codec", start, reaction_id, neuron=neuron.name)
+
+        return await asyncio.gather(
+            *(
+                _react_instrumented(
+                    reactant, decoded_data, neuron, reaction_id, self.ganglion
+                )
+                for reactant in self.reactants
+            ),
+            *(
+                _react_instrumented(
+                    raw_reactant, data, neuron, reaction_id, self.ganglion
+                )
+                for raw_reactant in self.raw_reactants
+            ),
+        )
+
+
+def _reactant_name(reactant) -> str:
+    # Look through partials so bound reactants are named after their function
+    func = getattr(reactant, "func", reactant)
+    return getattr(func, "__qualname__", None) or type(func).__name__
+
+
+async def _react_instrumented(
+    reactant,
+    data,
+    neuron: Neuron,
+    reaction_id: Optional[UUID] = None,
+    ganglion: str = "",
+):
+    start = perf_counter_ns()
+    try:
+        if monitoring():
+            reaction = dispatch_reactant(reactant, data, neuron, reaction_id)
+        else:
+            reaction = reactant(data, neuron, reaction_id)
+
+        if profiler.enabled and profiler.sample():
+            return await profiler.profile(
+                "reactant", _reactant_name(reactant), reaction
+            )
+
+        return await reaction
+    finally:
+        if metrics.enabled:
+            record_duration("reactant_ns", ganglion, neuron.name, start)
+        if tracer.enabled:
+            tracer.record(
+                _reactant_name(reactant),
+                "reactant",
+                start,
+                reaction_id,
+                neuron=neuron.name,
+            )
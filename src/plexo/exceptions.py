@@ -69,3 +69,15 @@ class SynapseExists(RuntimeError):
 
 class TransmitterNotFound(KeyError):
     """Raise when a transmitter is not found inside a ganglion"""
+
+
+class LogRecordTooLarge(ValueError):
+    """Raise when a record does not fit in an empty log segment"""
+
+
+class RequestTimeout(TimeoutError):
+    """Raise when no reply to a request arrives in time"""
+
+
+class EventLoopNotAvailable(RuntimeError):
+    """Raise when a requested event loop is unknown or not installed"""
@@ -13,3 +13,40 @@
 #
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+from typing import TYPE_CHECKING
+
+from plexo.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from plexo.ganglion.external import GanglionExternalBase
+    from plexo.ganglion.inproc import GanglionInproc
+    from plexo.ganglion.internal import GanglionInternalBase
+    from plexo.ganglion.log import GanglionLog
+    from plexo.ganglion.plexo_multicast import GanglionPlexoMulticast
+    from plexo.ganglion.tcp_pair import GanglionZmqTcpPair
+    from plexo.ganglion.tcp_pubsub import GanglionZmqTcpPubSub
+
+# Transports are imported on first use, see plexo.lazy
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "GanglionExternalBase": "plexo.ganglion.external",
+        "GanglionInproc": "plexo.ganglion.inproc",
+        "GanglionInternalBase": "plexo.ganglion.internal",
+        "GanglionLog": "plexo.ganglion.log",
+        "GanglionPlexoMulticast": "plexo.ganglion.plexo_multicast",
+        "GanglionZmqTcpPair": "plexo.ganglion.tcp_pair",
+        "GanglionZmqTcpPubSub": "plexo.ganglion.tcp_pubsub",
+    },
+)
+
+__all__ = [
+    "GanglionExternalBase",
+    "GanglionInproc",
+    "GanglionInternalBase",
+    "GanglionLog",
+    "GanglionPlexoMulticast",
+    "GanglionZmqTcpPair",
+    "GanglionZmqTcpPubSub",
+]
@@ -17,7 +17,7 @@
 import asyncio
 import logging
 from abc import ABC, abstractmethod
-from typing import Iterable, Optional, Type
+from typing import Iterable, Mapping, Optional, Type
 from uuid import UUID
 
 from pyrsistent import pmap, pdeque, pset
@@ -29,7 +29,10 @@ from plexo.exceptions import (
     SynapseExists,
     NeuronNotAvailable,
 )
+from plexo.lifecycle import cancel_tasks, wait_cancelled
 from plexo.neuron.neuron import Neuron
+from plexo.priority import Priority
+from plexo.rate_limit import RateLimit
 from plexo.transmitter import (
     create_external_encoder_transmitter,
     create_external_transmitter,
@@ -47,6 +50,8 @@ class GanglionExternalBase(Ganglion, ABC):
         relevant_neurons: Iterable[Neuron] = (),
         ignored_neurons: Iterable[Neuron] = (),
         allowed_codecs: Iterable[Type] = (),
+        rate_limit: Optional[RateLimit] = None,
+        rate_limits: Optional[Mapping[Neuron, RateLimit]] = None,
     ):
         self._tasks: PDeque = pdeque()
 
@@ -72,6 +77,9 @@ class GanglionExternalBase(Ganglion, ABC):
 
         self._allowed_codecs: PSet[Type] = pset(allowed_codecs)
 
+        self._rate_limit = rate_limit
+        self._rate_limits: PMap[Neuron, RateLimit] = pmap(rate_limits or {})
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
@@ -79,25 +87,53 @@ class GanglionExternalBase(Ganglion, ABC):
         self.close()
 
     def close(self):
-        for task in self._tasks:
-            task.cancel()
+        cancel_tasks(self._tasks)
+        self._tasks = pdeque()
+        for synapse in self._synapses.values():
+            synapse.close()
+        for rate_limit in self._owned_rate_limits():
+            rate_limit.close()
+
+    def _owned_rate_limits(self) -> PSet[RateLimit]:
+        rate_limits = pset(self._rate_limits.values())
+        if self._rate_limit is not None:
+            rate_limits = rate_limits.add(self._rate_limit)
+        return rate_limits
+
+    async def start(self):
+        pass
+
+    async def _flush(self):
+        pass
+
+    async def _flush_egress(self):
+        # Coalesced messages still held by a rate limit go out before the
+        # ganglion's own egress is flushed
+        await asyncio.gather(
+            *(rate_limit.flush() for rate_limit in self._owned_rate_limits())
+        )
+        await self._flush()
 
-        if self._tasks:
-            wait_coro = asyncio.wait(
-                self._tasks, timeout=10, return_when=asyncio.ALL_COMPLETED
+    async def aclose(self, timeout: float = 10.0):
+        # Egress is flushed first, then tasks and synapses are cancelled in
+        # parallel with whatever is left of timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            await asyncio.wait_for(self._flush_egress(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(
+                f"{type(self).__name__}:aclose: egress not flushed within {timeout}s"
             )
-            try:
-                loop = asyncio.get_running_loop()
-
-                future = asyncio.run_coroutine_threadsafe(wait_coro, loop)
-                # This is broken, pending https://bugs.python.org/issue42130
-                future.result(10)
-            except RuntimeError:
-                asyncio.run(wait_coro)
-            except TimeoutError:
-                pass
-            finally:
-                self._tasks = pdeque()
+
+        remaining = deadline - loop.time()
+        tasks = cancel_tasks(self._tasks)
+        self._tasks = pdeque()
+        await asyncio.gather(
+            wait_cancelled(tasks, remaining),
+            *(synapse.aclose(remaining) for synapse in self._synapses.values()),
+        )
+        self.close()
 
     def _add_task(self, task):
         self._tasks = self._tasks.append(task)
@@ -136,6 +172,15 @@ class GanglionExternalBase(Ganglion, ABC):
             if neuron.name not in self._name_neurons:
                 self._name_neurons = self._name_neurons.set(neuron.name, neuron)
 
+    def _rate_limit_for(self, neuron: Neuron[UnencodedType]) -> Optional[RateLimit]:
+        try:
+            return self._rate_limits[neuron]
+        except KeyError:
+            # Control traffic is never held back by the ganglion-wide limit
+            if neuron.priority is Priority.Control:
+                return None
+            return self._rate_limit
+
     async def _create_external_transmitter(
         self, neuron: Neuron[UnencodedType], synapse: SynapseExternal[UnencodedType]
     ):
@@ -143,7 +188,12 @@ class GanglionExternalBase(Ganglion, ABC):
             try:
                 return self._external_transmitters[neuron]
             except KeyError:
-                external_transmitter = create_external_transmitter(synapse)
+                external_transmitter = create_external_transmitter(
+                    synapse,
+                    ganglion=type(self).__name__,
+                    neuron=neuron.name,
+                    rate_limit=self._rate_limit_for(neuron),
+                )
                 self._external_transmitters = self._external_transmitters.set(
                     neuron, external_transmitter
                 )
@@ -166,7 +216,11 @@ class GanglionExternalBase(Ganglion, ABC):
                 return self._transmitters[neuron]
             except KeyError:
                 transmitter = create_external_encoder_transmitter(
-                    synapse, neuron.encode
+                    synapse,
+                    neuron.encode,
+                    ganglion=type(self).__name__,
+                    neuron=neuron.name,
+                    rate_limit=self._rate_limit_for(neuron),
                 )
                 self._transmitters = self._transmitters.set(neuron, transmitter)
                 return transmitter
@@ -30,7 +30,7 @@ class GanglionInproc(GanglionInternalBase):
 
         logging.debug(f"GanglionInproc:Creating synapse for type {name}")
 
-        synapse: SynapseInproc = SynapseInproc(neuron)
+        synapse: SynapseInproc = SynapseInproc(neuron, ganglion=type(self).__name__)
 
         async with self._synapses_lock:
             self._synapses = self._synapses.set(name, synapse)
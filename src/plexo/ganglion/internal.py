@@ -29,6 +29,7 @@ from plexo.exceptions import (
     TransmitterNotFound,
     NeuronNotAvailable,
 )
+from plexo.lifecycle import cancel_tasks, wait_cancelled
 from plexo.neuron.neuron import Neuron
 from plexo.transmitter import create_transmitter
 from plexo.typing import UnencodedType
@@ -73,25 +74,22 @@ class GanglionInternalBase(Ganglion, ABC):
         self.close()
 
     def close(self):
-        for task in self._tasks:
-            task.cancel()
-
-        if self._tasks:
-            wait_coro = asyncio.wait(
-                self._tasks, timeout=10, return_when=asyncio.ALL_COMPLETED
-            )
-            try:
-                loop = asyncio.get_running_loop()
-
-                future = asyncio.run_coroutine_threadsafe(wait_coro, loop)
-                # This is broken, pending https://bugs.python.org/issue42130
-                future.result(10)
-            except RuntimeError:
-                asyncio.run(wait_coro)
-            except TimeoutError:
-                pass
-            finally:
-                self._tasks = pdeque()
+        cancel_tasks(self._tasks)
+        self._tasks = pdeque()
+        for synapse in self._synapses.values():
+            synapse.close()
+
+    async def start(self):
+        pass
+
+    async def aclose(self, timeout: float = 10.0):
+        tasks = cancel_tasks(self._tasks)
+        self._tasks = pdeque()
+        await asyncio.gather(
+            wait_cancelled(tasks, timeout),
+            *(synapse.aclose(timeout) for synapse in self._synapses.values()),
+        )
+        self.close()
 
     def _add_task(self, task):
         self._tasks = self._tasks.append(task)
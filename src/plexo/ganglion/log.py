@@ -0,0 +1,108 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import os
+from typing import Iterable, Mapping, Optional, Type, Union
+
+from plexo.exceptions import SynapseExists
+from plexo.ganglion.external import GanglionExternalBase
+from plexo.neuron.neuron import Neuron
+from plexo.rate_limit import RateLimit
+from plexo.segmented_log import LogRecord, SegmentedLog
+from plexo.synapse.log import SynapseLog
+from plexo.typing import UnencodedType
+
+
+class GanglionLog(GanglionExternalBase):
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike],
+        segment_bytes: int = 64 * 1024 * 1024,
+        index_interval_bytes: int = 4096,
+        flush_messages: Optional[int] = None,
+        flush_interval_seconds: Optional[float] = None,
+        relevant_neurons: Iterable[Neuron] = (),
+        ignored_neurons: Iterable[Neuron] = (),
+        allowed_codecs: Iterable[Type] = (),
+        rate_limit: Optional[RateLimit] = None,
+        rate_limits: Optional[Mapping[Neuron, RateLimit]] = None,
+    ) -> None:
+        super().__init__(
+            relevant_neurons=relevant_neurons,
+            ignored_neurons=ignored_neurons,
+            allowed_codecs=allowed_codecs,
+            rate_limit=rate_limit,
+            rate_limits=rate_limits,
+        )
+        logging.debug(f"GanglionLog:directory {directory}")
+        self.log = SegmentedLog(
+            directory,
+            segment_bytes,
+            index_interval_bytes,
+            flush_messages,
+            flush_interval_seconds,
+        )
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self.log:
+                self.log.close()
+
+    async def flush(self):
+        # Syncs every record transmitted so far to disk, see SegmentedLog
+        await self.log.aflush()
+
+    async def _flush(self):
+        await self.flush()
+
+    async def _create_synapse_by_name(self, neuron: Neuron[UnencodedType], name: str):
+        if name in self._synapses:
+            raise SynapseExists(f"Synapse for {name} already exists.")
+
+        logging.debug(f"GanglionLog:Creating synapse for type {name}")
+
+        synapse: SynapseLog = SynapseLog(
+            neuron=neuron, log=self.log, ganglion=type(self).__name__
+        )
+
+        async with self._synapses_lock:
+            self._synapses = self._synapses.set(name, synapse)
+
+        return synapse
+
+    async def _create_synapse(self, neuron: Neuron[UnencodedType]):
+        return await self._create_synapse_by_name(neuron, neuron.name)
+
+    async def replay(self, offset: int = 0) -> int:
+        # Hands every logged record of a known neuron to its reactants, returning
+        # the offset to resume from
+        for record in self.log.read(offset):
+            await self._replay_record(record)
+            offset = record.offset + 1
+
+        return offset
+
+    async def replay_from_time(self, timestamp_ns: int) -> int:
+        return await self.replay(self.log.offset_for_time(timestamp_ns))
+
+    async def _replay_record(self, record: LogRecord):
+        synapse = self._synapses.get(record.name)
+        if synapse is not None:
+            await synapse.transduce(record.payload)
@@ -17,20 +17,23 @@
 import asyncio
 import ipaddress
 import logging
+import os
 import random
+import threading
 import uuid
 from datetime import datetime, timezone
 from enum import Enum
-from functools import reduce
+from functools import partial, reduce
 from itertools import islice
-from timeit import default_timer as timer
-from typing import Iterable, Optional, Tuple, cast, Type
+from typing import Iterable, Mapping, Optional, Tuple, Union, cast, Type
 from uuid import UUID
 
-from pyrsistent import plist, pmap, pvector
-from pyrsistent.typing import PMap
+from pyrsistent import plist, pmap, pset, pvector
+from pyrsistent.typing import PMap, PSet
+import zmq.asyncio
 from zmq import ZMQError
 
+from plexo.assignment_cache import AssignmentCache, CachedAssignment
 from plexo.exceptions import (
     ConsensusNotReached,
     IpLeaseExists,
@@ -43,6 +46,9 @@ from plexo.exceptions import (
 from plexo.ganglion.external import GanglionExternalBase
 from plexo.ip_lease import IpLeaseManager
 from plexo.neuron.neuron import Neuron
+from plexo.peer_table import PeerTable
+from plexo.rate_limit import RateLimit
+from plexo.socket_options import ZmqSocketOptions
 from plexo.neuron.plexo_multicast_neuron import (
     approval_neuron,
     heartbeat_neuron,
@@ -50,6 +56,7 @@ from plexo.neuron.plexo_multicast_neuron import (
     promise_neuron,
     proposal_neuron,
     rejection_neuron,
+    snapshot_request_neuron,
 )
 from plexo.schema.plexo_multicast.plexo_approval import PlexoApproval
 from plexo.schema.plexo_multicast.plexo_heartbeat import PlexoHeartbeat
@@ -57,8 +64,10 @@ from plexo.schema.plexo_multicast.plexo_preparation import PlexoPreparation
 from plexo.schema.plexo_multicast.plexo_promise import PlexoPromise
 from plexo.schema.plexo_multicast.plexo_proposal import PlexoProposal
 from plexo.schema.plexo_multicast.plexo_rejection import PlexoRejection
+from plexo.schema.plexo_multicast.plexo_snapshot_request import PlexoSnapshotRequest
 from plexo.synapse.zeromq_plexopubsub_epgm import SynapseZmqPlexoPubSubEPGM
-from plexo.timer import Timer
+from plexo.synapse.zeromq_poller import ZmqPoller
+from plexo.timer import Timer, TimerWheel
 from plexo.typing import IPAddress, IPNetwork, UnencodedType, EncodedType
 from plexo.typing.reactant import Reactant, RawReactant
 
@@ -72,10 +81,6 @@ def current_timestamp_nanoseconds() -> float:
     return current_timestamp() * 1e9
 
 
-def ilen(iterable):
-    return reduce(lambda count, element: count + 1, iterable, 0)
-
-
 class ReservedMulticastAddress(Enum):
     Heartbeat = 0
     Preparation = 1
@@ -83,6 +88,28 @@ class ReservedMulticastAddress(Enum):
     Rejection = 3
     Proposal = 4
     Approval = 5
+    SnapshotRequest = 6
+
+
+# Hashed claims are announced as approvals with this proposal id, so they need
+# no message of their own and peers without hashed assignment ignore them as
+# approvals without a proposal. This relies on two things:
+# - Real proposal ids are nanosecond timestamps, so never 0 and an approval
+#   with this id is always a claim, see is_hashed_claim
+# - It is older than any real proposal, so every preparation for the type
+#   supersedes a claim and consensus always wins over hashing
+HASHED_CLAIM_PROPOSAL_ID = 0
+
+
+class MulticastAddressAssignment(Enum):
+    # Every type name is assigned an address through a consensus round
+    Consensus = 0
+    # Type names are hashed onto an address, consensus is only used on collision
+    Hashed = 1
+
+
+def is_hashed_claim(approval: PlexoApproval) -> bool:
+    return approval.proposal_id == HASHED_CLAIM_PROPOSAL_ID
 
 
 def proposal_is_newer(old_proposal, new_proposal):
@@ -119,17 +146,29 @@ class GanglionPlexoMulticast(GanglionExternalBase):
         relevant_neurons: Iterable[Neuron] = (),
         ignored_neurons: Iterable[Neuron] = (),
         allowed_codecs: Iterable[Type] = (),
+        address_assignment: MulticastAddressAssignment = MulticastAddressAssignment.Consensus,
+        assignment_cache_path: Optional[Union[str, os.PathLike]] = None,
+        zmq_io_threads: int = 1,
+        migration_grace_seconds: float = 5.0,
+        rate_limit: Optional[RateLimit] = None,
+        rate_limits: Optional[Mapping[Neuron, RateLimit]] = None,
+        socket_options: ZmqSocketOptions = ZmqSocketOptions(),
     ) -> None:
         super().__init__(
             relevant_neurons=relevant_neurons,
             ignored_neurons=ignored_neurons,
             allowed_codecs=allowed_codecs,
+            rate_limit=rate_limit,
+            rate_limits=rate_limits,
         )
         self.bind_interface = bind_interface
         self.multicast_cidr = multicast_cidr
         self.port = port
         self.heartbeat_interval_seconds = heartbeat_interval_seconds
         self.proposal_timeout_seconds = proposal_timeout_seconds
+        self.address_assignment = address_assignment
+        self.migration_grace_seconds = migration_grace_seconds
+        self.socket_options = socket_options
 
         self._ip_lease_manager = IpLeaseManager(multicast_cidr)
         # First 32 addresses are reserved for the ganglion
@@ -138,14 +177,23 @@ class GanglionPlexoMulticast(GanglionExternalBase):
             self._ip_lease_manager.lease_address(address)
 
         self._synapses_by_address: PMap = pmap()
+        # Addresses peers announced for their hashed types, leased here so
+        # consensus never hands them out to another type
+        self._hashed_claims: PMap[IPAddress, str] = pmap()
+
+        # Every synapse shares one context and is received by one poll loop
+        self._zmq_context = zmq.asyncio.Context(io_threads=zmq_io_threads)
+        self._zmq_poller = ZmqPoller()
+        self._poll_loop_started = False
 
         # Unique id for the current instance, first 64 bits of uuid1
         # Not random but should include the current time and be unique enough
         self.instance_id = uuid.uuid1().int >> 64
 
-        self._heartbeats: PMap = pmap()
-        self._heartbeats_lock = asyncio.Lock()
-        self._num_peers = 0
+        self._peers = PeerTable(heartbeat_interval_seconds)
+
+        # Consensus timeouts and periodic jobs share a single scheduler
+        self._timer_wheel = TimerWheel()
 
         self._proposals: PMap = pmap()
         self._proposals_lock = asyncio.Lock()
@@ -164,10 +212,296 @@ class GanglionPlexoMulticast(GanglionExternalBase):
         self._proposal_approvals: PMap = pmap()
         self._proposal_approvals_lock = asyncio.Lock()
 
+        self._assignment_cache: Optional[AssignmentCache] = (
+            AssignmentCache(assignment_cache_path) if assignment_cache_path else None
+        )
+        self._cached_assignments: PMap[str, CachedAssignment] = pmap()
+        self._load_assignment_cache()
+        # Cached assignments are trusted until peers contradict them. Types a
+        # quorum agreed on since then are confirmed, and at most one
+        # validation runs per type
+        self._confirmed_assignments: PSet[str] = pset()
+        self._validations: PMap[str, asyncio.Task] = pmap()
+        # The cache is written off the event loop, changes made while a write
+        # is running are batched into the next one
+        self._assignment_cache_dirty = False
+        self._assignment_cache_writer: Optional[asyncio.Task] = None
+        self._assignment_cache_write_lock = threading.Lock()
+
+        self._peers.add_join_listener(self._peer_joined)
+
         self._startup_done = False
-        # asyncio.ensure_future(self._startup())#, loop=loop)
+        self._startup_started = False
+
+    def close(self):
+        try:
+            self._timer_wheel.close()
+            self._zmq_poller.close()
+            if self._assignment_cache_writer is not None:
+                self._assignment_cache_writer.cancel()
+                self._assignment_cache_writer = None
+            if self._assignment_cache_dirty:
+                # Nothing is left to write it off the loop
+                self._write_assignment_cache()
+        finally:
+            super().close()
+
+    async def _flush(self):
+        if self._assignment_cache_writer is not None:
+            await asyncio.shield(self._assignment_cache_writer)
+
+    def _load_assignment_cache(self):
+        if not self._assignment_cache:
+            return
+
+        for name, assignment in self._assignment_cache.load().items():
+            multicast_address = assignment.multicast_address
+            if (
+                multicast_address not in self.multicast_cidr
+                or multicast_address in self._reserved_addresses
+            ):
+                logging.warning(
+                    "GanglionPlexoMulticast:{}:_load_assignment_cache:"
+                    "Ignoring cached multicast_address {} for type {}".format(
+                        self.instance_id, multicast_address, name
+                    )
+                )
+                continue
+
+            try:
+                self._ip_lease_manager.lease_address(multicast_address)
+            except IpLeaseExists:
+                logging.warning(
+                    "GanglionPlexoMulticast:{}:_load_assignment_cache:"
+                    "Cached multicast_address {} for type {} is already leased".format(
+                        self.instance_id, multicast_address, name
+                    )
+                )
+                continue
+
+            name_bytes = name.encode("UTF-8")
+            # Seed the accepted proposal so promises to peers carry the cached value
+            self._proposals = self._proposals.set(
+                name_bytes,
+                PlexoProposal(
+                    instance_id=assignment.instance_id,
+                    proposal_id=assignment.proposal_id,
+                    type_name=name_bytes,
+                    multicast_ip=multicast_address.packed,
+                ),
+            )
+            self._cached_assignments = self._cached_assignments.set(name, assignment)
+
+        logging.debug(
+            "GanglionPlexoMulticast:{}:_load_assignment_cache:"
+            "Loaded {} cached assignments".format(
+                self.instance_id, len(self._cached_assignments)
+            )
+        )
+
+    def _cache_assignment(self, approval: PlexoApproval):
+        if not self._assignment_cache:
+            return
+
+        name = approval.type_name.decode("UTF-8")
+        assignment = CachedAssignment(
+            multicast_address=ipaddress.ip_address(approval.multicast_ip),
+            proposal_id=approval.proposal_id,
+            instance_id=approval.instance_id,
+        )
+        self._confirmed_assignments = self._confirmed_assignments.add(name)
+        previous_assignment = self._cached_assignments.get(name)
+        if previous_assignment == assignment:
+            return
+
+        if (
+            previous_assignment
+            and previous_assignment.multicast_address != assignment.multicast_address
+            and previous_assignment.multicast_address not in self._synapses_by_address
+        ):
+            # The cached address was superseded before a synapse ever used it
+            self._ip_lease_manager.release_address(
+                previous_assignment.multicast_address
+            )
+
+        self._cached_assignments = self._cached_assignments.set(name, assignment)
+        self._drop_cached_assignments_at(name, assignment.multicast_address)
+        self._save_assignment_cache()
 
-    async def _heartbeat_loop(self):
+    def _drop_cached_assignments_at(
+        self, name: str, multicast_address: IPAddress
+    ) -> bool:
+        # Peers assigned the address to another type, so those cached entries
+        # are stale. The lease is kept as the address is in use
+        stale_names = [
+            cached_name
+            for cached_name, assignment in self._cached_assignments.items()
+            if cached_name != name and assignment.multicast_address == multicast_address
+        ]
+        for stale_name in stale_names:
+            logging.warning(
+                "GanglionPlexoMulticast:{}:Dropping cached multicast_address {} for "
+                "type {}, peers assigned it to type {}".format(
+                    self.instance_id, multicast_address, stale_name, name
+                )
+            )
+            self._cached_assignments = self._cached_assignments.discard(stale_name)
+
+        return bool(stale_names)
+
+    def _save_assignment_cache(self):
+        if not self._assignment_cache:
+            return
+
+        self._assignment_cache_dirty = True
+        if self._assignment_cache_writer is None:
+            self._assignment_cache_writer = asyncio.create_task(
+                self._assignment_cache_write_loop()
+            )
+
+    async def _assignment_cache_write_loop(self):
+        # Each write fsyncs, so it runs in the default executor and covers
+        # every change made since the previous one started
+        loop = asyncio.get_running_loop()
+        try:
+            while self._assignment_cache_dirty:
+                await loop.run_in_executor(None, self._write_assignment_cache)
+        finally:
+            self._assignment_cache_writer = None
+
+    def _write_assignment_cache(self):
+        if not self._assignment_cache:
+            return
+
+        # A write on close may overlap one still running in the executor, the
+        # lock keeps the newer one from being replaced by the older
+        with self._assignment_cache_write_lock:
+            self._assignment_cache_dirty = False
+            try:
+                self._assignment_cache.save(self._cached_assignments)
+            except OSError as e:
+                logging.error(
+                    f"GanglionPlexoMulticast:{self.instance_id}:"
+                    f"_write_assignment_cache: {e}"
+                )
+
+    def _contradicted_cached_assignments(
+        self, name: str, multicast_address: IPAddress
+    ) -> Iterable[str]:
+        # Peers placing name on multicast_address contradict a cached type on
+        # another address, or another cached type on this one
+        return [
+            cached_name
+            for cached_name, assignment in self._cached_assignments.items()
+            if (cached_name == name)
+            != (assignment.multicast_address == multicast_address)
+        ]
+
+    def _check_cached_assignments(self, name_bytes: bytes, multicast_ip: bytes):
+        if not self._cached_assignments:
+            return
+
+        multicast_address = ipaddress.ip_address(multicast_ip)
+        self._revalidate_cached_assignments(
+            self._contradicted_cached_assignments(
+                name_bytes.decode("UTF-8"), multicast_address
+            ),
+            in_use=multicast_address,
+        )
+
+    def _revalidate_cached_assignments(
+        self, names: Iterable[str], in_use: Optional[IPAddress] = None
+    ):
+        dropped = False
+        for name in names:
+            assignment = self._cached_assignments[name]
+            if name not in self._synapses:
+                # Nothing uses the cached address yet, consensus picks one once
+                # the type is adapted. Its lease is kept if peers use it
+                self._cached_assignments = self._cached_assignments.discard(name)
+                if (
+                    assignment.multicast_address != in_use
+                    and assignment.multicast_address not in self._synapses_by_address
+                    and assignment.multicast_address not in self._hashed_claims
+                ):
+                    self._ip_lease_manager.release_address(assignment.multicast_address)
+                dropped = True
+            elif name not in self._validations:
+                task = asyncio.create_task(
+                    self._validate_cached_assignment(name, assignment.multicast_address)
+                )
+                self._validations = self._validations.set(name, task)
+                task.add_done_callback(partial(self._discard_validation, name))
+                self._add_task(task)
+
+        if dropped:
+            self._save_assignment_cache()
+
+    def _discard_validation(self, name: str, task: asyncio.Task):
+        self._validations = self._validations.discard(name)
+
+    async def _peer_joined(self, instance_id: int):
+        # Peers heard from during startup are the ones the cache was written
+        # with. One that joins later, e.g. across a healed partition, may have
+        # assigned addresses without this node
+        if not self._startup_done:
+            return
+
+        self._revalidate_cached_assignments(
+            [
+                name
+                for name in self._cached_assignments
+                if name not in self._confirmed_assignments
+            ]
+        )
+
+    async def _validate_cached_assignment(self, name: str, cached_address: IPAddress):
+        # Runs a consensus round preferring the cached address once peers
+        # contradicted it. Quorum approvals rewrite the cached entry through
+        # _cache_assignment
+        try:
+            multicast_address = await self._get_address_from_consensus(
+                name, preferred=cached_address
+            )
+        except (PreparationRejection, ConsensusNotReached) as e:
+            logging.debug(f"Unable to validate cached address for type {name}")
+            logging.debug(e, exc_info=True)
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception(
+                f"GanglionPlexoMulticast:{self.instance_id}:_validate_cached_assignment:"
+                f"{name}: {e}"
+            )
+            return
+
+        if multicast_address == cached_address:
+            logging.debug(
+                "GanglionPlexoMulticast:{}:Cached multicast_address {} for type {} "
+                "is valid".format(self.instance_id, cached_address, name)
+            )
+            return
+
+        logging.warning(
+            "GanglionPlexoMulticast:{}:Cached multicast_address {} for type {} "
+            "conflicts with peers, moving to {}".format(
+                self.instance_id, cached_address, name, multicast_address
+            )
+        )
+        synapse = self._synapses.get(name)
+        if synapse is None:
+            return
+
+        conflicting_name = self._conflicting_name(name, multicast_address)
+        if conflicting_name is None:
+            await self.update_synapse_with_address(name, multicast_address)
+        else:
+            await self._move_synapse(
+                conflicting_name, multicast_address, (synapse.neuron, name)
+            )
+
+    def _start_heartbeats(self):
         instance_id = self.instance_id
         try:
             half_interval = self.heartbeat_interval_seconds / 2
@@ -184,43 +518,45 @@ class GanglionPlexoMulticast(GanglionExternalBase):
             )
         )
 
-        heartbeat = PlexoHeartbeat(instance_id=instance_id)
-        while True:
-            try:
-                logging.debug(f"GanglionPlexoMulticast:{instance_id}:Sending heartbeat")
-                await self.transmit_ignore_startup(heartbeat, heartbeat_neuron)
-            except Exception as e:
-                logging.error(e)
-            except asyncio.CancelledError:
-                raise
-            finally:
-                await asyncio.sleep(random_sleep_time)
+        self._timer_wheel.call_periodic(
+            random_sleep_time,
+            self._send_heartbeat,
+            PlexoHeartbeat(instance_id=instance_id),
+            initial_delay=0,
+        )
 
-    async def _num_peers_loop(self):
-        heartbeat_interval_seconds = self.heartbeat_interval_seconds
-        check_seconds = heartbeat_interval_seconds / 2
+    async def _send_heartbeat(self, heartbeat: PlexoHeartbeat):
+        try:
+            logging.debug(
+                f"GanglionPlexoMulticast:{self.instance_id}:Sending heartbeat"
+            )
+            await self.transmit_ignore_startup(heartbeat, heartbeat_neuron)
+        except Exception as e:
+            logging.error(e)
 
-        while True:
-            try:
-                current_time = timer()
-                self._num_peers = ilen(
-                    filter(
-                        lambda heartbeat_time: current_time - heartbeat_time
-                        <= heartbeat_interval_seconds,
-                        self._heartbeats.values(),
-                    )
-                )
-                logging.debug(
-                    "GanglionPlexoMulticast:{}:num_peers - {}".format(
-                        self.instance_id, self._num_peers
-                    )
+    @property
+    def peers(self) -> PeerTable:
+        return self._peers
+
+    @property
+    def _num_peers(self) -> int:
+        return len(self._peers)
+
+    def _start_num_peers_checks(self):
+        self._timer_wheel.call_periodic(
+            self.heartbeat_interval_seconds / 2, self._check_num_peers
+        )
+
+    async def _check_num_peers(self):
+        try:
+            await self._peers.expire()
+            logging.debug(
+                "GanglionPlexoMulticast:{}:num_peers - {}".format(
+                    self.instance_id, self._num_peers
                 )
-            except Exception as e:
-                logging.error(e)
-            except asyncio.CancelledError:
-                raise
-            finally:
-                await asyncio.sleep(check_seconds)
+            )
+        except Exception as e:
+            logging.error(e)
 
     async def _heartbeat_reaction(
         self,
@@ -233,8 +569,7 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                 self.instance_id, heartbeat.instance_id
             )
         )
-        async with self._heartbeats_lock:
-            self._heartbeats = self._heartbeats.set(heartbeat.instance_id, timer())
+        await self._peers.heartbeat(heartbeat.instance_id)
 
     async def _preparation_reaction(
         self,
@@ -332,6 +667,10 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                     self.instance_id
                 )
             )
+            # The value a peer promises is its accepted one, it may still
+            # contradict a cached assignment
+            if promise.multicast_ip is not None:
+                self._check_cached_assignments(promise.type_name, promise.multicast_ip)
             return
 
         name_bytes = promise.type_name
@@ -468,6 +807,11 @@ class GanglionPlexoMulticast(GanglionExternalBase):
             f"GanglionPlexoMulticast:{self.instance_id}:Received approval: {approval}"
         )
 
+        if is_hashed_claim(approval):
+            if approval.instance_id != self.instance_id:
+                await self._hashed_claim_reaction(approval)
+            return
+
         name_bytes = approval.type_name
         type_proposal_key = (name_bytes, approval.proposal_id, approval.instance_id)
         async with self._proposal_approvals_lock:
@@ -488,7 +832,15 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                 self.instance_id, approval, new_approvals_num, half_num_peers
             )
         )
-        if new_approvals_num > half_num_peers:
+        if new_approvals_num <= half_num_peers:
+            # Rounds of this node are left alone, they are what fixes the cache
+            if approval.instance_id != self.instance_id:
+                self._check_cached_assignments(
+                    approval.type_name, approval.multicast_ip
+                )
+        else:
+            self._cache_assignment(approval)
+
             if approval.instance_id == self.instance_id:
                 logging.debug(
                     "GanglionPlexoMulticast:{}:"
@@ -511,16 +863,195 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                     )
                 )
                 # commit new value
-                await self.create_or_update_synapse_with_address(
-                    await self._get_neuron_by_name(name_bytes.decode("UTF-8")),
-                    name_bytes.decode("UTF-8"),
-                    multicast_address=ipaddress.ip_address(approval.multicast_ip),
-                )
+                name = name_bytes.decode("UTF-8")
+                neuron = await self._get_neuron_by_name(name)
+                multicast_address = ipaddress.ip_address(approval.multicast_ip)
+                conflicting_name = self._conflicting_name(name, multicast_address)
+                if conflicting_name is None:
+                    await self.create_or_update_synapse_with_address(
+                        neuron, name, multicast_address=multicast_address
+                    )
+                else:
+                    # A quorum agreed on the address, so the type this node has
+                    # there (e.g. a hashed claim) moves before joining it
+                    self._add_task(
+                        asyncio.create_task(
+                            self._move_synapse(
+                                conflicting_name, multicast_address, (neuron, name)
+                            )
+                        )
+                    )
                 async with self._proposal_approvals_lock:
                     self._proposal_approvals = self._proposal_approvals.discard(
                         type_proposal_key
                     )
 
+    def _conflicting_name(
+        self, name: str, multicast_address: IPAddress
+    ) -> Optional[str]:
+        synapse = self._synapses_by_address.get(multicast_address)
+        if synapse is None or synapse.neuron.name == name:
+            return None
+
+        return synapse.neuron.name
+
+    async def _hashed_claim_reaction(self, claim: PlexoApproval):
+        name = claim.type_name.decode("UTF-8")
+        multicast_address = ipaddress.ip_address(claim.multicast_ip)
+        logging.debug(
+            "GanglionPlexoMulticast:{}:Received hashed claim of {} for type {} "
+            "from instance: {}".format(
+                self.instance_id, multicast_address, name, claim.instance_id
+            )
+        )
+        if (
+            multicast_address not in self.multicast_cidr
+            or multicast_address in self._reserved_addresses
+        ):
+            logging.warning(
+                "GanglionPlexoMulticast:{}:Ignoring hashed claim of {} for type {}".format(
+                    self.instance_id, multicast_address, name
+                )
+            )
+            return
+
+        synapse = cast(Optional[SynapseZmqPlexoPubSubEPGM], self._synapses.get(name))
+        current_address = synapse.multicast_address if synapse is not None else None
+        if current_address is not None and int(current_address) < int(
+            multicast_address
+        ):
+            # The type ended up on two addresses, every node converges on the
+            # lowest one. Both are in multicast_cidr, so of the same version
+            await self._announce_hashed_claim(name, current_address)
+            return
+
+        conflicting_name = self._conflicting_name(name, multicast_address)
+        if conflicting_name is not None and conflicting_name < name:
+            # Two types hashed onto one address on different nodes, every node
+            # lets the type with the lowest name keep it. The peer may not have
+            # heard this node's claim yet
+            await self._announce_hashed_claim(conflicting_name, multicast_address)
+            return
+
+        self._hashed_claims = self._hashed_claims.set(multicast_address, name)
+        if self._drop_cached_assignments_at(name, multicast_address):
+            self._save_assignment_cache()
+        async with self._proposals_lock:
+            # Preparations for the type are answered with the claimed address
+            if claim.type_name not in self._proposals or current_address not in (
+                None,
+                multicast_address,
+            ):
+                self._proposals = self._proposals.set(
+                    claim.type_name,
+                    PlexoProposal(
+                        instance_id=claim.instance_id,
+                        proposal_id=claim.proposal_id,
+                        type_name=claim.type_name,
+                        multicast_ip=claim.multicast_ip,
+                    ),
+                )
+
+        join = (synapse.neuron, name) if synapse is not None else None
+        if conflicting_name is not None:
+            self._add_task(
+                asyncio.create_task(
+                    self._move_synapse(conflicting_name, multicast_address, join)
+                )
+            )
+            return
+
+        if not self._ip_lease_manager.address_is_leased(multicast_address):
+            self._ip_lease_manager.lease_address(multicast_address)
+        if join is not None:
+            await self.update_synapse_with_address(name, multicast_address)
+
+    async def _announce_hashed_claim(self, name: str, multicast_address: IPAddress):
+        name_bytes = name.encode("UTF-8")
+        claim = PlexoProposal(
+            instance_id=self.instance_id,
+            proposal_id=HASHED_CLAIM_PROPOSAL_ID,
+            type_name=name_bytes,
+            multicast_ip=multicast_address.packed,
+        )
+        async with self._proposals_lock:
+            # Preparations for the type are answered with the claimed address
+            if name_bytes not in self._proposals:
+                self._proposals = self._proposals.set(name_bytes, claim)
+
+        announcement = PlexoApproval(
+            instance_id=self.instance_id,
+            proposal_id=HASHED_CLAIM_PROPOSAL_ID,
+            type_name=name_bytes,
+            multicast_ip=multicast_address.packed,
+        )
+        logging.debug(
+            f"GanglionPlexoMulticast:{self.instance_id}:Announcing hashed claim: {announcement}"
+        )
+        await self.transmit(announcement, approval_neuron)
+
+    async def _move_synapse(
+        self,
+        name: str,
+        conflicting_address: IPAddress,
+        join: Optional[Tuple[Neuron, str]] = None,
+    ):
+        # Moves the synapse of name off conflicting_address through consensus,
+        # then optionally joins another type on the freed address
+        try:
+            multicast_address = None
+            while multicast_address is None:
+                try:
+                    multicast_address = await self._get_address_from_consensus(
+                        name, excluded=conflicting_address
+                    )
+                except (PreparationRejection, ConsensusNotReached) as e:
+                    logging.debug(f"Unable to move type {name}")
+                    logging.debug(e, exc_info=True)
+
+            await self.update_synapse_with_address(name, multicast_address)
+
+            if join is not None:
+                neuron, join_name = join
+                await self.create_or_update_synapse_with_address(
+                    neuron, join_name, conflicting_address
+                )
+            elif conflicting_address in self._hashed_claims:
+                self.try_lease_address(conflicting_address)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception(
+                f"GanglionPlexoMulticast:{self.instance_id}:_move_synapse:{name}: {e}"
+            )
+
+    async def _snapshot_request_reaction(
+        self,
+        snapshot_request: PlexoSnapshotRequest,
+        neuron: Neuron[UnencodedType],
+        reaction_id: Optional[UUID] = None,
+    ):
+        name = snapshot_request.type_name.decode("UTF-8")
+        synapse = self._synapses.get(name)
+        if synapse is None or synapse.last_value is None:
+            return
+
+        logging.debug(
+            f"GanglionPlexoMulticast:{self.instance_id}:Answering snapshot request "
+            f"for {name} from instance: {snapshot_request.instance_id}"
+        )
+        # Republished to the group, other subscribers just see the current value again
+        await self.transmit_encoded(synapse.last_value, synapse.neuron)
+
+    async def request_snapshot(self, neuron: Neuron[UnencodedType]):
+        snapshot_request = PlexoSnapshotRequest(
+            instance_id=self.instance_id, type_name=neuron.name.encode("UTF-8")
+        )
+        logging.debug(
+            f"GanglionPlexoMulticast:{self.instance_id}:Sending snapshot request: {snapshot_request}"
+        )
+        await self.transmit(snapshot_request, snapshot_request_neuron)
+
     async def startup(self):
         try:
             await self.create_synapse_with_reserved_address(
@@ -529,8 +1060,8 @@ class GanglionPlexoMulticast(GanglionExternalBase):
             await self.adapt_ignore_startup(
                 heartbeat_neuron, reactants=(self._heartbeat_reaction,)
             )
-            self._add_task(asyncio.create_task(self._heartbeat_loop()))
-            self._add_task(asyncio.create_task(self._num_peers_loop()))
+            self._start_heartbeats()
+            self._start_num_peers_checks()
 
             neuron_reserved_addresses: Iterable[
                 Tuple[Neuron, ReservedMulticastAddress]
@@ -540,6 +1071,7 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                 (rejection_neuron, ReservedMulticastAddress.Rejection),
                 (proposal_neuron, ReservedMulticastAddress.Proposal),
                 (approval_neuron, ReservedMulticastAddress.Approval),
+                (snapshot_request_neuron, ReservedMulticastAddress.SnapshotRequest),
             )
 
             neuron_reactions = (
@@ -548,6 +1080,7 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                 (rejection_neuron, self._rejection_reaction),
                 (proposal_neuron, self._proposal_reaction),
                 (approval_neuron, self._approval_reaction),
+                (snapshot_request_neuron, self._snapshot_request_reaction),
             )
 
             await asyncio.gather(
@@ -574,6 +1107,13 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                 stack_info=True,
             )
 
+    async def start(self):
+        if self._startup_started:
+            return await self.wait_startup()
+
+        self._startup_started = True
+        await self.startup()
+
     async def wait_startup(self):
         heartbeat_interval_seconds = self.heartbeat_interval_seconds
         while not self._startup_done:
@@ -617,7 +1157,12 @@ class GanglionPlexoMulticast(GanglionExternalBase):
 
         return proposal
 
-    async def _get_address_from_consensus(self, name: str) -> IPAddress:
+    async def _get_address_from_consensus(
+        self,
+        name: str,
+        excluded: Optional[IPAddress] = None,
+        preferred: Optional[IPAddress] = None,
+    ) -> IPAddress:
         # 1) Send preparation with new proposal number
         # 2) If received quorum of rejections, do nothing (there is a higher number proposal in progress)
         # 3) Pending quorum of promises, send proposal
@@ -629,7 +1174,7 @@ class GanglionPlexoMulticast(GanglionExternalBase):
 
         preparation = await self._send_preparation(name)
 
-        preparation_timer = Timer(proposal_timeout_seconds)
+        preparation_timer = Timer(proposal_timeout_seconds, wheel=self._timer_wheel)
         preparation_timer.start()
         async with self._preparation_timers_lock:
             self._preparation_timers = self._preparation_timers.set(
@@ -677,8 +1222,12 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                 f"Preparation for type {name} rejected: {preparation}"
             )
 
+        # An excluded address is being moved away from, so it isn't re-proposed
+        excluded_ip = excluded.packed if excluded is not None else None
         promises_with_data = pvector(
-            promise for promise in promises if promise.multicast_ip is not None
+            promise
+            for promise in promises
+            if promise.multicast_ip is not None and promise.multicast_ip != excluded_ip
         )
         if len(promises_with_data):
             promise_with_highest_proposal_id = reduce(
@@ -687,12 +1236,17 @@ class GanglionPlexoMulticast(GanglionExternalBase):
             multicast_address = ipaddress.ip_address(
                 promise_with_highest_proposal_id.multicast_ip
             )
+        elif preferred is not None:
+            multicast_address = preferred
+        elif self.address_assignment is MulticastAddressAssignment.Hashed:
+            # Continue along the probe sequence of the type name
+            multicast_address = self._ip_lease_manager.get_hashed_address(name_bytes)
         else:
             multicast_address = self._ip_lease_manager.get_address()
 
         proposal = await self._send_proposal(preparation, multicast_address)
 
-        proposal_timer = Timer(proposal_timeout_seconds)
+        proposal_timer = Timer(proposal_timeout_seconds, wheel=self._timer_wheel)
         proposal_timer.start()
         async with self._proposal_timers_lock:
             self._proposal_timers = self._proposal_timers.set(
@@ -735,9 +1289,62 @@ class GanglionPlexoMulticast(GanglionExternalBase):
                 "Consensus could not be agreed upon for the proposal."
             )
 
+    def _hashed_address(self, name: str) -> IPAddress:
+        return self._ip_lease_manager.hashed_address(
+            name.encode("UTF-8"), self._reserved_addresses
+        )
+
+    def _lease_hashed_address(self, name: str) -> Optional[IPAddress]:
+        multicast_address = self._hashed_address(name)
+        if self._hashed_claims.get(multicast_address) == name:
+            # Already claimed by a peer for the same type
+            return multicast_address
+
+        leased_address = self._ip_lease_manager.lease_hashed_address(
+            name.encode("UTF-8"), self._reserved_addresses
+        )
+        if leased_address is None:
+            logging.debug(
+                "GanglionPlexoMulticast:{}:_lease_hashed_address:"
+                "Hashed multicast_address {} for type {} is already leased, "
+                "falling back to consensus".format(
+                    self.instance_id, multicast_address, name
+                )
+            )
+
+        return leased_address
+
     async def acquire_address_for_type(self, name: str) -> IPAddress:
         address: Optional[IPAddress] = None
 
+        try:
+            # Leased when the cache was loaded. It is trusted without a round
+            # trip, consensus only runs again once peers contradict it
+            address = self._cached_assignments[name].multicast_address
+        except KeyError:
+            pass
+        else:
+            if name in self._synapses:
+                raise SynapseExists(f"Synapse for {name} already exists.")
+
+            logging.debug(
+                "GanglionPlexoMulticast:{}:acquire_address_for_type:"
+                "Using cached multicast_address {} for type {}".format(
+                    self.instance_id, address, name
+                )
+            )
+            return address
+
+        if self.address_assignment is MulticastAddressAssignment.Hashed:
+            if name in self._synapses:
+                raise SynapseExists(f"Synapse for {name} already exists.")
+
+            # Every peer derives the same address, so no round trips are needed.
+            # The claim is announced so peers can detect collisions
+            address = self._lease_hashed_address(name)
+            if address is not None:
+                await self._announce_hashed_claim(name, address)
+
         while address is None:
             if name in self._synapses:
                 raise SynapseExists(f"Synapse for {name} already exists.")
@@ -764,6 +1371,14 @@ class GanglionPlexoMulticast(GanglionExternalBase):
             if multicast_address in self._synapses_by_address:
                 raise e
 
+    def _start_poll_loop_if_needed(self):
+        if not self._poll_loop_started:
+            logging.debug(
+                f"GanglionPlexoMulticast:{self.instance_id}:Starting poll_loop"
+            )
+            self._poll_loop_started = True
+            self._add_task(asyncio.create_task(self._zmq_poller.poll_loop()))
+
     async def create_synapse_with_address(
         self, neuron: Neuron[UnencodedType], name: str, multicast_address: IPAddress
     ):
@@ -776,12 +1391,18 @@ class GanglionPlexoMulticast(GanglionExternalBase):
         )
 
         self.try_lease_address(multicast_address)
+        self._start_poll_loop_if_needed()
 
         synapse: SynapseZmqPlexoPubSubEPGM = SynapseZmqPlexoPubSubEPGM(
             neuron=neuron,
             multicast_address=multicast_address,
             bind_interface=self.bind_interface,
             port=self.port,
+            zmq_context=self._zmq_context,
+            zmq_poller=self._zmq_poller,
+            migration_grace_seconds=self.migration_grace_seconds,
+            socket_options=self.socket_options,
+            ganglion=type(self).__name__,
         )
         async with self._synapses_lock:
             self._synapses = self._synapses.set(name, synapse)
@@ -945,4 +1566,7 @@ class GanglionPlexoMulticast(GanglionExternalBase):
         raw_reactants: Optional[Iterable[RawReactant[UnencodedType]]] = None,
     ):
         await self.wait_startup()
-        return await super().adapt(neuron, reactants, raw_reactants)
+        await super().adapt(neuron, reactants, raw_reactants)
+
+        if neuron.last_value and (reactants or raw_reactants):
+            await self.request_snapshot(neuron)
@@ -17,19 +17,24 @@
 import asyncio
 import logging
 import pickle
-from typing import Iterable, Optional, Tuple, Type
+from typing import Iterable, Mapping, Optional, Tuple, Type
 
 import zmq
 import zmq.asyncio
 from zmq.asyncio import Socket
 
 from plexo.codec.plexo_codec import plexo_message_codec
+from plexo.conflation import conflation_key
 from plexo.exceptions import SynapseExists, NeuronNotFound
 
 from plexo.ganglion.external import GanglionExternalBase
 from plexo.host_information import get_primary_ip
+from plexo.metrics import metrics, record_received
 from plexo.neuron.neuron import Neuron
+from plexo.priority import PriorityDispatcher, PrioritySender
+from plexo.rate_limit import RateLimit
 from plexo.schema.plexo_message import PlexoMessage
+from plexo.socket_options import TCP_DEFAULT, ZmqSocketOptions
 from plexo.synapse.zeromq_basic import SynapseZmqBasic
 from plexo.typing import UnencodedType, IPAddress
 from plexo.typing.reactant import Reactant, RawReactant
@@ -45,17 +50,23 @@ class GanglionZmqTcpPair(GanglionExternalBase):
         relevant_neurons: Iterable[Neuron] = (),
         ignored_neurons: Iterable[Neuron] = (),
         allowed_codecs: Iterable[Type] = (),
+        rate_limit: Optional[RateLimit] = None,
+        rate_limits: Optional[Mapping[Neuron, RateLimit]] = None,
+        socket_options: ZmqSocketOptions = TCP_DEFAULT,
     ) -> None:
         super().__init__(
             relevant_neurons=relevant_neurons,
             ignored_neurons=ignored_neurons,
             allowed_codecs=allowed_codecs,
+            rate_limit=rate_limit,
+            rate_limits=rate_limits,
         )
         self.bind_interface = None
         self.port = None
         self.peer = peer
         self.connection_string = None
         self.peer = None
+        self.socket_options = socket_options
 
         # Unique id for the current instance, first 64 bits of uuid1
         # Not random but should include the current time and be unique enough
@@ -67,6 +78,9 @@ class GanglionZmqTcpPair(GanglionExternalBase):
         self._recv_loop_running = False
         self._recv_loop_running_lock = asyncio.Lock()
 
+        self._dispatcher = PriorityDispatcher()
+        self._sender: Optional[PrioritySender] = None
+
         if peer is None:
             if not bind_interface:
                 bind_interface = get_primary_ip()
@@ -90,16 +104,23 @@ class GanglionZmqTcpPair(GanglionExternalBase):
 
     def close(self):
         try:
+            self._dispatcher.close()
+            if self._sender:
+                self._sender.close()
             super().close()
         finally:
             if self._socket:
                 self._socket.close()
 
+    async def _flush(self):
+        if self._sender is not None:
+            await self._sender.flush()
+
     def _create_socket(self):
         logging.debug(f"GanglionZmqTcpPair:Creating pair socket")
         self._socket = self._zmq_context.socket(zmq.PAIR)
-        self._socket.setsockopt(zmq.LINGER, 0)
-        self._socket.setsockopt(zmq.IMMEDIATE, 1)
+        self.socket_options.apply(self._socket)
+        self._sender = PrioritySender(self._socket.send_multipart)
 
     def bind_to_socket(self, connection_string: str):
         logging.debug(f"GanglionZmqTcpPair:bind_to_socket {connection_string}")
@@ -123,7 +144,12 @@ class GanglionZmqTcpPair(GanglionExternalBase):
 
         logging.debug(f"GanglionZmqTcpPair:Creating synapse for type {name}")
 
-        synapse: SynapseZmqBasic = SynapseZmqBasic(neuron=neuron, socket=self.socket)
+        synapse: SynapseZmqBasic = SynapseZmqBasic(
+            neuron=neuron,
+            socket=self.socket,
+            sender=self._sender,
+            ganglion=type(self).__name__,
+        )
 
         async with self._synapses_lock:
             self._synapses = self._synapses.set(name, synapse)
@@ -156,10 +182,18 @@ class GanglionZmqTcpPair(GanglionExternalBase):
             try:
                 data = await self.socket.recv()
                 message: PlexoMessage = plexo_message_codec.decode(data)
-                synapse: SynapseExternal = await self.get_synapse_by_name(
-                    message.type_name.decode("UTF-8")
+                neuron_name = message.type_name.decode("UTF-8")
+                if metrics.enabled:
+                    record_received("GanglionZmqTcpPair", neuron_name, data)
+                synapse: SynapseExternal = await self.get_synapse_by_name(neuron_name)
+                # PAIR is a reliable link, so a full lane holds up the socket
+                # instead of dropping and messages keep their order across neurons
+                await self._dispatcher.dispatch(
+                    synapse.neuron.priority,
+                    synapse.transduce,
+                    message.payload,
+                    conflation_key=conflation_key(synapse.neuron, message.payload),
                 )
-                await synapse.transduce(message.payload)
             except AttributeError:
                 # Error/exit if the socket no longer exists
                 async with self._recv_loop_running_lock:
@@ -16,19 +16,25 @@
 
 import asyncio
 import logging
-from typing import Iterable, Optional, Tuple, Type
+from typing import Iterable, Mapping, Optional, Tuple, Type
 
 import zmq
 import zmq.asyncio
-from pyrsistent import pvector
+from pyrsistent import pset, pvector
+from pyrsistent.typing import PSet, PVector
 from zmq.asyncio import Socket
 
+from plexo.conflation import conflation_key
 from plexo.exceptions import SynapseExists, NeuronNotFound
 
 from plexo.ganglion.external import GanglionExternalBase
 from plexo.host_information import get_primary_ip
+from plexo.metrics import metrics, record_dropped, record_received
 from plexo.neuron.neuron import Neuron
-from plexo.synapse.zeromq_basic_pub import SynapseZmqBasicPub
+from plexo.priority import PriorityDispatcher, PrioritySender
+from plexo.rate_limit import RateLimit
+from plexo.socket_options import TCP_DEFAULT, ZmqSocketOptions
+from plexo.synapse.zeromq_basic_pub import SynapseZmqBasicPub, topic, topic_name
 from plexo.typing import UnencodedType, IPAddress
 from plexo.typing.reactant import Reactant, RawReactant
 from plexo.typing.synapse import SynapseExternal
@@ -43,11 +49,18 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
         relevant_neurons: Iterable[Neuron] = (),
         ignored_neurons: Iterable[Neuron] = (),
         allowed_codecs: Iterable[Type] = (),
+        rate_limit: Optional[RateLimit] = None,
+        rate_limits: Optional[Mapping[Neuron, RateLimit]] = None,
+        port_snapshot: Optional[int] = None,
+        snapshot_peers: Iterable[Tuple[IPAddress, int]] = (),
+        socket_options: ZmqSocketOptions = TCP_DEFAULT,
     ) -> None:
         super().__init__(
             relevant_neurons=relevant_neurons,
             ignored_neurons=ignored_neurons,
             allowed_codecs=allowed_codecs,
+            rate_limit=rate_limit,
+            rate_limits=rate_limits,
         )
         if not bind_interface:
             bind_interface = get_primary_ip()
@@ -56,6 +69,7 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
         self.port_pub = port_pub
         logging.debug(f"GanglionZmqTcpPubSub:port_pub {port_pub}")
         self.peers = pvector(peers)
+        self.socket_options = socket_options
 
         # Unique id for the current instance, first 64 bits of uuid1
         # Not random but should include the current time and be unique enough
@@ -74,19 +88,46 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
         self._recv_loop_running = False
         self._recv_loop_running_lock = asyncio.Lock()
 
+        self._dispatcher = PriorityDispatcher()
+        self._sender: Optional[PrioritySender] = None
+
+        # Snapshots of last-value neurons are served on a ROUTER socket and
+        # requested through one DEALER socket per snapshot peer
+        self.port_snapshot = port_snapshot
+        self._socket_snapshot: Optional[Socket] = None
+        self._snapshot_loop_running = False
+        self._snapshot_requesters: PVector[Socket] = pvector()
+        self._snapshot_listening: PSet[Socket] = pset()
+        # Names waiting on a snapshot, a live message received first wins
+        self._snapshot_pending: PSet[str] = pset()
+
         self._create_socket_pub()
 
         for peer in peers:
             self.connect_to_peer(*peer)
 
+        for snapshot_peer in snapshot_peers:
+            self.connect_to_snapshot_peer(*snapshot_peer)
+
     def close(self):
         try:
+            self._dispatcher.close()
+            if self._sender:
+                self._sender.close()
             super().close()
         finally:
             if self._socket_sub:
                 self._socket_sub.close()
             if self._socket_pub:
                 self._socket_pub.close()
+            if self._socket_snapshot:
+                self._socket_snapshot.close()
+            for socket in self._snapshot_requesters:
+                socket.close()
+
+    async def _flush(self):
+        if self._sender is not None:
+            await self._sender.flush()
 
     def _create_socket_pub(self):
         logging.debug(f"GanglionZmqTcpPubSub:Creating publisher")
@@ -94,9 +135,9 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
 
         # this conditional is only to satisfy mypy (I think it's a bug)
         if self._socket_pub is not None:
+            self.socket_options.apply(self._socket_pub)
             self._socket_pub.bind(self.connection_string_pub)
-            self._socket_pub.setsockopt(zmq.LINGER, 0)
-            self._socket_pub.setsockopt(zmq.IMMEDIATE, 1)
+            self._sender = PrioritySender(self._socket_pub.send_multipart)
 
     def _create_socket_sub(self):
         logging.debug(f"GanglionZmqTcpPubSub:Creating subscription")
@@ -104,16 +145,27 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
 
         # this conditional is only to satisfy mypy (I think it's a bug)
         if self._socket_sub is not None:
-            # TODO: Maybe optimize this for specific topics, not sure if it will modify behavior
-            self._socket_sub.setsockopt_string(zmq.SUBSCRIBE, "")
-            self._socket_sub.setsockopt(zmq.LINGER, 0)
-            self._socket_sub.setsockopt(zmq.IMMEDIATE, 1)
+            # Only topics with a synapse are subscribed, so peers filter out the
+            # rest before sending. This is what lets sharded workers share peers
+            for name in self._synapses:
+                self._socket_sub.setsockopt(zmq.SUBSCRIBE, topic(name))
+            self.socket_options.apply(self._socket_sub)
 
     def connect_to_peer(self, address: IPAddress, port: int):
         connection_string = f"tcp://{address.compressed}:{port}"
         self.socket_sub.connect(connection_string)
         logging.debug(f"GanglionZmqTcpPubSub:connect_to_peer {connection_string}")
 
+    def connect_to_snapshot_peer(self, address: IPAddress, port: int):
+        connection_string = f"tcp://{address.compressed}:{port}"
+        socket = self._zmq_context.socket(zmq.DEALER)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.connect(connection_string)
+        self._snapshot_requesters = self._snapshot_requesters.append(socket)
+        logging.debug(
+            f"GanglionZmqTcpPubSub:connect_to_snapshot_peer {connection_string}"
+        )
+
     @property
     def socket_sub(self):
         if not self._socket_sub:
@@ -129,12 +181,21 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
 
         if self._socket_pub is not None:
             synapse: SynapseZmqBasicPub = SynapseZmqBasicPub(
-                neuron=neuron, socket_pub=self._socket_pub
+                neuron=neuron,
+                socket_pub=self._socket_pub,
+                sender=self._sender,
+                ganglion=type(self).__name__,
             )
 
             async with self._synapses_lock:
                 self._synapses = self._synapses.set(name, synapse)
 
+            if self._socket_sub is not None:
+                self._socket_sub.setsockopt(zmq.SUBSCRIBE, topic(name))
+
+            if neuron.last_value:
+                self._start_snapshot_loop_if_needed()
+
             return synapse
 
     async def _create_synapse(self, neuron: Neuron[UnencodedType]):
@@ -162,10 +223,23 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
         while True:
             try:
                 name, data = await self.socket_sub.recv_multipart()
-                synapse: SynapseExternal = await self.get_synapse_by_name(
-                    name.decode("UTF-8")
+                neuron_name = topic_name(name)
+                if metrics.enabled:
+                    record_received("GanglionZmqTcpPubSub", neuron_name, data)
+                if neuron_name in self._snapshot_pending:
+                    self._snapshot_pending = self._snapshot_pending.discard(neuron_name)
+                synapse: SynapseExternal = await self.get_synapse_by_name(neuron_name)
+                # Waiting for room here would stall every other neuron on the
+                # socket, so messages that do not fit are dropped like at a full HWM
+                dispatched = self._dispatcher.dispatch_nowait(
+                    synapse.neuron.priority,
+                    synapse.transduce,
+                    data,
+                    conflation_key=conflation_key(synapse.neuron, data),
+                    ordering_key=neuron_name,
                 )
-                await synapse.transduce(data)
+                if not dispatched:
+                    record_dropped("GanglionZmqTcpPubSub", neuron_name)
             except AttributeError:
                 # Error/exit if the socket no longer exists
                 async with self._recv_loop_running_lock:
@@ -180,6 +254,67 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
             except Exception as e:
                 logging.exception(f"GanglionZmqTcpPubSub:_recv_loop: {e}")
 
+    def _start_snapshot_loop_if_needed(self):
+        if self.port_snapshot is None or self._snapshot_loop_running:
+            return
+
+        socket = self._socket_snapshot = self._zmq_context.socket(zmq.ROUTER)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.bind(f"tcp://{self.bind_interface}:{self.port_snapshot}")
+        logging.debug(
+            f"GanglionZmqTcpPubSub:Serving snapshots on port {self.port_snapshot}"
+        )
+        self._snapshot_loop_running = True
+        self._add_task(asyncio.create_task(self._snapshot_loop(socket)))
+
+    async def _snapshot_loop(self, socket: Socket):
+        while True:
+            try:
+                identity, name = await socket.recv_multipart()
+                synapse = self._synapses.get(name.decode("UTF-8"))
+                if synapse is not None and synapse.last_value is not None:
+                    await socket.send_multipart([identity, name, synapse.last_value])
+                else:
+                    await socket.send_multipart([identity, name])
+            except asyncio.CancelledError:
+                self._snapshot_loop_running = False
+                raise
+            except Exception as e:
+                logging.exception(f"GanglionZmqTcpPubSub:_snapshot_loop: {e}")
+
+    async def _snapshot_reply_loop(self, socket: Socket):
+        while True:
+            try:
+                name, *payload = await socket.recv_multipart()
+                neuron_name = name.decode("UTF-8")
+                # Peers without a value reply with the name only
+                if not payload or neuron_name not in self._snapshot_pending:
+                    continue
+                self._snapshot_pending = self._snapshot_pending.discard(neuron_name)
+                synapse: SynapseExternal = await self.get_synapse_by_name(neuron_name)
+                await self._dispatcher.dispatch(
+                    synapse.neuron.priority,
+                    synapse.transduce,
+                    payload[0],
+                    ordering_key=neuron_name,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.exception(f"GanglionZmqTcpPubSub:_snapshot_reply_loop: {e}")
+
+    async def request_snapshot(self, neuron: Neuron[UnencodedType]):
+        if not self._snapshot_requesters:
+            return
+
+        logging.debug(f"GanglionZmqTcpPubSub:Requesting snapshot of {neuron.name}")
+        self._snapshot_pending = self._snapshot_pending.add(neuron.name)
+        for socket in self._snapshot_requesters:
+            if socket not in self._snapshot_listening:
+                self._snapshot_listening = self._snapshot_listening.add(socket)
+                self._add_task(asyncio.create_task(self._snapshot_reply_loop(socket)))
+            await socket.send(neuron.name.encode("UTF-8"))
+
     async def adapt(
         self,
         neuron: Neuron[UnencodedType],
@@ -189,3 +324,6 @@ class GanglionZmqTcpPubSub(GanglionExternalBase):
         await super().adapt(neuron, reactants=reactants, raw_reactants=raw_reactants)
 
         await self._start_recv_loop_if_needed()
+
+        if neuron.last_value and (reactants or raw_reactants):
+            await self.request_snapshot(neuron)
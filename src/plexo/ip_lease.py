@@ -14,51 +14,231 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
 
-from pyrsistent import pmap
+
+import hashlib
+import math
+import random
+import re
+from enum import Enum
+from typing import Container, Dict, Iterator, Optional
 
 from plexo.exceptions import IpLeaseExists, IpNotFound, IpNotLeased, IpsExhausted
 from plexo.typing import IPAddress, IPNetwork
 
+# Number of addresses tracked by a single page of the lease bitmap (4 KiB)
+PAGE_SIZE = 1 << 15
+PAGE_BYTES = PAGE_SIZE // 8
+
+_not_full_byte = re.compile(b"[^\xff]")
+
+
+class IpLeaseStrategy(Enum):
+    Sequential = 0
+    Random = 1
+    Hashed = 2
+
+
+def hashed_offsets(key: bytes, size: int) -> Iterator[int]:
+    # Double hashing over [0, size): every peer derives the same probe sequence
+    # for a key, and a step coprime with size visits each offset exactly once
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    start = int.from_bytes(digest[:8], "big") % size
+    step = int.from_bytes(digest[8:], "big") % size or 1
+    while math.gcd(step, size) != 1:
+        step += 1
+
+    return ((start + i * step) % size for i in range(size))
+
 
 class IpLeaseManager:
-    def __init__(self, ip_cidr: IPNetwork):
-        self._ip_lease_map = pmap({ip_address: False for ip_address in ip_cidr})
-        self._available_ips = set(self._ip_lease_map.keys())
+    def __init__(
+        self,
+        ip_cidr: IPNetwork,
+        strategy: IpLeaseStrategy = IpLeaseStrategy.Sequential,
+    ):
+        self._ip_cidr = ip_cidr
+        self._network_address = int(ip_cidr.network_address)
+        self._size = ip_cidr.num_addresses
+        self.strategy = strategy
+
+        # Addresses are computed from their offset in the cidr and leases are
+        # tracked in a bitmap, one bit per address. Pages of the bitmap are only
+        # allocated while they hold a lease, so an untouched /8 costs nothing.
+        self._pages: Dict[int, bytearray] = {}
+        self._page_leases: Dict[int, int] = {}
+        self._num_leased = 0
+        self._next_offset = 0
+
+    def __len__(self):
+        return self._num_leased
+
+    @property
+    def available(self) -> int:
+        return self._size - self._num_leased
+
+    def _offset(self, ip_address: IPAddress) -> int:
+        offset = int(ip_address) - self._network_address
+        if ip_address.version != self._ip_cidr.version or not (
+            0 <= offset < self._size
+        ):
+            raise IpNotFound(f"ip_address {ip_address} not found")
+
+        return offset
+
+    def _address(self, offset: int) -> IPAddress:
+        return self._ip_cidr.network_address + offset
+
+    def _is_leased(self, offset: int) -> bool:
+        page_index, bit = divmod(offset, PAGE_SIZE)
+        try:
+            page = self._pages[page_index]
+        except KeyError:
+            return False
+
+        return bool(page[bit >> 3] & (1 << (bit & 7)))
+
+    def _lease(self, offset: int):
+        page_index, bit = divmod(offset, PAGE_SIZE)
+        try:
+            page = self._pages[page_index]
+        except KeyError:
+            page = self._pages[page_index] = bytearray(PAGE_BYTES)
+            self._page_leases[page_index] = 0
+
+        page[bit >> 3] |= 1 << (bit & 7)
+        self._page_leases[page_index] += 1
+        self._num_leased += 1
+
+    def _release(self, offset: int):
+        page_index, bit = divmod(offset, PAGE_SIZE)
+        page = self._pages[page_index]
+
+        page[bit >> 3] &= ~(1 << (bit & 7))
+        self._num_leased -= 1
+        self._page_leases[page_index] -= 1
+        if not self._page_leases[page_index]:
+            del self._pages[page_index]
+            del self._page_leases[page_index]
+
+    def _find_free_between(self, start: int, stop: int) -> Optional[int]:
+        while start < stop:
+            page_index, bit = divmod(start, PAGE_SIZE)
+            page_start = page_index * PAGE_SIZE
+            try:
+                page = self._pages[page_index]
+            except KeyError:
+                return start
+
+            byte_index = bit >> 3
+            # Check the remaining bits of the first byte, then let the regex
+            # engine skip over full bytes
+            for bit_index in range(bit & 7, 8):
+                if not page[byte_index] & (1 << bit_index):
+                    offset = page_start + (byte_index << 3) + bit_index
+                    return offset if offset < stop else None
+
+            match = _not_full_byte.search(page, byte_index + 1)
+            if match:
+                byte_index = match.start()
+                byte = page[byte_index]
+                # Lowest clear bit of the byte
+                bit_index = (~byte & (byte + 1)).bit_length() - 1
+                offset = page_start + (byte_index << 3) + bit_index
+                return offset if offset < stop else None
+
+            start = page_start + PAGE_SIZE
+
+        return None
+
+    def _find_free(self, start: int) -> int:
+        if self._num_leased >= self._size:
+            raise IpsExhausted("No more ip addresses are available")
+
+        offset = self._find_free_between(start, self._size)
+        if offset is None:
+            offset = self._find_free_between(0, start)
+        if offset is None:
+            raise IpsExhausted("No more ip addresses are available")
+
+        return offset
 
     def lease_address(self, ip_address: IPAddress):
-        if ip_address not in self._ip_lease_map:
-            raise IpNotFound(f"ip_address {ip_address} not found")
+        offset = self._offset(ip_address)
 
-        if self._ip_lease_map[ip_address]:
+        if self._is_leased(offset):
             raise IpLeaseExists(f"ip_address {ip_address} is already leased")
 
-        self._ip_lease_map = self._ip_lease_map.set(ip_address, True)
-        self._available_ips.discard(ip_address)
+        self._lease(offset)
 
         return ip_address
 
     def release_address(self, ip_address: IPAddress):
-        if ip_address not in self._ip_lease_map:
-            raise IpNotFound(f"ip_address {ip_address} not found")
+        offset = self._offset(ip_address)
 
-        if not self._ip_lease_map[ip_address]:
+        if not self._is_leased(offset):
             raise IpNotLeased(f"ip_address {ip_address} is not leased")
 
-        self._ip_lease_map = self._ip_lease_map.set(ip_address, False)
-        self._available_ips.add(ip_address)
+        self._release(offset)
 
         return ip_address
 
-    def address_is_leased(self, ip_address: IPAddress):
-        if ip_address not in self._ip_lease_map:
-            raise IpNotFound(f"ip_address {ip_address} not found")
-
-        return self._ip_lease_map[ip_address]
-
-    def get_address(self) -> IPAddress:
-        try:
-            ip_address = self._available_ips.pop()
-        except KeyError:
-            raise IpsExhausted("No more ip addresses are available")
-
-        return self.lease_address(ip_address)
+    def address_is_leased(self, ip_address: IPAddress) -> bool:
+        return self._is_leased(self._offset(ip_address))
+
+    def get_address(
+        self,
+        strategy: Optional[IpLeaseStrategy] = None,
+        key: Optional[bytes] = None,
+    ) -> IPAddress:
+        strategy = strategy or self.strategy
+
+        if strategy is IpLeaseStrategy.Hashed:
+            if key is None:
+                raise ValueError("A key is required for IpLeaseStrategy.Hashed")
+            if self._num_leased >= self._size:
+                raise IpsExhausted("No more ip addresses are available")
+
+            offset = next(
+                offset
+                for offset in hashed_offsets(key, self._size)
+                if not self._is_leased(offset)
+            )
+        elif strategy is IpLeaseStrategy.Random:
+            offset = self._find_free(
+                random.randrange(self._size)  # nosec - This is not security related
+            )
+        else:
+            offset = self._find_free(self._next_offset)
+            self._next_offset = (offset + 1) % self._size
+
+        self._lease(offset)
+
+        return self._address(offset)
+
+    def hashed_addresses(self, key: bytes) -> Iterator[IPAddress]:
+        return (self._address(offset) for offset in hashed_offsets(key, self._size))
+
+    def get_hashed_address(self, key: bytes) -> IPAddress:
+        return self.get_address(IpLeaseStrategy.Hashed, key)
+
+    def hashed_address(
+        self, key: bytes, excluded: Container[IPAddress] = ()
+    ) -> IPAddress:
+        # First address of the probe sequence that isn't excluded, leased or not,
+        # so every peer derives the same one for a key
+        for address in self.hashed_addresses(key):
+            if address not in excluded:
+                return address
+
+        raise IpsExhausted("No more ip addresses are available")
+
+    def lease_hashed_address(
+        self, key: bytes, excluded: Container[IPAddress] = ()
+    ) -> Optional[IPAddress]:
+        # None when the hashed address is already leased, callers fall back to
+        # another way of assigning an address rather than probing further
+        address = self.hashed_address(key, excluded)
+        if self.address_is_leased(address):
+            return None
+
+        return self.lease_address(address)
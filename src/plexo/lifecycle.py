@@ -0,0 +1,46 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+from typing import Iterable, List
+
+
+def cancel_tasks(tasks: Iterable[asyncio.Task]) -> List[asyncio.Task]:
+    # Never blocks, the cancelled tasks finish on their own loop. Tasks of a
+    # loop that is already closed can't be cancelled and are skipped
+    cancelled = []
+    for task in tasks:
+        if task.done():
+            continue
+        try:
+            task.cancel()
+        except RuntimeError:
+            continue
+        cancelled.append(task)
+
+    return cancelled
+
+
+async def wait_cancelled(tasks: Iterable[asyncio.Task], timeout: float) -> bool:
+    # True when every task finished within timeout
+    current_task = asyncio.current_task()
+    tasks = [task for task in tasks if task is not current_task]
+    if not tasks:
+        return True
+
+    _, pending = await asyncio.wait(tasks, timeout=max(timeout, 0))
+    return not pending
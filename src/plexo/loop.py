@@ -0,0 +1,121 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+import os
+from importlib import metadata
+from typing import Any, Callable, Coroutine, Dict, Optional, TypeVar
+
+from plexo.exceptions import EventLoopNotAvailable
+
+# Third-party loops register a zero-argument callable returning an event loop
+# policy under this entry point group
+ENTRY_POINT_GROUP = "plexo.event_loops"
+ENVIRONMENT_VARIABLE = "PLEXO_EVENT_LOOP"
+DEFAULT_EVENT_LOOP = "asyncio"
+
+T = TypeVar("T")
+PolicyFactory = Callable[[], asyncio.AbstractEventLoopPolicy]
+
+
+def asyncio_policy() -> asyncio.AbstractEventLoopPolicy:
+    return asyncio.DefaultEventLoopPolicy()
+
+
+def uvloop_policy() -> asyncio.AbstractEventLoopPolicy:
+    import uvloop
+
+    return uvloop.EventLoopPolicy()
+
+
+def _entry_point_policy(entry_point: metadata.EntryPoint) -> PolicyFactory:
+    def policy() -> asyncio.AbstractEventLoopPolicy:
+        return entry_point.load()()
+
+    return policy
+
+
+def _entry_points():
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=ENTRY_POINT_GROUP)
+
+    return entry_points.get(ENTRY_POINT_GROUP, ())
+
+
+def event_loops() -> Dict[str, PolicyFactory]:
+    # The built-in loops are listed even when plexo isn't installed as a
+    # distribution, e.g. when running from a source checkout
+    factories: Dict[str, PolicyFactory] = {
+        "asyncio": asyncio_policy,
+        "uvloop": uvloop_policy,
+    }
+    for entry_point in _entry_points():
+        factories[entry_point.name] = _entry_point_policy(entry_point)
+
+    return factories
+
+
+def available_event_loops() -> Dict[str, PolicyFactory]:
+    available = {}
+    for name, factory in event_loops().items():
+        try:
+            factory()
+        except ImportError:
+            continue
+        available[name] = factory
+
+    return available
+
+
+def event_loop_policy(name: Optional[str] = None) -> asyncio.AbstractEventLoopPolicy:
+    # "auto" picks uvloop when it is installed and falls back to asyncio
+    name = name or os.environ.get(ENVIRONMENT_VARIABLE) or DEFAULT_EVENT_LOOP
+    if name == "auto":
+        try:
+            return uvloop_policy()
+        except ImportError:
+            return asyncio_policy()
+
+    try:
+        factory = event_loops()[name]
+    except KeyError:
+        raise EventLoopNotAvailable(f"Event loop {name} is not registered.")
+
+    try:
+        return factory()
+    except ImportError as e:
+        raise EventLoopNotAvailable(f"Event loop {name} is not installed: {e}")
+
+
+def install(name: Optional[str] = None) -> asyncio.AbstractEventLoopPolicy:
+    policy = event_loop_policy(name)
+    logging.debug(f"loop:install {type(policy).__module__}.{type(policy).__name__}")
+    asyncio.set_event_loop_policy(policy)
+
+    return policy
+
+
+def run(main: Coroutine[Any, Any, T], event_loop: Optional[str] = None) -> T:
+    try:
+        install(event_loop)
+    except EventLoopNotAvailable:
+        main.close()
+        raise
+
+    return asyncio.run(main)
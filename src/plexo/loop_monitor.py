@@ -0,0 +1,183 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+import sys
+import threading
+from time import monotonic
+from types import FrameType
+from typing import Dict, Optional, Tuple
+
+from plexo.metrics import MetricsRegistry, metrics
+
+# Dispatch sites only label their calls while at least one monitor is running
+_running_monitors = 0
+
+
+def monitoring() -> bool:
+    return _running_monitors > 0
+
+
+def _name(func) -> str:
+    # Look through partials and bound methods to the underlying function
+    func = getattr(func, "func", func)
+    func = getattr(func, "__func__", func)
+    return getattr(func, "__qualname__", None) or type(func).__name__
+
+
+async def dispatch_reactant(reactant, data, neuron, reaction_id=None):
+    # The watchdog looks for this frame on the loop thread's stack, so a stall is
+    # blamed on the reactant and neuron of this call rather than whichever
+    # neuron last registered the same function
+    label = ("reactant", _name(reactant), neuron.name)
+    return await reactant(data, neuron, reaction_id)
+
+
+def dispatch_codec(kind: str, neuron_name: str, func, data):
+    label = (kind, _name(func), neuron_name)
+    return func(data)
+
+
+_dispatch_code = frozenset((dispatch_reactant.__code__, dispatch_codec.__code__))
+
+
+def describe_frame(frame: Optional[FrameType]) -> Tuple[str, str]:
+    # The innermost dispatched reactant or codec on the stack is the culprit,
+    # otherwise fall back to wherever the loop thread currently is
+    innermost = frame
+    while frame is not None:
+        if frame.f_code in _dispatch_code:
+            kind, name, neuron_name = frame.f_locals["label"]
+            return f"{kind} {name} on {neuron_name}", neuron_name
+
+        frame = frame.f_back
+
+    if innermost is None:
+        return "unknown", ""
+
+    code = innermost.f_code
+    return f"{code.co_name} at {code.co_filename}:{innermost.f_lineno}", ""
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval_seconds: float = 0.05,
+        block_threshold_seconds: float = 0.1,
+        warning_interval_seconds: float = 10.0,
+        registry: MetricsRegistry = metrics,
+    ):
+        self.interval_seconds = interval_seconds
+        self.block_threshold_seconds = block_threshold_seconds
+        self.warning_interval_seconds = warning_interval_seconds
+        self.registry = registry
+
+        self.lag_histogram = registry.histogram("loop_lag_ns")
+        self.stalls: Dict[str, int] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self._last_tick = monotonic()
+        self._stall: Optional[Tuple[str, str]] = None
+        self._last_warning: Optional[float] = None
+        self._suppressed_warnings = 0
+
+    def start(self):
+        global _running_monitors
+
+        if self._loop is not None:
+            return
+
+        loop = self._loop = asyncio.get_running_loop()
+        _running_monitors += 1
+        self._stopped.clear()
+        self._last_tick = monotonic()
+        self._schedule(loop, loop.time() + self.interval_seconds)
+
+        self._watchdog = threading.Thread(
+            target=self._watch,
+            args=(threading.get_ident(),),
+            name="plexo-loop-monitor",
+            daemon=True,
+        )
+        self._watchdog.start()
+
+    def stop(self):
+        global _running_monitors
+
+        if self._loop is not None:
+            _running_monitors -= 1
+        self._stopped.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        self._loop = None
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop, when: float):
+        self._handle = loop.call_at(when, self._tick, loop, when)
+
+    def _tick(self, loop: asyncio.AbstractEventLoop, expected: float):
+        now = loop.time()
+        lag = now - expected
+        self.lag_histogram.record(int(lag * 1e9))
+        self._last_tick = monotonic()
+
+        stall, self._stall = self._stall, None
+        if lag >= self.block_threshold_seconds:
+            self._report_stall(lag, stall or ("unknown", ""))
+
+        self._schedule(loop, now + self.interval_seconds)
+
+    def _watch(self, loop_thread_id: int):
+        interval = self.block_threshold_seconds / 2
+        while not self._stopped.wait(interval):
+            if self._stall is not None:
+                continue
+            if monotonic() - self._last_tick < self.block_threshold_seconds:
+                continue
+
+            frame = sys._current_frames().get(loop_thread_id)
+            self._stall = describe_frame(frame)
+
+    def _report_stall(self, lag: float, stall: Tuple[str, str]):
+        culprit, neuron_name = stall
+        self.stalls[culprit] = self.stalls.get(culprit, 0) + 1
+        self.registry.histogram("loop_blocked_ns", neuron=neuron_name).record(
+            int(lag * 1e9)
+        )
+
+        now = monotonic()
+        if (
+            self._last_warning is not None
+            and now - self._last_warning < self.warning_interval_seconds
+        ):
+            self._suppressed_warnings += 1
+            return
+
+        suppressed, self._suppressed_warnings = self._suppressed_warnings, 0
+        self._last_warning = now
+        logging.warning(
+            f"LoopMonitor:event loop blocked for {lag * 1000:.1f}ms by {culprit}"
+            + (f" ({suppressed} similar warnings suppressed)" if suppressed else "")
+        )
@@ -0,0 +1,250 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from time import perf_counter_ns
+from typing import Dict, Iterator, Optional, Tuple
+
+# Metrics are keyed by (name, ganglion, neuron)
+MetricKey = Tuple[str, str, str]
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Histogram:
+    # HDR-style log-linear buckets: values below 2**sub_bucket_bits are counted
+    # exactly, larger values are grouped by their power of two and split into
+    # linear sub-buckets, which bounds the relative error at 2**-(sub_bucket_bits-1)
+    __slots__ = ("sub_bucket_bits", "count", "total", "min", "max", "_buckets")
+
+    def __init__(self, sub_bucket_bits: int = 5):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+        self._buckets: Dict[int, int] = {}
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+
+        return (shift << self.sub_bucket_bits) + (value >> shift)
+
+    def _upper_bound(self, index: int) -> int:
+        shift, sub_bucket = divmod(index, 1 << self.sub_bucket_bits)
+        if not shift:
+            return sub_bucket
+
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value: int):
+        value = max(int(value), 0)
+        index = self._index(value)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def buckets(self) -> Iterator[Tuple[int, int]]:
+        # (upper bound, count) for every populated bucket, in ascending order
+        for index in sorted(self._buckets):
+            yield self._upper_bound(index), self._buckets[index]
+
+    def percentile(self, percentile: float) -> int:
+        if not self.count:
+            return 0
+
+        threshold = self.count * percentile / 100
+        seen = 0
+        for upper_bound, count in self.buckets():
+            seen += count
+            if seen >= threshold:
+                return min(upper_bound, self.max or upper_bound)
+
+        return self.max or 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min or 0,
+            "max": self.max or 0,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False):
+        # Instrumented code checks this flag before doing any work
+        self.enabled = enabled
+
+        self._counters: Dict[MetricKey, Counter] = {}
+        self._histograms: Dict[MetricKey, Histogram] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self._counters = {}
+        self._histograms = {}
+
+    def counter(self, name: str, ganglion: str = "", neuron: str = "") -> Counter:
+        key = (name, ganglion, neuron)
+        try:
+            return self._counters[key]
+        except KeyError:
+            counter = self._counters[key] = Counter()
+            return counter
+
+    def histogram(self, name: str, ganglion: str = "", neuron: str = "") -> Histogram:
+        key = (name, ganglion, neuron)
+        try:
+            return self._histograms[key]
+        except KeyError:
+            histogram = self._histograms[key] = Histogram()
+            return histogram
+
+    def counters(self) -> Iterator[Tuple[MetricKey, Counter]]:
+        return iter(tuple(self._counters.items()))
+
+    def histograms(self) -> Iterator[Tuple[MetricKey, Histogram]]:
+        return iter(tuple(self._histograms.items()))
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": [
+                {"name": name, "ganglion": ganglion, "neuron": neuron, "value": c.value}
+                for (name, ganglion, neuron), c in self.counters()
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "ganglion": ganglion,
+                    "neuron": neuron,
+                    **histogram.snapshot(),
+                }
+                for (name, ganglion, neuron), histogram in self.histograms()
+            ],
+        }
+
+
+metrics = MetricsRegistry()
+
+
+def record_transmitted(ganglion: str, neuron: str, data):
+    metrics.counter("transmitted_messages", ganglion, neuron).inc()
+    metrics.counter("transmitted_bytes", ganglion, neuron).inc(len(data))
+
+
+def record_received(ganglion: str, neuron: str, data):
+    metrics.counter("received_messages", ganglion, neuron).inc()
+    metrics.counter("received_bytes", ganglion, neuron).inc(len(data))
+
+
+def record_dropped(ganglion: str, neuron: str):
+    metrics.counter("dropped_messages", ganglion, neuron).inc()
+
+
+def record_duration(name: str, ganglion: str, neuron: str, start_ns: int):
+    metrics.histogram(name, ganglion, neuron).record(perf_counter_ns() - start_ns)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(ganglion: str, neuron: str, **extra: str) -> str:
+    labels = {"ganglion": ganglion, "neuron": neuron, **extra}
+    return ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+
+
+def format_prometheus(registry: MetricsRegistry = metrics) -> str:
+    lines = []
+
+    counters: Dict[str, list] = {}
+    for (name, ganglion, neuron), counter in registry.counters():
+        counters.setdefault(name, []).append((ganglion, neuron, counter))
+    for name, samples in sorted(counters.items()):
+        lines.append(f"# TYPE plexo_{name}_total counter")
+        for ganglion, neuron, counter in samples:
+            lines.append(
+                f"plexo_{name}_total{{{_labels(ganglion, neuron)}}} {counter.value}"
+            )
+
+    histograms: Dict[str, list] = {}
+    for (name, ganglion, neuron), histogram in registry.histograms():
+        histograms.setdefault(name, []).append((ganglion, neuron, histogram))
+    for name, samples in sorted(histograms.items()):
+        lines.append(f"# TYPE plexo_{name} summary")
+        for ganglion, neuron, histogram in samples:
+            for quantile in ("0.5", "0.9", "0.99", "0.999"):
+                labels = _labels(ganglion, neuron, quantile=quantile)
+                value = histogram.percentile(float(quantile) * 100)
+                lines.append(f"plexo_{name}{{{labels}}} {value}")
+            labels = _labels(ganglion, neuron)
+            lines.append(f"plexo_{name}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"plexo_{name}_count{{{labels}}} {histogram.count}")
+
+    return "\n".join(lines) + "\n"
+
+
+async def serve_prometheus(
+    host: str = "127.0.0.1", port: int = 9464, registry: MetricsRegistry = metrics
+):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # Only the request line matters, every path serves the metrics
+            await reader.readline()
+            body = format_prometheus(registry).encode("UTF-8")
+            writer.write(
+                b"HTTP/1.0 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                b"Content-Length: " + str(len(body)).encode("ascii") + b"\r\n\r\n"
+            )
+            writer.write(body)
+            await writer.drain()
+        except ConnectionError as e:
+            logging.debug(f"serve_prometheus: {e}")
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -16,7 +16,9 @@
 
 from typing import Generic, Type, Optional
 
+from plexo.conflation import Conflation
 from plexo.namespace.namespace import Namespace
+from plexo.priority import Priority
 from plexo.typing import EncodedType, UnencodedType
 from plexo.typing.codec import Codec
 
@@ -28,11 +30,18 @@ class Neuron(Codec, Generic[UnencodedType]):
         namespace: Namespace,
         codec: Codec,
         type_name_alias: Optional[str] = None,
+        priority: Priority = Priority.Normal,
+        conflation: Optional[Conflation] = None,
+        last_value: bool = False,
     ):
         self.type: Type[UnencodedType] = _type
         self.namespace: Namespace = namespace
         self.codec = codec
         self.type_name_alias = type_name_alias or self.type.__name__
+        self.priority = priority
+        self.conflation = conflation
+        # Publishers keep the last encoded value to answer snapshot requests
+        self.last_value = last_value
 
     def __eq__(self, other):
         return self.name == other.name
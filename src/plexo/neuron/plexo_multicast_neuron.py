@@ -21,20 +21,44 @@ from plexo.codec.plexo_multicast_codec import (
     plexo_promise_codec,
     plexo_proposal_codec,
     plexo_rejection_codec,
+    plexo_snapshot_request_codec,
 )
 from plexo.namespace import plexo_namespace
 from plexo.neuron.neuron import Neuron
+from plexo.priority import Priority
 from plexo.schema.plexo_multicast.plexo_approval import PlexoApproval
 from plexo.schema.plexo_multicast.plexo_heartbeat import PlexoHeartbeat
 from plexo.schema.plexo_multicast.plexo_preparation import PlexoPreparation
 from plexo.schema.plexo_multicast.plexo_promise import PlexoPromise
 from plexo.schema.plexo_multicast.plexo_proposal import PlexoProposal
 from plexo.schema.plexo_multicast.plexo_rejection import PlexoRejection
+from plexo.schema.plexo_multicast.plexo_snapshot_request import PlexoSnapshotRequest
 
 
-approval_neuron = Neuron(PlexoApproval, plexo_namespace, plexo_approval_codec)
-heartbeat_neuron = Neuron(PlexoHeartbeat, plexo_namespace, plexo_heartbeat_codec)
-preparation_neuron = Neuron(PlexoPreparation, plexo_namespace, plexo_preparation_codec)
-promise_neuron = Neuron(PlexoPromise, plexo_namespace, plexo_promise_codec)
-proposal_neuron = Neuron(PlexoProposal, plexo_namespace, plexo_proposal_codec)
-rejection_neuron = Neuron(PlexoRejection, plexo_namespace, plexo_rejection_codec)
+approval_neuron = Neuron(
+    PlexoApproval, plexo_namespace, plexo_approval_codec, priority=Priority.Control
+)
+heartbeat_neuron = Neuron(
+    PlexoHeartbeat, plexo_namespace, plexo_heartbeat_codec, priority=Priority.Control
+)
+preparation_neuron = Neuron(
+    PlexoPreparation,
+    plexo_namespace,
+    plexo_preparation_codec,
+    priority=Priority.Control,
+)
+promise_neuron = Neuron(
+    PlexoPromise, plexo_namespace, plexo_promise_codec, priority=Priority.Control
+)
+proposal_neuron = Neuron(
+    PlexoProposal, plexo_namespace, plexo_proposal_codec, priority=Priority.Control
+)
+rejection_neuron = Neuron(
+    PlexoRejection, plexo_namespace, plexo_rejection_codec, priority=Priority.Control
+)
+snapshot_request_neuron = Neuron(
+    PlexoSnapshotRequest,
+    plexo_namespace,
+    plexo_snapshot_request_codec,
+    priority=Priority.Control,
+)
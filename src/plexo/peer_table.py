@@ -0,0 +1,103 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from timeit import default_timer as timer
+from typing import Callable, Coroutine, Iterable, Optional, Tuple
+
+from pyrsistent import pdeque, pmap, pvector
+from pyrsistent.typing import PDeque, PMap, PVector
+
+PeerListener = Callable[[int], Coroutine]
+
+
+class PeerTable:
+    def __init__(self, expiry_seconds: float):
+        self.expiry_seconds = expiry_seconds
+
+        self._deadlines: PMap[int, float] = pmap()
+        # Every deadline is the time of a heartbeat plus the same expiry, so
+        # appending keeps the queue sorted and evictions only look at its head.
+        # Entries superseded by a newer heartbeat are skipped when they expire.
+        self._expirations: PDeque[Tuple[float, int]] = pdeque()
+
+        self._join_listeners: PVector[PeerListener] = pvector()
+        self._leave_listeners: PVector[PeerListener] = pvector()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, instance_id: int):
+        return instance_id in self._deadlines
+
+    def __iter__(self):
+        return iter(self._deadlines)
+
+    def add_join_listener(self, listener: PeerListener):
+        self._join_listeners = self._join_listeners.append(listener)
+
+    def remove_join_listener(self, listener: PeerListener):
+        self._join_listeners = self._join_listeners.remove(listener)
+
+    def add_leave_listener(self, listener: PeerListener):
+        self._leave_listeners = self._leave_listeners.append(listener)
+
+    def remove_leave_listener(self, listener: PeerListener):
+        self._leave_listeners = self._leave_listeners.remove(listener)
+
+    async def _emit(self, listeners: Iterable[PeerListener], instance_id: int):
+        results = await asyncio.gather(
+            *(listener(instance_id) for listener in listeners),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logging.error(f"PeerTable:_emit: {result}", exc_info=result)
+
+    async def heartbeat(self, instance_id: int, now: Optional[float] = None):
+        if now is None:
+            now = timer()
+
+        joined = instance_id not in self._deadlines
+        deadline = now + self.expiry_seconds
+        self._deadlines = self._deadlines.set(instance_id, deadline)
+        self._expirations = self._expirations.append((deadline, instance_id))
+
+        await self.expire(now)
+
+        if joined:
+            logging.debug(f"PeerTable:Peer joined: {instance_id}")
+            await self._emit(self._join_listeners, instance_id)
+
+    async def expire(self, now: Optional[float] = None):
+        if now is None:
+            now = timer()
+
+        left = []
+        while self._expirations and self._expirations.left[0] < now:
+            deadline, instance_id = self._expirations.left
+            self._expirations = self._expirations.popleft()
+            if self._deadlines.get(instance_id) == deadline:
+                self._deadlines = self._deadlines.discard(instance_id)
+                left.append(instance_id)
+
+        for instance_id in left:
+            logging.debug(f"PeerTable:Peer left: {instance_id}")
+            await self._emit(self._leave_listeners, instance_id)
+
+        return left
@@ -18,17 +18,21 @@ import asyncio
 import itertools
 import logging
 from asyncio import Lock
-from typing import Iterable, Optional, Set, Tuple, Union
+from time import perf_counter_ns
+from typing import Awaitable, Iterable, Mapping, Optional, Set, Tuple, Union
 from uuid import UUID, uuid4
 from weakref import WeakKeyDictionary
 
-from pyrsistent import pset
-from pyrsistent.typing import PSet
+from pyrsistent import pmap, pset
+from pyrsistent.typing import PMap, PSet
 from returns.curry import partial
 
 from plexo.ganglion.inproc import GanglionInproc
 from plexo.ganglion.internal import GanglionInternalBase
 from plexo.neuron.neuron import Neuron
+from plexo.producer import ThreadSafeProducer
+from plexo.rate_limit import RateLimit
+from plexo.tracing import tracer
 from plexo.typing import EncodedType, UnencodedType
 from plexo.typing.ganglion import Ganglion, GanglionExternal
 from plexo.typing.reactant import Reactant
@@ -40,7 +44,10 @@ class Plexus(Ganglion):
         ganglia: Iterable[Union[Ganglion, GanglionExternal]] = (),
         relevant_neurons: Iterable[Neuron] = (),
         ignored_neurons: Iterable[Neuron] = (),
+        rate_limits: Optional[Mapping[Neuron, RateLimit]] = None,
     ):
+        self._rate_limits: PMap[Neuron, RateLimit] = pmap(rate_limits or {})
+
         ganglia = pset(ganglia)
         self.inproc_ganglion: GanglionInternalBase = GanglionInproc(
             relevant_neurons=relevant_neurons, ignored_neurons=ignored_neurons
@@ -90,6 +97,51 @@ class Plexus(Ganglion):
         except RuntimeError:
             pass
 
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def start(self):
+        # Ganglia start concurrently, e.g. multicast heartbeat waits overlap
+        await asyncio.gather(
+            *(
+                ganglion.start()
+                for ganglion in itertools.chain(
+                    self._internal_ganglia, self._external_ganglia
+                )
+            )
+        )
+
+    async def aclose(self, timeout: float = 10.0) -> float:
+        # Every ganglion shuts down in parallel, the whole shutdown is bounded
+        # by timeout and returns how long it took
+        start = perf_counter_ns()
+        ganglia = list(itertools.chain(self._internal_ganglia, self._external_ganglia))
+        closing = {
+            asyncio.ensure_future(ganglion.aclose(timeout)): ganglion
+            for ganglion in ganglia
+        }
+        done, pending = await asyncio.wait(closing, timeout=timeout)
+        for task in pending:
+            task.cancel()
+            ganglion = closing[task]
+            logging.warning(
+                f"Plexus:aclose {type(ganglion).__name__} did not close within {timeout}s"
+            )
+            ganglion.close()
+        for task in done:
+            if task.exception() is not None:
+                logging.error(
+                    f"Plexus:aclose {type(closing[task]).__name__}: {task.exception()}"
+                )
+
+        elapsed = (perf_counter_ns() - start) / 1e9
+        logging.info(f"Plexus:aclose closed {len(ganglia)} ganglia in {elapsed:.3f}s")
+        return elapsed
+
     async def _internal_reaction(
         self,
         current: Ganglion,
@@ -114,11 +166,7 @@ class Plexus(Ganglion):
                 for ganglion in self._external_ganglia - self._reactions[reaction_id]
             )
 
-        try:
-            await asyncio.gather(*itertools.chain(internal, external))
-        except ValueError:
-            # Got empty list, continue
-            pass
+        await self._fan_out(itertools.chain(internal, external), neuron, reaction_id)
 
     async def _external_internal_reaction(
         self,
@@ -140,11 +188,7 @@ class Plexus(Ganglion):
                 for ganglion in self._internal_ganglia - self._reactions[reaction_id]
             )
 
-        try:
-            await asyncio.gather(*internal)
-        except ValueError:
-            # Got empty list, continue
-            pass
+        await self._fan_out(internal, neuron, reaction_id)
 
     async def _external_external_reaction(
         self,
@@ -166,11 +210,25 @@ class Plexus(Ganglion):
                 for ganglion in self._external_ganglia - self._reactions[reaction_id]
             )
 
+        await self._fan_out(external, neuron, reaction_id)
+
+    async def _fan_out(
+        self,
+        transmissions: Iterable[Awaitable],
+        neuron: Neuron[UnencodedType],
+        reaction_id: UUID,
+    ):
+        start = perf_counter_ns()
         try:
-            await asyncio.gather(*external)
+            await asyncio.gather(*transmissions)
         except ValueError:
             # Got empty list, continue
             pass
+        finally:
+            if tracer.enabled:
+                tracer.record(
+                    "Plexus.fan_out", "plexus", start, reaction_id, neuron=neuron.name
+                )
 
     async def get_reaction_lock(self, reaction_id: Optional[UUID]) -> Tuple[UUID, Lock]:
         if reaction_id is None:
@@ -261,7 +319,24 @@ class Plexus(Ganglion):
         neuron: Neuron[UnencodedType],
         reaction_id: Optional[UUID] = None,
     ):
-        return await self.inproc_ganglion.transmit(data, neuron, reaction_id)
+        try:
+            rate_limit = self._rate_limits[neuron]
+        except KeyError:
+            return await self.inproc_ganglion.transmit(data, neuron, reaction_id)
+
+        return await rate_limit.submit(
+            partial(
+                self.inproc_ganglion.transmit, neuron=neuron, reaction_id=reaction_id
+            ),
+            data,
+            key=neuron,
+        )
+
+    def producer(
+        self, neuron: Neuron[UnencodedType], max_pending: Optional[int] = None
+    ) -> ThreadSafeProducer:
+        # Call from the event loop, the returned handle's put() is thread-safe
+        return ThreadSafeProducer(partial(self.transmit, neuron=neuron), max_pending)
 
     async def adapt(
         self,
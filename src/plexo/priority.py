@@ -0,0 +1,400 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from collections import deque
+from enum import IntEnum
+from typing import (
+    Awaitable,
+    ByteString,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Hashable,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from plexo.conflation import ConflationKey, record_conflated
+
+T = TypeVar("T")
+# Multipart message frames, any buffer zmq can send
+Frames = Sequence[ByteString]
+
+
+class Priority(IntEnum):
+    # Lower values are more urgent
+    Control = 0
+    High = 1
+    Normal = 2
+    Bulk = 3
+
+
+class PriorityLanes(Generic[T]):
+    def __init__(self, max_size: Optional[int] = None):
+        # Maximum number of items waiting in each lane, None is unbounded
+        self.max_size = max_size
+
+        # Lane entries are [conflation key, item] so a queued item can be replaced
+        self._lanes: Dict[Priority, Deque[list]] = {
+            priority: deque() for priority in Priority
+        }
+        self._conflatable: Dict[Hashable, list] = {}
+        self._changed = asyncio.Condition()
+
+        self.conflated = 0
+
+    def pending(self, priority: Optional[Priority] = None) -> int:
+        if priority is not None:
+            return len(self._lanes[priority])
+
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _more_urgent_pending(self, priority: Priority) -> bool:
+        return any(self._lanes[other] for other in Priority if other < priority)
+
+    def _pop(self, lane: Deque[list]) -> T:
+        key, item = entry = lane.popleft()
+        if key is not None and self._conflatable.get(key) is entry:
+            del self._conflatable[key]
+        return item
+
+    async def put(
+        self, priority: Priority, item: T, conflation_key: Hashable = None
+    ) -> Optional[T]:
+        # With a conflation key, an item still queued under the same key is
+        # replaced in place and returned instead of queueing another one
+        if conflation_key is not None:
+            try:
+                entry = self._conflatable[conflation_key]
+            except KeyError:
+                pass
+            else:
+                replaced, entry[1] = entry[1], item
+                self.conflated += 1
+                return replaced
+
+        lane = self._lanes[priority]
+        async with self._changed:
+            max_size = self.max_size
+            if max_size is not None:
+                await self._changed.wait_for(lambda: len(lane) < max_size)
+            entry = [conflation_key, item]
+            lane.append(entry)
+            if conflation_key is not None:
+                self._conflatable[conflation_key] = entry
+            self._changed.notify_all()
+
+        return None
+
+    async def get(self) -> Tuple[Priority, T]:
+        async with self._changed:
+            await self._changed.wait_for(self.pending)
+            for priority in Priority:
+                lane = self._lanes[priority]
+                if lane:
+                    item = self._pop(lane)
+                    self._changed.notify_all()
+                    return priority, item
+
+        raise RuntimeError("PriorityLanes:get: woke up without pending items")
+
+    async def get_lane(self, priority: Priority) -> T:
+        # Items are only handed out once every more urgent lane has been drained
+        lane = self._lanes[priority]
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: lane and not self._more_urgent_pending(priority)
+            )
+            item = self._pop(lane)
+            self._changed.notify_all()
+            return item
+
+
+class _OrderedQueue:
+    # Items of one priority and ordering key, started one at a time and in order
+    __slots__ = ("items", "ready", "space", "worker", "retired")
+
+    def __init__(self):
+        # Entries are [conflation key, func, args] so a queued item can be replaced
+        self.items: Deque[list] = deque()
+        self.ready = asyncio.Event()
+        self.space = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+        # Set once its ordering key is discarded, the worker exits when drained
+        self.retired = False
+
+
+class PriorityDispatcher:
+    def __init__(self, max_pending: Optional[int] = 1024):
+        # Maximum number of items waiting per priority and ordering key, None is
+        # unbounded
+        self.max_pending = max_pending
+
+        # Every ordering key gets its own worker per priority, so items with the
+        # same key run in order while a slow key never holds up the others;
+        # priority only decides which waiting items may start
+        self._queues: Dict[Tuple[Priority, Hashable], _OrderedQueue] = {}
+        self._pending: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self._conflatable: Dict[Hashable, list] = {}
+
+        self.conflated = 0
+        self.dropped = 0
+
+    def pending(self, priority: Optional[Priority] = None) -> int:
+        if priority is not None:
+            return self._pending[priority]
+
+        return sum(self._pending.values())
+
+    def _startable(self, priority: Priority) -> bool:
+        return not any(self._pending[other] for other in Priority if other < priority)
+
+    def _queue(self, priority: Priority, ordering_key: Hashable) -> _OrderedQueue:
+        try:
+            queue = self._queues[(priority, ordering_key)]
+        except KeyError:
+            queue = self._queues[(priority, ordering_key)] = _OrderedQueue()
+            queue.worker = asyncio.create_task(
+                self._work(priority, ordering_key, queue)
+            )
+        queue.retired = False
+        return queue
+
+    def _full(self, queue: _OrderedQueue) -> bool:
+        return self.max_pending is not None and len(queue.items) >= self.max_pending
+
+    def _conflate(
+        self,
+        conflation_key: Optional[ConflationKey],
+        func: Callable[..., Awaitable],
+        args: tuple,
+    ) -> bool:
+        # An item still queued under the same conflation key is replaced in place
+        if conflation_key is None:
+            return False
+
+        try:
+            entry = self._conflatable[conflation_key]
+        except KeyError:
+            return False
+
+        entry[1], entry[2] = func, args
+        self.conflated += 1
+        record_conflated(conflation_key)
+        return True
+
+    def _append(
+        self,
+        priority: Priority,
+        queue: _OrderedQueue,
+        conflation_key: Optional[ConflationKey],
+        func: Callable[..., Awaitable],
+        args: tuple,
+    ):
+        entry = [conflation_key, func, args]
+        queue.items.append(entry)
+        if conflation_key is not None:
+            self._conflatable[conflation_key] = entry
+        self._pending[priority] += 1
+        if self._startable(priority):
+            queue.ready.set()
+
+    def _pop(
+        self, priority: Priority, queue: _OrderedQueue
+    ) -> Tuple[Callable[..., Awaitable], tuple]:
+        key, func, args = entry = queue.items.popleft()
+        if key is not None and self._conflatable.get(key) is entry:
+            del self._conflatable[key]
+        queue.space.set()
+
+        self._pending[priority] -= 1
+        if not self._pending[priority] and any(
+            self._pending[other] for other in Priority if other > priority
+        ):
+            # Less urgent items may start now that this lane is drained
+            for (other, _), other_queue in self._queues.items():
+                if other > priority and other_queue.items and self._startable(other):
+                    other_queue.ready.set()
+
+        return func, args
+
+    async def dispatch(
+        self,
+        priority: Priority,
+        func: Callable[..., Awaitable],
+        *args,
+        conflation_key: Optional[ConflationKey] = None,
+        ordering_key: Hashable = None,
+    ):
+        # Only waits when the queue is full, the work itself runs on its worker
+        if self._conflate(conflation_key, func, args):
+            return
+
+        queue = self._queue(priority, ordering_key)
+        while self._full(queue):
+            queue.space.clear()
+            await queue.space.wait()
+            if self._queues.get((priority, ordering_key)) is not queue:
+                # The dispatcher was closed while waiting
+                return
+
+        self._append(priority, queue, conflation_key, func, args)
+
+    def dispatch_nowait(
+        self,
+        priority: Priority,
+        func: Callable[..., Awaitable],
+        *args,
+        conflation_key: Optional[ConflationKey] = None,
+        ordering_key: Hashable = None,
+    ) -> bool:
+        # Never waits, an item that does not fit its full queue is dropped
+        if self._conflate(conflation_key, func, args):
+            return True
+
+        queue = self._queue(priority, ordering_key)
+        if self._full(queue):
+            self.dropped += 1
+            return False
+
+        self._append(priority, queue, conflation_key, func, args)
+        return True
+
+    async def _work(
+        self, priority: Priority, ordering_key: Hashable, queue: _OrderedQueue
+    ):
+        while True:
+            await queue.ready.wait()
+            if not queue.items and queue.retired:
+                del self._queues[(priority, ordering_key)]
+                return
+            if not queue.items or not self._startable(priority):
+                queue.ready.clear()
+                continue
+
+            func, args = self._pop(priority, queue)
+            try:
+                await func(*args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.exception(f"PriorityDispatcher:{priority.name}: {e}")
+
+    def discard(self, ordering_key: Hashable):
+        # Forgets an ordering key that will not be dispatched again, items
+        # already queued under it still run before its workers exit
+        for priority in Priority:
+            queue = self._queues.get((priority, ordering_key))
+            if queue is None:
+                continue
+
+            if queue.items:
+                queue.retired = True
+                continue
+
+            del self._queues[(priority, ordering_key)]
+            if queue.worker is not None:
+                queue.worker.cancel()
+            queue.space.set()
+
+    def close(self):
+        for queue in self._queues.values():
+            if queue.worker is not None:
+                queue.worker.cancel()
+            # Release anything waiting for room in a queue that is going away
+            queue.space.set()
+        self._queues = {}
+        self._pending = {priority: 0 for priority in Priority}
+        self._conflatable = {}
+
+
+class PrioritySender:
+    def __init__(
+        self,
+        send: Callable[[Frames], Awaitable],
+        max_pending: Optional[int] = None,
+    ):
+        self._send = send
+        self._lanes: PriorityLanes[Tuple[Frames, asyncio.Future]] = PriorityLanes(
+            max_pending
+        )
+        self._sender: Optional[asyncio.Task] = None
+        self._unsent: Set[asyncio.Future] = set()
+
+    @property
+    def conflated(self) -> int:
+        return self._lanes.conflated
+
+    async def flush(self):
+        # Waits for every message queued so far to be sent or superseded
+        if self._unsent:
+            await asyncio.wait(set(self._unsent))
+
+    async def send(
+        self,
+        priority: Priority,
+        frames: Frames,
+        conflation_key: Optional[ConflationKey] = None,
+    ):
+        # A single sender task owns the socket, so multipart messages never
+        # interleave and the most urgent queued message always goes first
+        if self._sender is None:
+            self._sender = asyncio.create_task(self._send_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        self._unsent.add(future)
+        future.add_done_callback(self._unsent.discard)
+        replaced = await self._lanes.put(priority, (frames, future), conflation_key)
+        if replaced is not None and conflation_key is not None:
+            # The replaced message counts as sent, it was superseded by this one
+            _, replaced_future = replaced
+            if not replaced_future.done():
+                replaced_future.set_result(None)
+            record_conflated(conflation_key)
+
+        return await future
+
+    async def _send_loop(self):
+        while True:
+            _, (frames, future) = await self._lanes.get()
+            if future.done():
+                continue
+
+            try:
+                await self._send(frames)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+    def close(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        # Nothing will send what is still queued, so its senders must not wait
+        for future in tuple(self._unsent):
+            future.cancel()
+        self._lanes = PriorityLanes(self._lanes.max_size)
@@ -0,0 +1,102 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional
+
+
+class ThreadSafeProducer:
+    # Lets threads outside the event loop transmit without a future and a
+    # loop wakeup per item. put() appends to a deque, which is atomic, and
+    # only schedules a wakeup when none is pending, so the loop drains every
+    # item queued since the last wakeup in one go. Items are transmitted in
+    # the order they were put.
+    #
+    # With max_pending the oldest items are dropped once the loop falls
+    # behind, and counted in dropped. close() stops the producer after what
+    # was put before it has been transmitted, items put after close() are not.
+    def __init__(
+        self,
+        transmit: Callable[[Any], Awaitable],
+        max_pending: Optional[int] = None,
+    ):
+        # Created from inside the loop, the handle is then shared with threads
+        self._loop = asyncio.get_running_loop()
+        self._transmit = transmit
+
+        self._items: Deque[Any] = deque(maxlen=max_pending)
+        # Puts to a bounded deque take the lock, so each drop is counted once
+        self._items_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._wakeup_pending = False
+        self._closing = False
+        self.wakeups = 0
+        self.dropped = 0
+
+        self._task: Optional[asyncio.Task] = self._loop.create_task(self._drain())
+
+    @property
+    def pending(self) -> int:
+        return len(self._items)
+
+    def put(self, data: Any):
+        items = self._items
+        if items.maxlen is None:
+            items.append(data)
+        else:
+            with self._items_lock:
+                if len(items) == items.maxlen:
+                    self.dropped += 1
+                items.append(data)
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _drain(self):
+        items = self._items
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            self.wakeups += 1
+            # Cleared before draining, anything put from here on either gets
+            # drained below or schedules the next wakeup
+            self._wakeup_pending = False
+            while items:
+                with self._items_lock:
+                    data = items.popleft()
+                try:
+                    await self._transmit(data)
+                except Exception as e:
+                    logging.exception(f"ThreadSafeProducer:_drain: {e}")
+            if self._closing:
+                return
+
+    def close(self):
+        # Thread-safe, the drain task exits once every pending item is sent
+        if not self._closing:
+            self._closing = True
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def aclose(self):
+        # Call from the event loop, waits until every pending item is sent
+        self.close()
+        if self._task is not None:
+            await self._task
+            self._task = None
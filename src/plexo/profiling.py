@@ -0,0 +1,161 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+from random import random
+from time import perf_counter_ns, thread_time_ns
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Stats are keyed by (stage, name), e.g. ("reactant", "handle_order")
+ProfileKey = Tuple[str, str]
+
+
+class CallStats:
+    __slots__ = ("calls", "wall_ns", "cpu_ns", "max_wall_ns", "slow_calls")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_ns = 0
+        self.cpu_ns = 0
+        self.max_wall_ns = 0
+        self.slow_calls = 0
+
+
+class _CpuTimed:
+    # Drives an awaitable step by step, so only the CPU time spent inside it is
+    # counted and not that of other tasks running while it is suspended
+    __slots__ = ("awaitable", "cpu_ns")
+
+    def __init__(self, awaitable: Awaitable):
+        self.awaitable = awaitable
+        self.cpu_ns = 0
+
+    def __await__(self):
+        iterator = self.awaitable.__await__()
+        value = None
+        error: Optional[BaseException] = None
+        while True:
+            start = thread_time_ns()
+            try:
+                if error is None:
+                    yielded = iterator.send(value)
+                else:
+                    yielded = iterator.throw(error)
+            except StopIteration as e:
+                return e.value
+            finally:
+                self.cpu_ns += thread_time_ns() - start
+
+            try:
+                value = yield yielded
+                error = None
+            except BaseException as e:
+                value = None
+                error = e
+
+
+class Profiler:
+    def __init__(
+        self, sample_rate: float = 0.0, slow_call_seconds: Optional[float] = None
+    ):
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.slow_call_seconds = slow_call_seconds
+
+        self._stats: Dict[ProfileKey, CallStats] = {}
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, sample_rate: float):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
+
+        self._sample_rate = sample_rate
+        # Instrumented code checks this flag before doing any work
+        self.enabled = sample_rate > 0.0
+
+    def sample(self) -> bool:
+        return random() < self._sample_rate
+
+    def reset(self):
+        self._stats = {}
+
+    def record(self, stage: str, name: str, wall_ns: int, cpu_ns: int):
+        key = (stage, name)
+        try:
+            stats = self._stats[key]
+        except KeyError:
+            stats = self._stats[key] = CallStats()
+
+        stats.calls += 1
+        stats.wall_ns += wall_ns
+        stats.cpu_ns += cpu_ns
+        if wall_ns > stats.max_wall_ns:
+            stats.max_wall_ns = wall_ns
+
+        slow_call_seconds = self.slow_call_seconds
+        if slow_call_seconds is not None and wall_ns > slow_call_seconds * 1e9:
+            stats.slow_calls += 1
+            logging.warning(
+                f"Profiler:slow {stage} {name}: "
+                f"wall {wall_ns / 1e6:.3f}ms, cpu {cpu_ns / 1e6:.3f}ms"
+            )
+
+    def call(self, stage: str, name: str, func: Callable[..., T], *args) -> T:
+        start_cpu = thread_time_ns()
+        start = perf_counter_ns()
+        try:
+            return func(*args)
+        finally:
+            wall_ns = perf_counter_ns() - start
+            self.record(stage, name, wall_ns, thread_time_ns() - start_cpu)
+
+    async def profile(self, stage: str, name: str, awaitable: Awaitable[T]) -> T:
+        cpu_timed = _CpuTimed(awaitable)
+        start = perf_counter_ns()
+        try:
+            return await cpu_timed
+        finally:
+            self.record(stage, name, perf_counter_ns() - start, cpu_timed.cpu_ns)
+
+    def top(self, n: int = 10, by: str = "wall_ns") -> List[Tuple[str, str, CallStats]]:
+        ranked = sorted(
+            self._stats.items(), key=lambda item: getattr(item[1], by), reverse=True
+        )
+        return [(stage, name, stats) for (stage, name), stats in ranked[:n]]
+
+    def report(self, n: int = 10, by: str = "wall_ns") -> str:
+        lines = [
+            f"{'stage':<10} {'name':<40} {'calls':>8} {'mean wall ms':>13} "
+            f"{'max wall ms':>12} {'mean cpu ms':>12} {'slow':>6}"
+        ]
+        for stage, name, stats in self.top(n, by):
+            lines.append(
+                f"{stage:<10} {name:<40} {stats.calls:>8} "
+                f"{stats.wall_ns / stats.calls / 1e6:>13.3f} "
+                f"{stats.max_wall_ns / 1e6:>12.3f} "
+                f"{stats.cpu_ns / stats.calls / 1e6:>12.3f} {stats.slow_calls:>6}"
+            )
+        return "\n".join(lines)
+
+
+profiler = Profiler()
@@ -0,0 +1,164 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from enum import Enum, auto
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class RateLimitPolicy(Enum):
+    # Wait until the message fits within the limit
+    Wait = auto()
+    # Discard messages over the limit
+    Drop = auto()
+    # Keep only the newest message over the limit per key and send it when allowed
+    Coalesce = auto()
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+
+        self._tokens = self.burst
+        self._updated = monotonic()
+
+    def _refill(self):
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, tokens: float = 1) -> float:
+        # Seconds until the given number of tokens is available
+        self._refill()
+        return max(0.0, (min(tokens, self.burst) - self._tokens) / self.rate)
+
+    def consume(self, tokens: float = 1) -> float:
+        # Takes the tokens even if that leaves the bucket in debt, and returns how
+        # long the caller should wait; callers are served in the order they came
+        self._refill()
+        self._tokens -= tokens
+        return max(0.0, -self._tokens / self.rate)
+
+
+Send = Callable[[Any], Awaitable]
+
+
+class RateLimit:
+    def __init__(
+        self,
+        messages_per_second: Optional[float] = None,
+        bytes_per_second: Optional[float] = None,
+        policy: RateLimitPolicy = RateLimitPolicy.Wait,
+        burst_seconds: float = 1.0,
+    ):
+        self.policy = policy
+        self._messages = (
+            TokenBucket(messages_per_second, messages_per_second * burst_seconds)
+            if messages_per_second
+            else None
+        )
+        self._bytes = (
+            TokenBucket(bytes_per_second, bytes_per_second * burst_seconds)
+            if bytes_per_second
+            else None
+        )
+
+        self.dropped = 0
+        self.coalesced = 0
+
+        self._pending: Dict[Hashable, Tuple[Send, Any, Optional[int]]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _delay(self, size: Optional[int]) -> float:
+        delay = 0.0
+        if self._messages is not None:
+            delay = self._messages.delay(1)
+        if self._bytes is not None and size is not None:
+            delay = max(delay, self._bytes.delay(size))
+        return delay
+
+    def _consume(self, size: Optional[int]) -> float:
+        delay = 0.0
+        if self._messages is not None:
+            delay = self._messages.consume(1)
+        if self._bytes is not None and size is not None:
+            delay = max(delay, self._bytes.consume(size))
+        return delay
+
+    async def submit(
+        self,
+        send: Send,
+        data: Any,
+        size: Optional[int] = None,
+        key: Hashable = None,
+    ):
+        if self.policy is RateLimitPolicy.Wait:
+            delay = self._consume(size)
+            if delay:
+                await asyncio.sleep(delay)
+            return await send(data)
+
+        if key not in self._pending and not self._delay(size):
+            self._consume(size)
+            return await send(data)
+
+        if self.policy is RateLimitPolicy.Drop:
+            self.dropped += 1
+            return None
+
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = (send, data, size)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        try:
+            while self._pending:
+                key = next(iter(self._pending))
+                _, _, size = self._pending[key]
+                delay = self._delay(size)
+                if delay:
+                    await asyncio.sleep(delay)
+                    continue
+
+                send, data, size = self._pending.pop(key)
+                self._consume(size)
+                try:
+                    await send(data)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.exception(f"RateLimit:_flush: {e}")
+        finally:
+            self._flusher = None
+
+    async def flush(self):
+        # Waits until every coalesced message has been sent
+        while self._flusher is not None:
+            await asyncio.shield(self._flusher)
+
+    def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+        self._pending = {}
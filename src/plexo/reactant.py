@@ -0,0 +1,130 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import inspect
+from concurrent.futures import Executor, ThreadPoolExecutor
+from enum import Enum, auto
+from functools import partial
+from typing import Any, Callable, Iterable, Optional
+from uuid import UUID
+
+from plexo.neuron.neuron import Neuron
+from plexo.typing.reactant import Reactant
+
+SyncReactantFunction = Callable[[Any, Neuron, Optional[UUID]], Any]
+
+
+class ExecutionPolicy(Enum):
+    # Run on the event loop thread, only suitable for quick calls
+    Inline = auto()
+    # Run on the loop's default executor, or the one given
+    ThreadPool = auto()
+    # Run on a single thread owned by this reactant
+    DedicatedThread = auto()
+
+
+class SyncReactant:
+    def __init__(
+        self,
+        func: SyncReactantFunction,
+        policy: ExecutionPolicy = ExecutionPolicy.ThreadPool,
+        max_concurrency: Optional[int] = 1,
+        executor: Optional[Executor] = None,
+    ):
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+
+        self.func = func
+        self.policy = policy
+        self.max_concurrency = max_concurrency
+
+        self._executor = executor
+        self._owns_executor = False
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def __eq__(self, other):
+        # Compare as the wrapped function so adding or removing it by itself works
+        if isinstance(other, SyncReactant):
+            return self.func == other.func
+        return self.func == other
+
+    def __hash__(self):
+        return hash(self.func)
+
+    def __repr__(self):
+        return f"SyncReactant({self.func!r}, {self.policy})"
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self._executor is None and self.policy is ExecutionPolicy.DedicatedThread:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix=f"plexo-{getattr(self.func, '__name__', 'reactant')}",
+            )
+            self._owns_executor = True
+        return self._executor
+
+    async def __call__(
+        self, data: Any, neuron: Neuron, reaction_id: Optional[UUID] = None
+    ):
+        if self.policy is ExecutionPolicy.Inline:
+            result = self.func(data, neuron, reaction_id)
+        else:
+            if self._semaphore is None and self.max_concurrency is not None:
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            call = partial(self.func, data, neuron, reaction_id)
+            loop = asyncio.get_running_loop()
+            if self._semaphore is None:
+                result = await loop.run_in_executor(self._get_executor(), call)
+            else:
+                async with self._semaphore:
+                    result = await loop.run_in_executor(self._get_executor(), call)
+
+        if inspect.isawaitable(result):
+            return await result
+        return result
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._owns_executor = False
+
+
+def _is_async(reactant) -> bool:
+    return inspect.iscoroutinefunction(reactant) or inspect.iscoroutinefunction(
+        getattr(reactant, "__call__", None)
+    )
+
+
+def as_reactant(
+    reactant: Any, policy: ExecutionPolicy = ExecutionPolicy.ThreadPool
+) -> Reactant:
+    if isinstance(reactant, SyncReactant) or _is_async(reactant):
+        return reactant
+
+    return SyncReactant(reactant, policy)
+
+
+def close_reactants(reactants: Iterable):
+    # Only SyncReactants own resources, e.g. a DedicatedThread executor
+    for reactant in reactants:
+        if isinstance(reactant, SyncReactant):
+            reactant.close()
@@ -0,0 +1,335 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import asyncio
+import ipaddress
+import logging
+from time import perf_counter_ns
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+from plexo import loop as plexo_loop
+from plexo.exceptions import EventLoopNotAvailable
+from plexo.ganglion.external import GanglionExternalBase
+from plexo.metrics import Histogram
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.segmented_log import LogRecord, SegmentedLog
+from plexo.typing import EncodedType
+from plexo.typing.codec import Codec
+from plexo.typing.ganglion import Ganglion
+
+
+class RawCodec(Codec):
+    # Passes encoded bytes through untouched while keeping the original codec name
+    def __init__(self, name: str):
+        self._name = name
+
+    def encode(self, data: EncodedType) -> EncodedType:
+        return data
+
+    def decode(self, data: EncodedType) -> EncodedType:
+        return data
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+def raw_neuron(name: str, delimiter: str = ".") -> Neuron[bytes]:
+    # A neuron with the same name as the one on the wire, for capturing and
+    # replaying its traffic without knowing its type
+    *namespace, type_name, codec_name = name.split(delimiter)
+    if not namespace:
+        raise ValueError(f"{name} is not a full neuron name")
+
+    return Neuron(
+        bytes,
+        Namespace(namespace, delimiter),
+        RawCodec(codec_name),
+        type_name_alias=type_name,
+    )
+
+
+async def capture(
+    ganglion: GanglionExternalBase,
+    neurons: Iterable[Neuron],
+    log: SegmentedLog,
+    duration_seconds: Optional[float] = None,
+) -> int:
+    start_offset = log.next_offset
+
+    async def record(data: EncodedType, neuron: Neuron, reaction_id=None):
+        log.append(neuron.name, data)
+
+    for neuron in neurons:
+        await ganglion.adapt(neuron, raw_reactants=(record,))
+
+    try:
+        if duration_seconds is None:
+            await asyncio.Event().wait()
+        else:
+            await asyncio.sleep(duration_seconds)
+    finally:
+        await log.aflush()
+
+    return log.next_offset - start_offset
+
+
+class ReplayReport(NamedTuple):
+    messages: int
+    bytes: int
+    elapsed_seconds: float
+    send_latency_ns: Histogram
+    schedule_lag_ns: Histogram
+
+    def format(self) -> str:
+        elapsed = self.elapsed_seconds or float("inf")
+        lines = [
+            f"messages      {self.messages}",
+            f"elapsed       {self.elapsed_seconds:.3f}s",
+            f"throughput    {self.messages / elapsed:.1f} msg/s, "
+            f"{self.bytes / elapsed / 1e6:.3f} MB/s",
+        ]
+        for label, histogram in (
+            ("send latency", self.send_latency_ns),
+            ("schedule lag", self.schedule_lag_ns),
+        ):
+            if histogram.count:
+                percentiles = ", ".join(
+                    f"p{p:g} {histogram.percentile(p) / 1e3:.1f}us"
+                    for p in (50, 90, 99, 99.9)
+                )
+                lines.append(f"{label:<13} {percentiles}")
+        return "\n".join(lines)
+
+
+async def replay(
+    records: Iterable[LogRecord],
+    target: Union[Ganglion, GanglionExternalBase],
+    neurons: Optional[Dict[str, Neuron]] = None,
+    speed: float = 1.0,
+) -> ReplayReport:
+    # speed is a multiple of the captured rate, 0 replays as fast as possible.
+    # External ganglia get the captured bytes as they are; anything else, like a
+    # Plexus, needs the real neurons to decode them first
+    neurons = dict(neurons or {})
+    encoded = isinstance(target, GanglionExternalBase)
+    adapted = set()
+
+    send_latency = Histogram()
+    schedule_lag = Histogram()
+    messages = 0
+    total_bytes = 0
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    first_timestamp_ns: Optional[int] = None
+
+    for record in records:
+        neuron = neurons.get(record.name)
+        if neuron is None:
+            if not encoded:
+                continue
+            neuron = neurons[record.name] = raw_neuron(record.name)
+        if neuron not in adapted:
+            await target.adapt(neuron)
+            adapted.add(neuron)
+
+        if first_timestamp_ns is None:
+            first_timestamp_ns = record.timestamp_ns
+            start = loop.time()
+        if speed:
+            due = start + (record.timestamp_ns - first_timestamp_ns) / 1e9 / speed
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            schedule_lag.record(int((loop.time() - due) * 1e9))
+
+        sent = perf_counter_ns()
+        if isinstance(target, GanglionExternalBase):
+            await target.transmit_encoded(record.payload, neuron)
+        else:
+            await target.transmit(neuron.decode(record.payload), neuron)
+        send_latency.record(perf_counter_ns() - sent)
+
+        messages += 1
+        total_bytes += len(record.payload)
+
+    return ReplayReport(
+        messages, total_bytes, loop.time() - start, send_latency, schedule_lag
+    )
+
+
+def _peer(value: str):
+    host, _, port = value.rpartition(":")
+    return ipaddress.ip_address(host), int(port)
+
+
+def _speed(value: str) -> float:
+    if value == "max":
+        return 0.0
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or max")
+    return speed
+
+
+def create_ganglion(args: argparse.Namespace) -> GanglionExternalBase:
+    from plexo.socket_options import TCP_DEFAULT, ZmqSocketOptions, presets
+
+    # Each ganglion keeps its own default unless a preset is chosen
+    preset: Optional[ZmqSocketOptions] = (
+        presets[args.socket_options] if args.socket_options else None
+    )
+
+    if args.ganglion == "tcp-pubsub":
+        from plexo.ganglion.tcp_pubsub import GanglionZmqTcpPubSub
+
+        return GanglionZmqTcpPubSub(
+            bind_interface=args.bind_interface,
+            port_pub=args.port or 5570,
+            peers=args.peer,
+            socket_options=preset or TCP_DEFAULT,
+        )
+
+    if args.ganglion == "tcp-pair":
+        from plexo.ganglion.tcp_pair import GanglionZmqTcpPair
+
+        return GanglionZmqTcpPair(
+            bind_interface=args.bind_interface,
+            port=args.port or 5580,
+            peer=args.peer[0] if args.peer else None,
+            socket_options=preset or TCP_DEFAULT,
+        )
+
+    from plexo.ganglion.plexo_multicast import GanglionPlexoMulticast
+
+    return GanglionPlexoMulticast(
+        bind_interface=args.bind_interface,
+        multicast_cidr=ipaddress.ip_network(args.multicast_cidr),
+        port=args.port or 5560,
+        socket_options=preset or ZmqSocketOptions(),
+    )
+
+
+def _add_ganglion_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--ganglion",
+        choices=("tcp-pubsub", "tcp-pair", "multicast"),
+        default="tcp-pubsub",
+    )
+    parser.add_argument("--bind-interface")
+    parser.add_argument("--port", type=int)
+    parser.add_argument(
+        "--peer", type=_peer, action="append", default=[], metavar="HOST:PORT"
+    )
+    parser.add_argument("--multicast-cidr", default="239.0.0.0/16")
+    parser.add_argument(
+        "--socket-options",
+        choices=("tcp-default", "low-latency", "high-throughput", "lossy-multicast"),
+        help="zmq socket options preset, see plexo.socket_options",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="time to let the ganglion connect before starting",
+    )
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m plexo.replay",
+        description="Capture plexo traffic and replay it for capacity testing",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument(
+        "--event-loop",
+        help=f"asyncio, uvloop, auto or a {plexo_loop.ENTRY_POINT_GROUP} entry point",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture_parser = commands.add_parser("capture", help="record traffic to a log")
+    capture_parser.add_argument("log", help="directory of the capture log")
+    capture_parser.add_argument(
+        "--neuron", action="append", required=True, help="full neuron name"
+    )
+    capture_parser.add_argument("--duration", type=float, metavar="SECONDS")
+    _add_ganglion_arguments(capture_parser)
+
+    replay_parser = commands.add_parser("replay", help="replay a capture log")
+    replay_parser.add_argument("log", help="directory of the capture log")
+    replay_parser.add_argument(
+        "--speed", type=_speed, default=1.0, help="1x, Nx or max (default 1x)"
+    )
+    replay_parser.add_argument("--from-offset", type=int, default=0)
+    replay_parser.add_argument(
+        "--neuron", action="append", help="only replay these neurons"
+    )
+    _add_ganglion_arguments(replay_parser)
+
+    return parser
+
+
+async def _run(args: argparse.Namespace):
+    log = SegmentedLog(args.log)
+    ganglion = create_ganglion(args)
+    try:
+        # Multicast has to finish startup before neurons can be adapted
+        await ganglion.start()
+        if args.command == "capture":
+            neurons = [raw_neuron(name) for name in args.neuron]
+            for neuron in neurons:
+                await ganglion.adapt(neuron)
+            await asyncio.sleep(args.warmup)
+            captured = await capture(ganglion, neurons, log, args.duration)
+            print(f"captured {captured} messages")
+        else:
+            records: Iterable[LogRecord] = log.read(args.from_offset)
+            if args.neuron:
+                selected: List[str] = args.neuron
+                records = (record for record in records if record.name in selected)
+                for name in selected:
+                    await ganglion.adapt(raw_neuron(name))
+            await asyncio.sleep(args.warmup)
+            report = await replay(records, ganglion, speed=args.speed)
+            print(report.format())
+    finally:
+        try:
+            await ganglion.aclose()
+        finally:
+            log.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+
+    try:
+        plexo_loop.run(_run(args), event_loop=args.event_loop)
+    except EventLoopNotAvailable as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+from uuid import UUID, uuid4
+
+from plexo.exceptions import RequestTimeout
+from plexo.neuron.neuron import Neuron
+from plexo.typing import EncodedType
+from plexo.typing.codec import Codec
+
+_BYTES = b"\x00"
+_STR = b"\x01"
+
+
+class Correlated(NamedTuple):
+    correlation_id: UUID
+    data: Any
+
+
+class CorrelatedCodec(Codec):
+    # Prefixes the payload of the wrapped codec with the 16 byte correlation id
+    # and whether that codec encodes to str or bytes
+    def __init__(self, codec: Codec):
+        self.codec = codec
+        self._name = f"correlated_{codec.name}"
+
+    def encode(self, data: Correlated) -> EncodedType:
+        payload = self.codec.encode(data.data)
+        if isinstance(payload, str):
+            return b"".join((data.correlation_id.bytes, _STR, payload.encode("UTF-8")))
+
+        return b"".join((data.correlation_id.bytes, _BYTES, payload))
+
+    def decode(self, data: EncodedType) -> Correlated:
+        if isinstance(data, str):
+            data = data.encode("UTF-8")
+
+        payload: EncodedType = data[17:]
+        if data[16:17] == _STR:
+            payload = bytes(data[17:]).decode("UTF-8")
+
+        return Correlated(UUID(bytes=bytes(data[:16])), self.codec.decode(payload))
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+def correlated(neuron: Neuron) -> Neuron[Correlated]:
+    # The same neuron with every message carrying a correlation id. Replies
+    # must never be conflated, so conflation is dropped
+    return Neuron(
+        neuron.type,
+        neuron.namespace,
+        CorrelatedCodec(neuron.codec),
+        type_name_alias=neuron.type_name_alias,
+        priority=neuron.priority,
+    )
+
+
+class PendingRequests:
+    def __init__(self, max_outstanding: int = 1024):
+        self.max_outstanding = max_outstanding
+
+        self._futures: Dict[UUID, asyncio.Future] = {}
+        self._slots = asyncio.Semaphore(max_outstanding)
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._futures)
+
+    async def request(
+        self,
+        send: Callable[[Correlated], Awaitable],
+        data: Any,
+        timeout: Optional[float] = None,
+    ):
+        # Waits for a free slot once max_outstanding requests are in flight
+        async with self._slots:
+            correlation_id = uuid4()
+            future = asyncio.get_running_loop().create_future()
+            self._futures[correlation_id] = future
+            try:
+                await send(Correlated(correlation_id, data))
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                raise RequestTimeout(
+                    f"No reply to request {correlation_id} within {timeout}s"
+                )
+            finally:
+                del self._futures[correlation_id]
+
+    def resolve(self, reply: Correlated) -> bool:
+        # Replies to requests that timed out or came from elsewhere are ignored
+        future = self._futures.get(reply.correlation_id)
+        if future is None or future.done():
+            return False
+
+        future.set_result(reply.data)
+        return True
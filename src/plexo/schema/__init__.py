@@ -14,6 +14,16 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
 
-from plexo.schema.plexo_message import PlexoMessage
+from typing import TYPE_CHECKING
 
-__all__ = ['PlexoMessage']
+from plexo.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from plexo.schema.plexo_message import PlexoMessage
+
+# The capnpy schemas are compiled on first use, see plexo.lazy
+__getattr__, __dir__ = lazy_exports(
+    __name__, {"PlexoMessage": "plexo.schema.plexo_message"}
+)
+
+__all__ = ["PlexoMessage"]
@@ -14,12 +14,32 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
 
-from plexo.schema.plexo_multicast.plexo_approval import PlexoApproval
-from plexo.schema.plexo_multicast.plexo_heartbeat import PlexoHeartbeat
-from plexo.schema.plexo_multicast.plexo_preparation import PlexoPreparation
-from plexo.schema.plexo_multicast.plexo_promise import PlexoPromise
-from plexo.schema.plexo_multicast.plexo_proposal import PlexoProposal
-from plexo.schema.plexo_multicast.plexo_rejection import PlexoRejection
+from typing import TYPE_CHECKING
+
+from plexo.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from plexo.schema.plexo_multicast.plexo_approval import PlexoApproval
+    from plexo.schema.plexo_multicast.plexo_heartbeat import PlexoHeartbeat
+    from plexo.schema.plexo_multicast.plexo_preparation import PlexoPreparation
+    from plexo.schema.plexo_multicast.plexo_promise import PlexoPromise
+    from plexo.schema.plexo_multicast.plexo_proposal import PlexoProposal
+    from plexo.schema.plexo_multicast.plexo_rejection import PlexoRejection
+    from plexo.schema.plexo_multicast.plexo_snapshot_request import PlexoSnapshotRequest
+
+# The capnpy schemas are compiled on first use, see plexo.lazy
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "PlexoApproval": "plexo.schema.plexo_multicast.plexo_approval",
+        "PlexoHeartbeat": "plexo.schema.plexo_multicast.plexo_heartbeat",
+        "PlexoPreparation": "plexo.schema.plexo_multicast.plexo_preparation",
+        "PlexoPromise": "plexo.schema.plexo_multicast.plexo_promise",
+        "PlexoProposal": "plexo.schema.plexo_multicast.plexo_proposal",
+        "PlexoRejection": "plexo.schema.plexo_multicast.plexo_rejection",
+        "PlexoSnapshotRequest": "plexo.schema.plexo_multicast.plexo_snapshot_request",
+    },
+)
 
 __all__ = [
     "PlexoApproval",
@@ -28,4 +48,5 @@ __all__ = [
     "PlexoPromise",
     "PlexoProposal",
     "PlexoRejection",
+    "PlexoSnapshotRequest",
 ]
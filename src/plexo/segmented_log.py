@@ -0,0 +1,377 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+from zlib import crc32
+
+from plexo.exceptions import LogRecordTooLarge
+
+# length, crc32, timestamp_ns, name length; length and crc32 cover everything
+# after them, and a zero length marks the end of the written part of a segment
+_RECORD_HEADER = struct.Struct("<IIQH")
+_RECORD_CHECKED = _RECORD_HEADER.size - 8
+# relative offset, position, timestamp_ns
+_INDEX_ENTRY = struct.Struct("<IIQ")
+
+
+class LogRecord(NamedTuple):
+    offset: int
+    timestamp_ns: int
+    name: str
+    payload: bytes
+
+
+class _Segment:
+    def __init__(self, directory: Path, base_offset: int, size: int):
+        self.base_offset = base_offset
+        self.log_path = directory / f"{base_offset:020d}.log"
+        self.index_path = directory / f"{base_offset:020d}.index"
+
+        if not self.log_path.exists():
+            with open(self.log_path, "wb") as f:
+                f.truncate(size)
+
+        self._file = open(self.log_path, "r+b")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.mmap = mmap.mmap(self._file.fileno(), self.size)
+
+        self.index_offsets: List[int] = []
+        self.index_positions: List[int] = []
+        self.index_timestamps: List[int] = []
+        self._index_file: Optional[BinaryIO] = None
+
+        self.position = 0
+        self.next_offset = base_offset
+        self.last_timestamp_ns = 0
+        # Everything before this position has been synced to disk
+        self.flushed_position = 0
+
+    def load(self, index_interval_bytes: int):
+        index_data = self.index_path.read_bytes() if self.index_path.exists() else b""
+        usable = len(index_data) - len(index_data) % _INDEX_ENTRY.size
+        for relative, position, timestamp_ns in _INDEX_ENTRY.iter_unpack(
+            index_data[:usable]
+        ):
+            self.index_offsets.append(self.base_offset + relative)
+            self.index_positions.append(position)
+            self.index_timestamps.append(timestamp_ns)
+
+        # The log is the source of truth, the index is rebuilt past its last
+        # valid entry after a crash
+        while self.index_positions and not self._valid_record(self.index_positions[-1]):
+            self.index_offsets.pop()
+            self.index_positions.pop()
+            self.index_timestamps.pop()
+
+        if self.index_positions:
+            self.position = self.index_positions[-1]
+            self.next_offset = self.index_offsets[-1]
+        kept = len(self.index_positions)
+        with open(self.index_path, "ab") as f:
+            f.truncate(kept * _INDEX_ENTRY.size)
+
+        last_indexed = self.index_positions[-1] if self.index_positions else None
+        for record, position, end in self.scan(self.position, self.next_offset):
+            if last_indexed is None or position - last_indexed >= index_interval_bytes:
+                if position != last_indexed:
+                    self.add_index_entry(record.offset, position, record.timestamp_ns)
+                last_indexed = position
+            self.position = end
+            self.next_offset = record.offset + 1
+            self.last_timestamp_ns = record.timestamp_ns
+        self.flushed_position = self.position
+
+    def _valid_record(self, position: int) -> bool:
+        return self._read(position) is not None
+
+    def _read(self, position: int):
+        if position + _RECORD_HEADER.size > self.size:
+            return None
+
+        length, checksum, timestamp_ns, name_length = _RECORD_HEADER.unpack_from(
+            self.mmap, position
+        )
+        end = position + 8 + length
+        if not length or end > self.size:
+            return None
+
+        body = self.mmap[position + 8 : end]
+        if crc32(body) != checksum:
+            return None
+
+        name_end = _RECORD_CHECKED + name_length
+        return timestamp_ns, body[_RECORD_CHECKED:name_end], body[name_end:], end
+
+    def scan(self, position: int, offset: int):
+        while True:
+            read = self._read(position)
+            if read is None:
+                return
+
+            timestamp_ns, name, payload, end = read
+            yield LogRecord(
+                offset, timestamp_ns, name.decode("UTF-8"), payload
+            ), position, end
+            position = end
+            offset += 1
+
+    def add_index_entry(self, offset: int, position: int, timestamp_ns: int):
+        if self._index_file is None:
+            self._index_file = open(self.index_path, "ab")
+        self._index_file.write(
+            _INDEX_ENTRY.pack(offset - self.base_offset, position, timestamp_ns)
+        )
+        self.index_offsets.append(offset)
+        self.index_positions.append(position)
+        self.index_timestamps.append(timestamp_ns)
+
+    def append(
+        self,
+        name: bytes,
+        payload: bytes,
+        timestamp_ns: int,
+        index_interval_bytes: int,
+    ) -> bool:
+        record_size = _RECORD_HEADER.size + len(name) + len(payload)
+        position = self.position
+        if position + record_size > self.size:
+            return False
+
+        header = struct.pack("<QH", timestamp_ns, len(name))
+        checksum = crc32(payload, crc32(name, crc32(header)))
+        _RECORD_HEADER.pack_into(
+            self.mmap,
+            position,
+            record_size - 8,
+            checksum,
+            timestamp_ns,
+            len(name),
+        )
+        name_position = position + _RECORD_HEADER.size
+        self.mmap[name_position : name_position + len(name)] = name
+        self.mmap[name_position + len(name) : position + record_size] = payload
+
+        if (
+            not self.index_positions
+            or position - self.index_positions[-1] >= index_interval_bytes
+        ):
+            self.add_index_entry(self.next_offset, position, timestamp_ns)
+
+        self.position = position + record_size
+        self.next_offset += 1
+        self.last_timestamp_ns = timestamp_ns
+        return True
+
+    def seek(self, offset: int) -> Tuple[int, int]:
+        # Position and offset of the last indexed record at or before the offset
+        i = bisect_right(self.index_offsets, offset) - 1
+        if i < 0:
+            return 0, self.base_offset
+        return self.index_positions[i], self.index_offsets[i]
+
+    def offset_for_index_time(self, timestamp_ns: int) -> int:
+        # Offset of the last indexed record before the timestamp, scanning
+        # forward from there finds the first record at or after it
+        i = bisect_right(self.index_timestamps, timestamp_ns - 1) - 1
+        return self.index_offsets[i] if i >= 0 else self.base_offset
+
+    def flush(self):
+        # Only the pages written since the last flush are synced; this may run
+        # off the loop thread while records are appended, so the position is
+        # read once
+        position = self.position
+        granularity = mmap.ALLOCATIONGRANULARITY
+        start = self.flushed_position - self.flushed_position % granularity
+        if position > start:
+            self.mmap.flush(start, position - start)
+        self.flushed_position = position
+        if self._index_file is not None:
+            self._index_file.flush()
+            os.fsync(self._index_file.fileno())
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._index_file is not None:
+                self._index_file.close()
+                self._index_file = None
+            self.mmap.close()
+            self._file.close()
+
+
+class SegmentedLog:
+    # Appended records are written to a shared mmap, so they survive a crash of
+    # the process as soon as append returns. Surviving a crash of the machine
+    # takes a flush: on close, on flush() or aflush(), and whenever flush_due
+    # says so after an append, i.e. once a segment rolled, after every
+    # flush_messages records or once flush_interval_seconds have passed since
+    # the last flush. append never syncs by itself, so callers on an event loop
+    # can sync on an executor with aflush(); SynapseLog does that after each
+    # transmit. Without either setting, up to a whole segment can be lost with
+    # the machine.
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike],
+        segment_bytes: int = 64 * 1024 * 1024,
+        index_interval_bytes: int = 4096,
+        flush_messages: Optional[int] = None,
+        flush_interval_seconds: Optional[float] = None,
+    ):
+        if not 0 < segment_bytes < 1 << 32:
+            raise ValueError(f"segment_bytes must be below 4GiB, got {segment_bytes}")
+
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.index_interval_bytes = index_interval_bytes
+        self.flush_messages = flush_messages
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._rolled = False
+        # Held while syncing, so closing waits for a sync running on an executor
+        self._sync_lock = threading.Lock()
+        self._aflush_lock = asyncio.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segments: List[_Segment] = []
+        for log_path in sorted(self.directory.glob("*.log")):
+            segment = _Segment(self.directory, int(log_path.stem), segment_bytes)
+            segment.load(index_interval_bytes)
+            self._segments.append(segment)
+
+        if not self._segments:
+            self._segments.append(_Segment(self.directory, 0, segment_bytes))
+
+    @property
+    def next_offset(self) -> int:
+        return self._segments[-1].next_offset
+
+    @property
+    def flush_due(self) -> bool:
+        return (
+            self._rolled
+            or (
+                self.flush_messages is not None
+                and self._unflushed >= self.flush_messages
+            )
+            or (
+                self.flush_interval_seconds is not None
+                and time.monotonic() - self._last_flush >= self.flush_interval_seconds
+            )
+        )
+
+    def append(
+        self,
+        name: str,
+        payload: Union[bytes, bytearray, memoryview, str],
+        timestamp_ns: Optional[int] = None,
+    ) -> int:
+        if isinstance(payload, str):
+            payload = payload.encode("UTF-8")
+        else:
+            payload = bytes(payload)
+        name_bytes = name.encode("UTF-8")
+
+        if _RECORD_HEADER.size + len(name_bytes) + len(payload) > self.segment_bytes:
+            raise LogRecordTooLarge(
+                f"SegmentedLog:{len(payload)} byte record exceeds the segment size"
+            )
+
+        segment = self._segments[-1]
+        # Timestamps never go backwards within the log, so reads by time can bisect
+        timestamp_ns = max(timestamp_ns or time.time_ns(), segment.last_timestamp_ns)
+
+        offset = segment.next_offset
+        if not segment.append(
+            name_bytes, payload, timestamp_ns, self.index_interval_bytes
+        ):
+            # The full segment is synced by the next flush
+            self._rolled = True
+            segment = _Segment(self.directory, offset, self.segment_bytes)
+            self._segments.append(segment)
+            segment.append(name_bytes, payload, timestamp_ns, self.index_interval_bytes)
+
+        self._unflushed += 1
+        return offset
+
+    def _segment_index(self, offset: int) -> int:
+        base_offsets = [segment.base_offset for segment in self._segments]
+        return max(bisect_right(base_offsets, offset) - 1, 0)
+
+    def read(self, offset: int = 0) -> Iterator[LogRecord]:
+        for segment in self._segments[self._segment_index(offset) :]:
+            position, indexed_offset = segment.seek(max(offset, segment.base_offset))
+            for record, _, end in segment.scan(position, indexed_offset):
+                if end > segment.position:
+                    break
+                if record.offset >= offset:
+                    yield record
+
+    def offset_for_time(self, timestamp_ns: int) -> int:
+        # Offset of the first record at or after the timestamp
+        first_timestamps = [
+            segment.index_timestamps[0] if segment.index_timestamps else 0
+            for segment in self._segments
+        ]
+        i = max(bisect_right(first_timestamps, timestamp_ns - 1) - 1, 0)
+        start = self._segments[i].offset_for_index_time(timestamp_ns)
+        for record in self.read(start):
+            if record.timestamp_ns >= timestamp_ns:
+                return record.offset
+        return self.next_offset
+
+    def read_from_time(self, timestamp_ns: int) -> Iterator[LogRecord]:
+        return self.read(self.offset_for_time(timestamp_ns))
+
+    def _reset_flush_due(self):
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._rolled = False
+
+    def _sync(self):
+        with self._sync_lock:
+            # Nothing is left to sync once closed
+            for segment in tuple(self._segments):
+                if segment.flushed_position != segment.position:
+                    segment.flush()
+
+    def flush(self):
+        self._reset_flush_due()
+        self._sync()
+
+    async def aflush(self):
+        # Syncs on the default executor so the loop keeps running meanwhile,
+        # records appended before the call are on disk once it returns
+        self._reset_flush_due()
+        async with self._aflush_lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._sync)
+
+    def close(self):
+        with self._sync_lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
@@ -0,0 +1,119 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+from typing import Mapping, NamedTuple, Optional
+
+import zmq
+
+
+class ZmqSocketOptions(NamedTuple):
+    # None leaves the libzmq default. Times are milliseconds unless named
+    # otherwise, rate is kilobits per second and buffers are bytes
+    linger: Optional[int] = None
+    immediate: Optional[bool] = None
+    sndhwm: Optional[int] = None
+    rcvhwm: Optional[int] = None
+    sndbuf: Optional[int] = None
+    rcvbuf: Optional[int] = None
+    tcp_keepalive: Optional[bool] = None
+    tcp_keepalive_idle_seconds: Optional[int] = None
+    tcp_keepalive_interval_seconds: Optional[int] = None
+    tcp_keepalive_count: Optional[int] = None
+    heartbeat_interval: Optional[int] = None
+    heartbeat_timeout: Optional[int] = None
+    heartbeat_ttl: Optional[int] = None
+    rate: Optional[int] = None
+    recovery_interval: Optional[int] = None
+    multicast_hops: Optional[int] = None
+
+    def apply(self, socket: zmq.Socket):
+        # Must run before bind or connect, most options (e.g. hwm, buffers and
+        # rate) only apply to connections made after they are set
+        for field, option in _zmq_options.items():
+            value = getattr(self, field)
+            if value is not None:
+                socket.setsockopt(option, int(value))
+
+
+_zmq_options: Mapping[str, int] = {
+    "linger": zmq.LINGER,
+    "immediate": zmq.IMMEDIATE,
+    "sndhwm": zmq.SNDHWM,
+    "rcvhwm": zmq.RCVHWM,
+    "sndbuf": zmq.SNDBUF,
+    "rcvbuf": zmq.RCVBUF,
+    "tcp_keepalive": zmq.TCP_KEEPALIVE,
+    "tcp_keepalive_idle_seconds": zmq.TCP_KEEPALIVE_IDLE,
+    "tcp_keepalive_interval_seconds": zmq.TCP_KEEPALIVE_INTVL,
+    "tcp_keepalive_count": zmq.TCP_KEEPALIVE_CNT,
+    "heartbeat_interval": zmq.HEARTBEAT_IVL,
+    "heartbeat_timeout": zmq.HEARTBEAT_TIMEOUT,
+    "heartbeat_ttl": zmq.HEARTBEAT_TTL,
+    "rate": zmq.RATE,
+    "recovery_interval": zmq.RECOVERY_IVL,
+    "multicast_hops": zmq.MULTICAST_HOPS,
+}
+
+# What the tcp ganglia always used: drop unsent messages on close and only
+# queue for peers that are connected
+TCP_DEFAULT = ZmqSocketOptions(linger=0, immediate=True)
+
+# Short queues so a slow peer gets fresh messages rather than a backlog, dead
+# peers are noticed within seconds
+LOW_LATENCY = TCP_DEFAULT._replace(
+    sndhwm=1_000,
+    rcvhwm=1_000,
+    tcp_keepalive=True,
+    tcp_keepalive_idle_seconds=10,
+    tcp_keepalive_interval_seconds=5,
+    tcp_keepalive_count=3,
+    heartbeat_interval=1_000,
+    heartbeat_timeout=3_000,
+    heartbeat_ttl=3_000,
+)
+
+# Deep queues and large kernel buffers to ride out bursts
+HIGH_THROUGHPUT = TCP_DEFAULT._replace(
+    sndhwm=1_000_000,
+    rcvhwm=1_000_000,
+    sndbuf=4 * 1024 * 1024,
+    rcvbuf=4 * 1024 * 1024,
+    tcp_keepalive=True,
+    tcp_keepalive_idle_seconds=60,
+    tcp_keepalive_interval_seconds=10,
+    tcp_keepalive_count=6,
+)
+
+# The pgm default rate is 100 kbit/s. This allows 1 Gbit/s and gives up on
+# recovering lost messages after 200ms instead of 10s, staying on the local
+# network
+LOSSY_MULTICAST = ZmqSocketOptions(
+    linger=0,
+    sndhwm=100_000,
+    rcvhwm=100_000,
+    sndbuf=4 * 1024 * 1024,
+    rcvbuf=4 * 1024 * 1024,
+    rate=1_000_000,
+    recovery_interval=200,
+    multicast_hops=1,
+)
+
+presets: Mapping[str, ZmqSocketOptions] = {
+    "tcp-default": TCP_DEFAULT,
+    "low-latency": LOW_LATENCY,
+    "high-throughput": HIGH_THROUGHPUT,
+    "lossy-multicast": LOSSY_MULTICAST,
+}
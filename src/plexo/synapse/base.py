@@ -14,15 +14,17 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
 
-import asyncio
 from abc import ABC
+from time import perf_counter_ns
 from typing import Iterable, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from pyrsistent import PDeque, pdeque
 
 from plexo.neuron.neuron import Neuron
 from plexo.dendrite import Dendrite, DecoderDendrite
+from plexo.lifecycle import cancel_tasks, wait_cancelled
+from plexo.tracing import tracer
 from plexo.typing import UnencodedType, EncodedType
 from plexo.typing.reactant import RawReactant, Reactant
 from plexo.typing.synapse import SynapseInternal, SynapseExternal
@@ -33,11 +35,13 @@ class SynapseInternalBase(SynapseInternal[UnencodedType], ABC):
         self,
         neuron: Neuron[UnencodedType],
         reactants: Iterable[Reactant[UnencodedType]] = (),
+        ganglion: str = "",
     ) -> None:
         self.neuron = neuron
+        self.ganglion = ganglion
         self.topic_bytes = neuron.name.encode("UTF-8")
 
-        self._dendrite: Dendrite = Dendrite(neuron, reactants)
+        self._dendrite: Dendrite = Dendrite(neuron, reactants, ganglion)
 
         self._tasks: PDeque = pdeque()
 
@@ -48,25 +52,15 @@ class SynapseInternalBase(SynapseInternal[UnencodedType], ABC):
         self.close()
 
     def close(self):
-        for task in self._tasks:
-            task.cancel()
-
-        if self._tasks:
-            wait_coro = asyncio.wait(
-                self._tasks, timeout=10, return_when=asyncio.ALL_COMPLETED
-            )
-            try:
-                loop = asyncio.get_running_loop()
-
-                future = asyncio.run_coroutine_threadsafe(wait_coro, loop)
-                # This is broken, pending https://bugs.python.org/issue42130
-                future.result(10)
-            except RuntimeError:
-                asyncio.run(wait_coro)
-            except TimeoutError:
-                pass
-            finally:
-                self._tasks = pdeque()
+        cancel_tasks(self._tasks)
+        self._tasks = pdeque()
+        self._dendrite.close()
+
+    async def aclose(self, timeout: float = 10.0):
+        tasks = cancel_tasks(self._tasks)
+        self._tasks = pdeque()
+        await wait_cancelled(tasks, timeout)
+        self.close()
 
     def _add_task(self, task):
         self._tasks = self._tasks.append(task)
@@ -84,14 +78,18 @@ class SynapseExternalBase(SynapseExternal[UnencodedType], ABC):
         neuron: Neuron[UnencodedType],
         reactants: Iterable[Reactant[UnencodedType]] = (),
         raw_reactants: Iterable[RawReactant[UnencodedType]] = (),
+        ganglion: str = "",
     ) -> None:
         self.neuron = neuron
+        self.ganglion = ganglion
         self.topic_bytes = neuron.name.encode("UTF-8")
 
         self._dendrite: DecoderDendrite = DecoderDendrite(
-            neuron, reactants, raw_reactants
+            neuron, reactants, raw_reactants, ganglion
         )
 
+        self.last_value: Optional[EncodedType] = None
+
         self._tasks: PDeque = pdeque()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -101,25 +99,15 @@ class SynapseExternalBase(SynapseExternal[UnencodedType], ABC):
         self.close()
 
     def close(self):
-        for task in self._tasks:
-            task.cancel()
-
-        if self._tasks:
-            wait_coro = asyncio.wait(
-                self._tasks, timeout=10, return_when=asyncio.ALL_COMPLETED
-            )
-            try:
-                loop = asyncio.get_running_loop()
-
-                future = asyncio.run_coroutine_threadsafe(wait_coro, loop)
-                # This is broken, pending https://bugs.python.org/issue42130
-                future.result(10)
-            except RuntimeError:
-                asyncio.run(wait_coro)
-            except TimeoutError:
-                pass
-            finally:
-                self._tasks = pdeque()
+        cancel_tasks(self._tasks)
+        self._tasks = pdeque()
+        self._dendrite.close()
+
+    async def aclose(self, timeout: float = 10.0):
+        tasks = cancel_tasks(self._tasks)
+        self._tasks = pdeque()
+        await wait_cancelled(tasks, timeout)
+        self.close()
 
     def _add_task(self, task):
         self._tasks = self._tasks.append(task)
@@ -132,5 +120,28 @@ class SynapseExternalBase(SynapseExternal[UnencodedType], ABC):
     ):
         await self._dendrite.add_raw_reactants(raw_reactants)
 
+    def retain(self, payload: EncodedType):
+        if self.neuron.last_value:
+            self.last_value = payload
+
     async def transduce(self, data: EncodedType, reaction_id: Optional[UUID] = None):
-        return await self._dendrite.transduce(data, reaction_id)
+        if not tracer.enabled:
+            return await self._dendrite.transduce(data, reaction_id)
+
+        # Received messages carry no reaction id, give them one so the receive,
+        # decode and reactant spans of a message line up on the same track
+        if reaction_id is None:
+            reaction_id = uuid4()
+
+        start = perf_counter_ns()
+        try:
+            return await self._dendrite.transduce(data, reaction_id)
+        finally:
+            tracer.record(
+                "receive",
+                "synapse",
+                start,
+                reaction_id,
+                synapse=type(self).__name__,
+                neuron=self.neuron.name,
+            )
@@ -0,0 +1,49 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from typing import Iterable, Optional
+from uuid import UUID
+
+from plexo.neuron.neuron import Neuron
+from plexo.segmented_log import SegmentedLog
+from plexo.synapse.base import SynapseExternalBase
+from plexo.typing import EncodedType, UnencodedType
+from plexo.typing.reactant import Reactant, RawReactant
+
+
+class SynapseLog(SynapseExternalBase):
+    def __init__(
+        self,
+        neuron: Neuron[UnencodedType],
+        log: SegmentedLog,
+        reactants: Iterable[Reactant[UnencodedType]] = (),
+        raw_reactants: Iterable[RawReactant[UnencodedType]] = (),
+        ganglion: str = "",
+    ) -> None:
+        super().__init__(neuron, reactants, raw_reactants, ganglion)
+
+        self._log = log
+
+    async def transmit(
+        self,
+        data: EncodedType,
+        reaction_id: Optional[UUID] = None,
+    ):
+        offset = self._log.append(self.neuron.name, data)
+        if self._log.flush_due:
+            await self._log.aflush()
+        return offset
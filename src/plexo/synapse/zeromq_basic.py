@@ -14,13 +14,15 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
 
-from typing import Optional, Iterable
+from typing import Optional, Iterable, cast
 from uuid import UUID
 
 from zmq.asyncio import Socket
 
 from plexo.codec.plexo_codec import plexo_message_codec
+from plexo.conflation import conflation_key
 from plexo.neuron.neuron import Neuron
+from plexo.priority import PrioritySender
 from plexo.schema.plexo_message import PlexoMessage
 from plexo.synapse.base import SynapseExternalBase
 from plexo.typing import EncodedType, UnencodedType
@@ -34,10 +36,14 @@ class SynapseZmqBasic(SynapseExternalBase):
         socket: Socket,
         reactants: Iterable[Reactant[UnencodedType]] = (),
         raw_reactants: Iterable[RawReactant[UnencodedType]] = (),
+        sender: Optional[PrioritySender] = None,
+        ganglion: str = "",
     ) -> None:
-        super().__init__(neuron, reactants, raw_reactants)
+        super().__init__(neuron, reactants, raw_reactants, ganglion)
 
         self._socket: Socket = socket
+        # Shared sockets send through one priority-ordered sender
+        self._sender = sender
 
     async def transmit(
         self,
@@ -47,4 +53,11 @@ class SynapseZmqBasic(SynapseExternalBase):
         payload = data.encode("UTF-8") if isinstance(data, str) else data
 
         message = PlexoMessage(type_name=self.topic_bytes, payload=payload)
-        await self._socket.send(plexo_message_codec.encode(message))
+        # capnp always encodes to bytes
+        encoded = cast(bytes, plexo_message_codec.encode(message))
+        if self._sender is not None:
+            await self._sender.send(
+                self.neuron.priority, [encoded], conflation_key(self.neuron, payload)
+            )
+        else:
+            await self._socket.send(encoded)
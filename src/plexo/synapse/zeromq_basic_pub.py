@@ -20,11 +20,25 @@ from uuid import UUID
 import zmq
 from zmq.asyncio import Socket
 
+from plexo.conflation import conflation_key
 from plexo.neuron.neuron import Neuron
+from plexo.priority import PrioritySender
 from plexo.synapse.base import SynapseExternalBase
 from plexo.typing import EncodedType, UnencodedType
 from plexo.typing.reactant import Reactant, RawReactant
 
+# Topics end with a delimiter so a subscription matches one neuron name exactly,
+# zmq would otherwise deliver "foo.pickle_v2" to a "foo.pickle" subscriber
+TOPIC_DELIMITER = b"\x00"
+
+
+def topic(name: str) -> bytes:
+    return name.encode("UTF-8") + TOPIC_DELIMITER
+
+
+def topic_name(frame: bytes) -> str:
+    return frame[: -len(TOPIC_DELIMITER)].decode("UTF-8")
+
 
 class SynapseZmqBasicPub(SynapseExternalBase):
     def __init__(
@@ -33,10 +47,15 @@ class SynapseZmqBasicPub(SynapseExternalBase):
         socket_pub: Socket,
         reactants: Iterable[Reactant[UnencodedType]] = (),
         raw_reactants: Iterable[RawReactant[UnencodedType]] = (),
+        sender: Optional[PrioritySender] = None,
+        ganglion: str = "",
     ) -> None:
-        super().__init__(neuron, reactants, raw_reactants)
+        super().__init__(neuron, reactants, raw_reactants, ganglion)
 
         self._socket_pub: Socket = socket_pub
+        self._topic = topic(neuron.name)
+        # Shared sockets send through one priority-ordered sender
+        self._sender = sender
 
     async def transmit(
         self,
@@ -44,6 +63,14 @@ class SynapseZmqBasicPub(SynapseExternalBase):
         reaction_id: Optional[UUID] = None,
     ):
         payload = data.encode("UTF-8") if isinstance(data, str) else data
+        self.retain(payload)
 
-        await self._socket_pub.send(self.topic_bytes, zmq.SNDMORE)
-        await self._socket_pub.send(payload)
+        if self._sender is not None:
+            await self._sender.send(
+                self.neuron.priority,
+                [self._topic, payload],
+                conflation_key(self.neuron, payload),
+            )
+        else:
+            await self._socket_pub.send(self._topic, zmq.SNDMORE)
+            await self._socket_pub.send(payload)
@@ -16,17 +16,23 @@
 
 import asyncio
 import logging
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional, Tuple
 from uuid import UUID
 
 import zmq
 import zmq.asyncio
-from zmq.asyncio import Socket
+from pyrsistent import pmap
+from pyrsistent.typing import PMap
+from zmq.asyncio import Context, Socket
 
+from plexo.conflation import ConflationKey, conflation_key
 from plexo.exceptions import IpAddressIsNotMulticast
 from plexo.host_information import get_primary_ip
+from plexo.metrics import metrics, record_received
 from plexo.neuron.neuron import Neuron
+from plexo.socket_options import ZmqSocketOptions
 from plexo.synapse.base import SynapseExternalBase
+from plexo.synapse.zeromq_poller import ZmqPoller
 from plexo.typing import EncodedType, IPAddress, UnencodedType
 from plexo.typing.reactant import Reactant, RawReactant
 
@@ -40,8 +46,24 @@ class SynapseZmqPlexoPubSubEPGM(SynapseExternalBase):
         port: int = 5560,
         reactants: Iterable[Reactant[UnencodedType]] = (),
         raw_reactants: Iterable[RawReactant[UnencodedType]] = (),
+        zmq_context: Optional[Context] = None,
+        zmq_poller: Optional[ZmqPoller] = None,
+        migration_grace_seconds: float = 5.0,
+        socket_options: ZmqSocketOptions = ZmqSocketOptions(),
+        ganglion: str = "",
     ) -> None:
-        super().__init__(neuron, reactants, raw_reactants)
+        super().__init__(neuron, reactants, raw_reactants, ganglion)
+
+        # A shared context and poller let many synapses use a single I/O thread
+        # and receive through a single task
+        self._zmq_context = zmq_context or zmq.asyncio.Context()
+        self._zmq_poller = zmq_poller
+        self._recv_loop_task: Optional[asyncio.Task] = None
+
+        # Sockets of a previous multicast_address keep receiving for a grace
+        # period after an update, keyed by the handle that retires them
+        self.migration_grace_seconds = migration_grace_seconds
+        self._retiring: PMap[asyncio.TimerHandle, Tuple] = pmap()
 
         if not bind_interface:
             bind_interface = get_primary_ip()
@@ -51,6 +73,9 @@ class SynapseZmqPlexoPubSubEPGM(SynapseExternalBase):
         )
         self.port = port
         logging.debug(f"SynapseZmqPlexoPubSubEPGM:{neuron}:port {port}")
+        # Applied to both sockets, pgm receivers use the rate and recovery
+        # interval to size their receive window
+        self.socket_options = socket_options
 
         self._startup(multicast_address)
 
@@ -65,7 +90,6 @@ class SynapseZmqPlexoPubSubEPGM(SynapseExternalBase):
         logging.debug(
             f"SynapseZmqPlexoPubSubEPGM:{topic}:multicast_address {multicast_address}"
         )
-        self._zmq_context = zmq.asyncio.Context()
         self._socket_pub: Optional[Socket] = None
         self._socket_sub: Optional[Socket] = None
         self.connection_string = "epgm://{};{}:{}".format(
@@ -80,27 +104,81 @@ class SynapseZmqPlexoPubSubEPGM(SynapseExternalBase):
 
     def close(self):
         try:
+            for handle, retiring in self._retiring.items():
+                handle.cancel()
+                self._retire(*retiring)
+            self._retiring = pmap()
+
+            if self._zmq_poller is not None and self._socket_sub:
+                self._zmq_poller.unregister(self._socket_sub)
             super().close()
         finally:
+            self._recv_loop_task = None
             if self._socket_sub:
                 self._socket_sub.close()
             if self._socket_pub:
                 self._socket_pub.close()
 
+    def _retire(
+        self,
+        socket_pub: Optional[Socket],
+        socket_sub: Optional[Socket],
+        recv_loop_task: Optional[asyncio.Task],
+    ):
+        logging.debug(f"SynapseZmqPlexoPubSubEPGM:{self.neuron}:Retiring sockets")
+        if recv_loop_task is not None:
+            recv_loop_task.cancel()
+        if socket_sub:
+            if self._zmq_poller is not None:
+                self._zmq_poller.unregister(socket_sub)
+            socket_sub.close()
+        if socket_pub:
+            socket_pub.close()
+
+    def _retire_after_grace(self, *retiring):
+        handle: asyncio.TimerHandle
+
+        def retire():
+            self._retiring = self._retiring.discard(handle)
+            self._retire(*retiring)
+
+        handle = asyncio.get_running_loop().call_later(
+            self.migration_grace_seconds, retire
+        )
+        self._retiring = self._retiring.set(handle, retiring)
+
     def update(self, multicast_address: IPAddress):
-        self.close()
+        # Make before break: sockets for the new multicast_address are opened
+        # first, and the old subscription keeps receiving during the grace period
+        # so messages still in flight on the old group are not lost
+        retiring = (self._socket_pub, self._socket_sub, self._recv_loop_task)
+        self._recv_loop_task = None
+
         self._startup(multicast_address)
 
+        try:
+            self._retire_after_grace(*retiring)
+        except RuntimeError:
+            # No running event loop to wait on
+            self._retire(*retiring)
+
     async def add_reactants(self, reactants: Iterable[Reactant[UnencodedType]]):
         await super().add_reactants(reactants)
         self._start_recv_loop_if_needed()
 
+    async def add_raw_reactants(
+        self, raw_reactants: Iterable[RawReactant[UnencodedType]]
+    ):
+        await super().add_raw_reactants(raw_reactants)
+        self._start_recv_loop_if_needed()
+
     def _create_socket_pub(self):
         logging.debug(f"SynapseZmqPlexoPubSubEPGM:{self.neuron}:Creating publisher")
         self._socket_pub = self._zmq_context.socket(zmq.PUB)
 
         # this conditional is only to satisfy mypy (I think it's a bug)
         if self._socket_pub is not None:
+            self.socket_options.apply(self._socket_pub)
             self._socket_pub.bind(self.connection_string)
 
     def _create_socket_sub(self):
@@ -110,6 +188,7 @@ class SynapseZmqPlexoPubSubEPGM(SynapseExternalBase):
         # this conditional is only to satisfy mypy (I think it's a bug)
         if self._socket_sub is not None:
             self._socket_sub.setsockopt_string(zmq.SUBSCRIBE, self.neuron.name)
+            self.socket_options.apply(self._socket_sub)
             self._socket_sub.connect(self.connection_string)
 
     @property
@@ -126,16 +205,33 @@ class SynapseZmqPlexoPubSubEPGM(SynapseExternalBase):
     ):
         if self._socket_pub is not None:
             payload = data.encode("UTF-8") if isinstance(data, str) else data
+            self.retain(payload)
 
             await self._socket_pub.send(self.topic_bytes, zmq.SNDMORE)
             await self._socket_pub.send(payload)
 
     def _start_recv_loop_if_needed(self):
-        if len(self._dendrite.reactants):
-            logging.debug(
-                f"SynapseZmqPlexoPubSubEPGM:{self.neuron}:Starting _recv_loop"
-            )
-            self._add_task(asyncio.create_task(self._recv_loop()))
+        if len(self._dendrite.reactants) or len(self._dendrite.raw_reactants):
+            if self._zmq_poller is not None:
+                logging.debug(
+                    f"SynapseZmqPlexoPubSubEPGM:{self.neuron}:Registering with poller"
+                )
+                self._zmq_poller.register(
+                    self.socket_sub,
+                    self._receive,
+                    self.neuron.priority,
+                    self._conflation_key if self.neuron.conflation else None,
+                    ganglion=self.ganglion,
+                    neuron=self.neuron.name,
+                )
+            elif self._recv_loop_task is None or self._recv_loop_task.done():
+                logging.debug(
+                    f"SynapseZmqPlexoPubSubEPGM:{self.neuron}:Starting _recv_loop"
+                )
+                self._recv_loop_task = asyncio.create_task(
+                    self._recv_loop(self.socket_sub)
+                )
+                self._add_task(self._recv_loop_task)
         else:
             logging.debug(
                 "SynapseZmqPlexoPubSubEPGM:{}:Not starting _recv_loop - no receptors found".format(
@@ -143,12 +239,22 @@ class SynapseZmqPlexoPubSubEPGM(SynapseExternalBase):
                 )
             )
 
-    async def _recv_loop(self):
+    def _conflation_key(self, frames: List[bytes]) -> Optional[ConflationKey]:
+        return conflation_key(self.neuron, frames[1])
+
+    async def _receive(self, frames: List[bytes]):
+        if metrics.enabled:
+            record_received(self.ganglion, self.neuron.name, frames[1])
+        await self.transduce(frames[1])
+
+    async def _recv_loop(self, socket_sub: Socket):
         topic = self.neuron.name
 
         while True:
             try:
-                data = (await self.socket_sub.recv_multipart())[1]
+                data = (await socket_sub.recv_multipart())[1]
+                if metrics.enabled:
+                    record_received(self.ganglion, topic, data)
                 await self.transduce(data)
             except AttributeError:
                 # Error/exit if the socket no longer exists
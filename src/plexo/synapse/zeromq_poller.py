@@ -0,0 +1,153 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import zmq
+from pyrsistent import pmap
+from pyrsistent.typing import PMap
+from zmq.asyncio import Poller, Socket
+
+from plexo.conflation import ConflationKey
+from plexo.metrics import record_dropped
+from plexo.priority import Priority, PriorityDispatcher
+
+ZmqReceiver = Callable[[List[bytes]], Awaitable]
+ZmqConflationKey = Callable[[List[bytes]], Optional[ConflationKey]]
+# (receiver, priority, conflation key, ganglion label, neuron label)
+ZmqRegistration = Tuple[ZmqReceiver, Priority, Optional[ZmqConflationKey], str, str]
+
+
+class ZmqPoller:
+    def __init__(self, max_batch: int = 64, max_pending: Optional[int] = 1024):
+        # Maximum number of messages received from one socket per poll
+        self.max_batch = max_batch
+
+        self._poller = Poller()
+        self._receivers: PMap[Socket, ZmqRegistration] = pmap()
+        self._receivers_changed = asyncio.Event()
+        # Received messages are handed to a worker per socket and priority, so a
+        # burst on a data socket never holds up control traffic or other sockets
+        self._dispatcher = PriorityDispatcher(max_pending)
+
+    def register(
+        self,
+        socket: Socket,
+        receiver: ZmqReceiver,
+        priority: Priority = Priority.Normal,
+        conflation_key: Optional[ZmqConflationKey] = None,
+        ganglion: str = "",
+        neuron: str = "",
+    ):
+        if socket in self._receivers:
+            return
+
+        self._poller.register(socket, zmq.POLLIN)
+        self._receivers = self._receivers.set(
+            socket, (receiver, priority, conflation_key, ganglion, neuron)
+        )
+        self._receivers_changed.set()
+
+    def unregister(self, socket: Socket):
+        if socket not in self._receivers:
+            return
+
+        self._poller.unregister(socket)
+        self._receivers = self._receivers.discard(socket)
+        self._receivers_changed.set()
+        # Messages already received from the socket are still handed over
+        self._dispatcher.discard(socket)
+
+    def close(self):
+        self._dispatcher.close()
+
+    async def _receive(
+        self,
+        socket: Socket,
+        receiver: ZmqReceiver,
+        priority: Priority,
+        conflation_key: Optional[ZmqConflationKey],
+        ganglion: str,
+        neuron: str,
+    ):
+        for _ in range(self.max_batch):
+            try:
+                frames = await socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            except zmq.ZMQError as e:
+                logging.error(f"ZmqPoller:_receive: {e}")
+                return
+
+            # The poll loop serves every socket, so it never waits for room in a
+            # queue; messages that do not fit are dropped like at a full HWM
+            dispatched = self._dispatcher.dispatch_nowait(
+                priority,
+                receiver,
+                frames,
+                conflation_key=conflation_key(frames) if conflation_key else None,
+                ordering_key=socket,
+            )
+            if not dispatched:
+                record_dropped(ganglion, neuron)
+
+    async def _poll(self):
+        # Registering or unregistering a socket interrupts the current poll
+        # so the next one watches the updated set of sockets
+        poll_future = asyncio.ensure_future(self._poller.poll())
+        changed_future = asyncio.ensure_future(self._receivers_changed.wait())
+        try:
+            await asyncio.wait(
+                (poll_future, changed_future), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            changed_future.cancel()
+            if not poll_future.done():
+                poll_future.cancel()
+
+        if poll_future.cancelled():
+            return ()
+
+        return poll_future.result()
+
+    async def poll_loop(self):
+        while True:
+            self._receivers_changed.clear()
+            if not self._receivers:
+                await self._receivers_changed.wait()
+                continue
+
+            try:
+                events = await self._poll()
+            except zmq.ZMQError as e:
+                # A socket may have been closed while it was being polled
+                logging.warning(f"ZmqPoller:poll_loop: {e}")
+                for socket in self._receivers:
+                    if socket.closed:
+                        self.unregister(socket)
+                continue
+
+            receivers = self._receivers
+            await asyncio.gather(
+                *(
+                    self._receive(socket, *receivers[socket])
+                    for socket, _ in events
+                    if socket in receivers
+                )
+            )
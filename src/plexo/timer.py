@@ -14,29 +14,197 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
 
+
 import asyncio
-from asyncio import Future
-from typing import Optional
+import logging
+import math
+from asyncio import AbstractEventLoop, Future
+from typing import Callable, Dict, List, Optional, Set
+from weakref import WeakKeyDictionary
+
+
+class WheelTimer:
+    def __init__(
+        self,
+        wheel: "TimerWheel",
+        callback: Callable,
+        args: tuple,
+        interval: Optional[float] = None,
+    ):
+        self._wheel = wheel
+        self._callback = callback
+        self._args = args
+        self.interval = interval
+        self.tick: Optional[int] = None
+        self.cancelled = False
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self._wheel._discard(self)
+
+    def _run(self):
+        return self._callback(*self._args)
+
+
+class TimerWheel:
+    def __init__(self, resolution_seconds: float = 0.01):
+        # Timers are grouped into ticks of resolution_seconds, each tick is a
+        # single loop.call_at that fires every timer in it as a batch
+        self.resolution_seconds = resolution_seconds
+
+        self._loop: Optional[AbstractEventLoop] = None
+        self._buckets: Dict[int, List[WheelTimer]] = {}
+        self._bucket_sizes: Dict[int, int] = {}
+        self._bucket_handles: Dict[int, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get_loop(self) -> AbstractEventLoop:
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.get_running_loop()
+
+        return self._loop
+
+    def _schedule(self, timer: WheelTimer, delay: float):
+        loop = self._get_loop()
+        resolution_seconds = self.resolution_seconds
+        tick = math.ceil((loop.time() + delay) / resolution_seconds)
+        timer.tick = tick
+
+        try:
+            self._buckets[tick].append(timer)
+            self._bucket_sizes[tick] += 1
+        except KeyError:
+            self._buckets[tick] = [timer]
+            self._bucket_sizes[tick] = 1
+            self._bucket_handles[tick] = loop.call_at(
+                tick * resolution_seconds, self._fire, tick
+            )
+
+    def _discard(self, timer: WheelTimer):
+        tick = timer.tick
+        if tick not in self._bucket_sizes:
+            return
+
+        self._bucket_sizes[tick] -= 1
+        if not self._bucket_sizes[tick]:
+            # Nothing is left to fire in this tick
+            self._bucket_handles.pop(tick).cancel()
+            del self._buckets[tick]
+            del self._bucket_sizes[tick]
+
+    def _fire(self, tick: int):
+        timers = self._buckets.pop(tick)
+        del self._bucket_sizes[tick]
+        del self._bucket_handles[tick]
+
+        for timer in timers:
+            if timer.cancelled:
+                continue
+
+            if timer.interval is not None:
+                self._schedule(timer, timer.interval)
+
+            try:
+                result = timer._run()
+            except Exception as e:
+                logging.exception(f"TimerWheel:_fire: {e}")
+                continue
+
+            if asyncio.iscoroutine(result):
+                task = self._get_loop().create_task(result)
+                self._tasks.add(task)
+                task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logging.error(
+                f"TimerWheel:_task_done: {task.exception()}", exc_info=task.exception()
+            )
+
+    def call_later(self, delay: float, callback: Callable, *args) -> WheelTimer:
+        timer = WheelTimer(self, callback, args)
+        self._schedule(timer, delay)
+
+        return timer
+
+    def call_periodic(
+        self,
+        interval: float,
+        callback: Callable,
+        *args,
+        initial_delay: Optional[float] = None,
+    ) -> WheelTimer:
+        timer = WheelTimer(self, callback, args, interval=interval)
+        self._schedule(timer, interval if initial_delay is None else initial_delay)
+
+        return timer
+
+    def close(self):
+        for timers in self._buckets.values():
+            for timer in timers:
+                timer.cancelled = True
+        for handle in self._bucket_handles.values():
+            handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+
+        self._buckets = {}
+        self._bucket_sizes = {}
+        self._bucket_handles = {}
+        self._tasks = set()
+
+
+_timer_wheels: "WeakKeyDictionary[AbstractEventLoop, TimerWheel]" = WeakKeyDictionary()
+
+
+def get_timer_wheel() -> TimerWheel:
+    loop = asyncio.get_running_loop()
+    try:
+        return _timer_wheels[loop]
+    except KeyError:
+        timer_wheel = _timer_wheels[loop] = TimerWheel()
+        return timer_wheel
 
 
 class Timer:
-    def __init__(self, timeout, callback=None):
+    def __init__(self, timeout, callback=None, wheel: Optional[TimerWheel] = None):
         self._timeout = timeout
         self._callback = callback
-        self._task: Optional[Future] = None
+        self._wheel = wheel
+        self._future: Optional[Future] = None
+        self._wheel_timer: Optional[WheelTimer] = None
 
-    async def _job(self):
-        await asyncio.sleep(self._timeout)
+    def _expire(self):
         if self._callback:
-            await self._callback()
+            # Scheduled as a task by the wheel
+            return self._expire_with_callback()
+
+        if self._future is not None and not self._future.done():
+            self._future.set_result(None)
+
+    async def _expire_with_callback(self):
+        try:
+            result = await self._callback()
+        except Exception as e:
+            if self._future is not None and not self._future.done():
+                self._future.set_exception(e)
+        else:
+            if self._future is not None and not self._future.done():
+                self._future.set_result(result)
 
     def start(self):
-        self._task = asyncio.ensure_future(self._job())
+        wheel = self._wheel or get_timer_wheel()
+        self._future = asyncio.get_running_loop().create_future()
+        self._wheel_timer = wheel.call_later(self._timeout, self._expire)
 
     async def wait(self):
-        if self._task:
-            return await self._task
+        if self._future:
+            return await self._future
 
     def cancel(self):
-        if self._task:
-            self._task.cancel()
+        if self._wheel_timer:
+            self._wheel_timer.cancel()
+        if self._future:
+            self._future.cancel()
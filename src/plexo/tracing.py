@@ -0,0 +1,117 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+from collections import deque
+from time import perf_counter_ns
+from typing import IO, Any, Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+# (name, category, start_ns, end_ns, reaction_id, args)
+TraceEvent = Tuple[str, str, int, int, Optional[UUID], Dict[str, Any]]
+
+
+class Tracer:
+    def __init__(self, capacity: int = 100_000, enabled: bool = False):
+        # Instrumented code checks this flag before doing any work
+        self.enabled = enabled
+
+        self._events: Deque[TraceEvent] = deque(maxlen=capacity)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        start_ns: int,
+        reaction_id: Optional[UUID] = None,
+        **args: Any,
+    ):
+        # The span ends now, appending to a bounded deque drops the oldest event
+        self._events.append(
+            (name, category, start_ns, perf_counter_ns(), reaction_id, args)
+        )
+
+    def trace_events(self) -> List[dict]:
+        pid = os.getpid()
+        # Each reaction gets its own track so its spans line up across components
+        tids: Dict[Optional[UUID], int] = {None: 0}
+        trace_events: List[dict] = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": 0,
+                "args": {"name": "uncorrelated"},
+            }
+        ]
+
+        for name, category, start_ns, end_ns, reaction_id, args in tuple(self._events):
+            try:
+                tid = tids[reaction_id]
+            except KeyError:
+                tid = tids[reaction_id] = len(tids)
+                trace_events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": tid,
+                        "args": {"name": str(reaction_id)},
+                    }
+                )
+
+            event_args = dict(args)
+            if reaction_id is not None:
+                event_args["reaction_id"] = str(reaction_id)
+
+            trace_events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": start_ns / 1000,
+                    "dur": (end_ns - start_ns) / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": event_args,
+                }
+            )
+
+        return trace_events
+
+    def dump(self, fp: IO[str]):
+        json.dump({"traceEvents": self.trace_events()}, fp)
+
+    def export(self, path: str):
+        with open(path, "w") as fp:
+            self.dump(fp)
+
+
+tracer = Tracer()
@@ -16,27 +16,53 @@
 
 from __future__ import annotations
 
+from time import perf_counter_ns
 from typing import Optional
 from uuid import UUID
 
 from returns.curry import partial
 
+from plexo.loop_monitor import dispatch_codec, monitoring
+from plexo.metrics import metrics, record_duration, record_transmitted
 from plexo.neuron.neuron import Neuron
+from plexo.profiling import profiler
+from plexo.rate_limit import RateLimit
+from plexo.tracing import tracer
 from plexo.typing import Encoder, UnencodedType, EncodedType
 from plexo.typing.synapse import SynapseExternal, SynapseInternal
 from plexo.typing.transmitter import Transmitter, ExternalTransmitter
 
 
 def create_external_encoder_transmitter(
-    synapse: SynapseExternal[UnencodedType], encoder: Encoder
+    synapse: SynapseExternal[UnencodedType],
+    encoder: Encoder,
+    ganglion: str = "",
+    neuron: str = "",
+    rate_limit: Optional[RateLimit] = None,
 ) -> Transmitter:
-    return partial(transmit_external_encode, synapse, encoder)
+    return partial(
+        transmit_external_encode,
+        synapse,
+        encoder,
+        ganglion=ganglion,
+        neuron=neuron,
+        rate_limit=rate_limit,
+    )
 
 
 def create_external_transmitter(
     synapse: SynapseExternal[UnencodedType],
+    ganglion: str = "",
+    neuron: str = "",
+    rate_limit: Optional[RateLimit] = None,
 ) -> ExternalTransmitter:
-    return partial(transmit_external, synapse)
+    return partial(
+        transmit_external,
+        synapse,
+        ganglion=ganglion,
+        neuron=neuron,
+        rate_limit=rate_limit,
+    )
 
 
 def create_transmitter(synapse: SynapseInternal[UnencodedType]) -> Transmitter:
@@ -51,12 +77,68 @@ async def transmit(
     return await synapse.transmit(data, reaction_id)
 
 
+async def _transmit_counted(
+    synapse: SynapseExternal[UnencodedType],
+    ganglion: str,
+    neuron: str,
+    reaction_id: Optional[UUID],
+    data: EncodedType,
+):
+    result = await synapse.transmit(data, reaction_id)
+    record_transmitted(ganglion, neuron, data)
+    return result
+
+
+async def _send(
+    synapse: SynapseExternal[UnencodedType],
+    data: EncodedType,
+    reaction_id: Optional[UUID],
+    rate_limit: Optional[RateLimit],
+    ganglion: str,
+    neuron: str,
+):
+    # Messages are counted once the synapse took them, so a rate limit that
+    # drops or coalesces them never counts them as transmitted
+    if rate_limit is None:
+        if metrics.enabled:
+            return await _transmit_counted(synapse, ganglion, neuron, reaction_id, data)
+        return await synapse.transmit(data, reaction_id)
+
+    if metrics.enabled:
+        send = partial(_transmit_counted, synapse, ganglion, neuron, reaction_id)
+    else:
+        send = partial(synapse.transmit, reaction_id=reaction_id)
+    return await rate_limit.submit(send, data, len(data), neuron)
+
+
 async def transmit_external(
     synapse: SynapseExternal[UnencodedType],
     data: EncodedType,
     reaction_id: Optional[UUID] = None,
+    ganglion: str = "",
+    neuron: str = "",
+    rate_limit: Optional[RateLimit] = None,
 ):
-    return await synapse.transmit(data, reaction_id)
+    if not (metrics.enabled or tracer.enabled or profiler.enabled):
+        return await _send(synapse, data, reaction_id, rate_limit, ganglion, neuron)
+
+    start = perf_counter_ns()
+    try:
+        if profiler.enabled and profiler.sample():
+            return await profiler.profile(
+                "transmit",
+                f"{ganglion}:{neuron}",
+                _send(synapse, data, reaction_id, rate_limit, ganglion, neuron),
+            )
+
+        return await _send(synapse, data, reaction_id, rate_limit, ganglion, neuron)
+    finally:
+        if metrics.enabled:
+            record_duration("transmit_ns", ganglion, neuron, start)
+        if tracer.enabled:
+            tracer.record(
+                "send", "synapse", start, reaction_id, ganglion=ganglion, neuron=neuron
+            )
 
 
 async def transmit_external_encode(
@@ -64,6 +146,42 @@ async def transmit_external_encode(
     encoder: Encoder[UnencodedType],
     data: UnencodedType,
     reaction_id: Optional[UUID] = None,
+    ganglion: str = "",
+    neuron: str = "",
+    rate_limit: Optional[RateLimit] = None,
 ):
-    encoded = encoder(data)
-    return await synapse.transmit(encoded, reaction_id)
+    if not (metrics.enabled or tracer.enabled or profiler.enabled or monitoring()):
+        encoded = encoder(data)
+        return await _send(synapse, encoded, reaction_id, rate_limit, ganglion, neuron)
+
+    sampled = profiler.enabled and profiler.sample()
+
+    start = perf_counter_ns()
+    if sampled:
+        encoded = profiler.call("encode", neuron, encoder, data)
+    elif monitoring():
+        encoded = dispatch_codec("encode", neuron, encoder, data)
+    else:
+        encoded = encoder(data)
+    if metrics.enabled:
+        record_duration("encode_ns", ganglion, neuron, start)
+    if tracer.enabled:
+        tracer.record("encode", "codec", start, reaction_id, neuron=neuron)
+
+    start = perf_counter_ns()
+    try:
+        if sampled:
+            return await profiler.profile(
+                "transmit",
+                f"{ganglion}:{neuron}",
+                _send(synapse, encoded, reaction_id, rate_limit, ganglion, neuron),
+            )
+
+        return await _send(synapse, encoded, reaction_id, rate_limit, ganglion, neuron)
+    finally:
+        if metrics.enabled:
+            record_duration("transmit_ns", ganglion, neuron, start)
+        if tracer.enabled:
+            tracer.record(
+                "send", "synapse", start, reaction_id, ganglion=ganglion, neuron=neuron
+            )
@@ -70,10 +70,18 @@ class Ganglion(Protocol):
     ):
         ...
 
+    @abstractmethod
+    async def start(self):
+        ...
+
     @abstractmethod
     def close(self):
         ...
 
+    @abstractmethod
+    async def aclose(self, timeout: float = 10.0):
+        ...
+
 
 class GanglionExternal(Ganglion):
     # TODO: maybe implement this later as an optimization
@@ -26,10 +26,13 @@ from plexo.typing import UnencodedType, EncodedType
 
 if TYPE_CHECKING:
     # https://www.stefaanlippens.net/circular-imports-type-hints-python.html
+    from plexo.neuron.neuron import Neuron
     from plexo.typing.reactant import Reactant, RawReactant
 
 
 class SynapseInternal(Protocol[UnencodedType]):
+    neuron: Neuron[UnencodedType]
+
     @abstractmethod
     async def add_reactants(self, reactants: Iterable[Reactant[UnencodedType]]):
         ...
@@ -50,8 +53,15 @@ class SynapseInternal(Protocol[UnencodedType]):
     def close(self):
         ...
 
+    @abstractmethod
+    async def aclose(self, timeout: float = 10.0):
+        ...
+
 
 class SynapseExternal(Protocol[UnencodedType]):
+    neuron: Neuron[UnencodedType]
+    last_value: Optional[EncodedType]
+
     @abstractmethod
     async def add_reactants(self, reactants: Iterable[Reactant[UnencodedType]]):
         ...
@@ -77,3 +87,7 @@ class SynapseExternal(Protocol[UnencodedType]):
     @abstractmethod
     def close(self):
         ...
+
+    @abstractmethod
+    async def aclose(self, timeout: float = 10.0):
+        ...
@@ -0,0 +1,294 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import Connection, wait
+from multiprocessing.context import ForkContext, ForkServerContext, SpawnContext
+from typing import (
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from plexo import loop as plexo_loop
+from plexo.neuron.neuron import Neuron
+from plexo.typing.ganglion import Ganglion
+from plexo.typing.reactant import Reactant
+
+T = TypeVar("T")
+
+
+def _weight(key: bytes, worker_id: int) -> int:
+    digest = hashlib.blake2b(
+        worker_id.to_bytes(8, "little") + key, digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def rendezvous_owner(key: str, workers: Iterable[int]) -> int:
+    # Highest random weight hashing: removing a worker only moves the keys it
+    # owned, every other key stays where it is
+    key_bytes = key.encode("UTF-8")
+    return max(workers, key=lambda worker_id: _weight(key_bytes, worker_id))
+
+
+class WorkerContext:
+    # Handed to the worker coroutine in every process. Neurons adapted through
+    # the context are only adapted by the worker that owns them, and are picked
+    # up by the survivors when the supervisor gives up on a worker.
+    def __init__(
+        self,
+        worker_id: int,
+        workers: Sequence[int],
+        connection: Optional[Connection] = None,
+    ):
+        self.worker_id = worker_id
+        self.workers: Tuple[int, ...] = tuple(workers)
+        self._connection = connection
+
+        self._adaptations: List[
+            Tuple[Ganglion, Neuron, Optional[Iterable[Reactant]], str]
+        ] = []
+        self._adapted: List[bool] = []
+        self._rebalance_lock = asyncio.Lock()
+        self._tasks: set = set()
+
+    def owns(self, key: str) -> bool:
+        return rendezvous_owner(key, self.workers) == self.worker_id
+
+    def owned(self, items: Iterable[T], key: Callable[[T], str] = str) -> List[T]:
+        return [item for item in items if self.owns(key(item))]
+
+    async def adapt(
+        self,
+        ganglion: Ganglion,
+        neuron: Neuron,
+        reactants: Optional[Iterable[Reactant]] = None,
+        key: Optional[str] = None,
+    ):
+        key = key or neuron.name
+        self._adaptations.append((ganglion, neuron, reactants, key))
+        self._adapted.append(False)
+        await self._adapt_owned()
+
+    async def _adapt_owned(self):
+        async with self._rebalance_lock:
+            for i, (ganglion, neuron, reactants, key) in enumerate(self._adaptations):
+                if not self._adapted[i] and self.owns(key):
+                    logging.debug(
+                        f"WorkerContext:{self.worker_id}:Adapting {neuron.name}"
+                    )
+                    await ganglion.adapt(neuron, reactants=reactants)
+                    self._adapted[i] = True
+
+    def _start(self):
+        if self._connection is not None:
+            asyncio.get_running_loop().add_reader(
+                self._connection.fileno(), self._receive_workers, self._connection
+            )
+
+    def _receive_workers(self, connection: Connection):
+        try:
+            workers = connection.recv()
+        except EOFError:
+            # The supervisor is gone, nothing will be rebalanced anymore
+            asyncio.get_running_loop().remove_reader(connection.fileno())
+            return
+
+        logging.debug(f"WorkerContext:{self.worker_id}:Rebalancing to {workers}")
+        self.workers = tuple(workers)
+        task = asyncio.create_task(self._adapt_owned())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+Worker = Callable[[WorkerContext], Coroutine]
+
+
+async def _run_worker(
+    worker: Worker, worker_id: int, workers: Sequence[int], connection: Connection
+):
+    context = WorkerContext(worker_id, workers, connection)
+    context._start()
+    await worker(context)
+
+
+def _worker_main(
+    worker: Worker,
+    worker_id: int,
+    workers: Sequence[int],
+    connection: Connection,
+    event_loop: Optional[str],
+):
+    try:
+        plexo_loop.run(
+            _run_worker(worker, worker_id, workers, connection), event_loop=event_loop
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+class Supervisor:
+    # Pre-forks num_workers processes that each run worker(context) on their
+    # own event loop, usually with their own Plexus. A worker that dies is
+    # restarted with the same id, so its keys don't move. Once a worker fails
+    # more than max_restarts times within restart_window_seconds it is dropped
+    # and its keys are rebalanced across the others.
+    #
+    # Workers bind their own sockets, e.g. port_pub=5570 + context.worker_id.
+    # Create the supervisor before any event loop or zmq context exists, forked
+    # processes must not inherit them.
+    def __init__(
+        self,
+        worker: Worker,
+        num_workers: Optional[int] = None,
+        max_restarts: int = 5,
+        restart_window_seconds: float = 60.0,
+        event_loop: Optional[str] = None,
+        start_method: str = "fork",
+    ):
+        self.worker = worker
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.max_restarts = max_restarts
+        self.restart_window_seconds = restart_window_seconds
+        self.event_loop = event_loop
+
+        # Only the concrete contexts declare Process, get_context(str) is typed
+        # as their common base
+        self._mp_context = cast(
+            Union[ForkContext, ForkServerContext, SpawnContext],
+            multiprocessing.get_context(start_method),
+        )
+        self.workers: Tuple[int, ...] = tuple(range(self.num_workers))
+        self._processes: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self._connections: Dict[int, Connection] = {}
+        self._restarts: Dict[int, List[float]] = {}
+        self._stopping = False
+
+    def _start_worker(self, worker_id: int):
+        parent_connection, child_connection = self._mp_context.Pipe()
+        process = self._mp_context.Process(
+            target=_worker_main,
+            args=(
+                self.worker,
+                worker_id,
+                self.workers,
+                child_connection,
+                self.event_loop,
+            ),
+            name=f"plexo-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        self._processes[worker_id] = process
+        self._connections[worker_id] = parent_connection
+        logging.debug(f"Supervisor:Started worker {worker_id} pid {process.pid}")
+
+    def start(self):
+        for worker_id in self.workers:
+            self._start_worker(worker_id)
+
+    def _can_restart(self, worker_id: int) -> bool:
+        now = time.monotonic()
+        restarts = [
+            restart
+            for restart in self._restarts.get(worker_id, ())
+            if now - restart < self.restart_window_seconds
+        ]
+        if len(restarts) >= self.max_restarts:
+            return False
+
+        self._restarts[worker_id] = restarts + [now]
+        return True
+
+    def _remove_worker(self, worker_id: int):
+        self.workers = tuple(w for w in self.workers if w != worker_id)
+        self._connections.pop(worker_id).close()
+        logging.warning(
+            f"Supervisor:Dropped worker {worker_id}, rebalancing to {self.workers}"
+        )
+        for connection in self._connections.values():
+            try:
+                connection.send(self.workers)
+            except (BrokenPipeError, OSError):
+                pass
+
+    def _handle_exit(self, worker_id: int):
+        process = self._processes.pop(worker_id)
+        process.join()
+        if process.exitcode == 0 or self._stopping:
+            self._connections.pop(worker_id).close()
+            return
+
+        logging.warning(
+            f"Supervisor:Worker {worker_id} exited with code {process.exitcode}"
+        )
+        if self._can_restart(worker_id):
+            self._connections.pop(worker_id).close()
+            self._start_worker(worker_id)
+        else:
+            self._remove_worker(worker_id)
+
+    def poll(self, timeout: Optional[float] = None):
+        # Handles every worker that exited, waiting up to timeout for one
+        sentinels = {
+            process.sentinel: worker_id
+            for worker_id, process in self._processes.items()
+        }
+        exited = wait(list(sentinels), timeout)
+        for sentinel, worker_id in sentinels.items():
+            if sentinel in exited:
+                self._handle_exit(worker_id)
+
+    def run(self):
+        self.start()
+        try:
+            while self._processes:
+                self.poll()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping = True
+        for process in self._processes.values():
+            process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        for connection in self._connections.values():
+            connection.close()
+        self._processes = {}
+        self._connections = {}
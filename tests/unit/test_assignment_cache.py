@@ -0,0 +1,97 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import ipaddress
+import json
+
+import pytest
+from pyrsistent import pmap
+
+from plexo import assignment_cache
+from plexo.assignment_cache import (
+    ASSIGNMENT_CACHE_VERSION,
+    AssignmentCache,
+    CachedAssignment,
+)
+
+assignments = pmap(
+    {
+        "dev.plexo.Foo.pickle": CachedAssignment(
+            multicast_address=ipaddress.ip_address("239.0.0.40"),
+            proposal_id=1_600_000_000_000_000_000,
+            instance_id=42,
+        ),
+        "dev.plexo.Bar.pickle": CachedAssignment(
+            multicast_address=ipaddress.ip_address("ff02::40"),
+            proposal_id=1,
+            instance_id=7,
+        ),
+    }
+)
+
+
+def test_round_trip(tmp_path):
+    cache = AssignmentCache(tmp_path / "cache" / "assignments.json")
+    assert cache.load() == pmap()
+
+    cache.save(assignments)
+
+    assert AssignmentCache(cache.path).load() == assignments
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / "assignments.json"
+    path.write_text('{"version": 1, "assignments": {"dev.plexo.Foo.pi')
+
+    assert AssignmentCache(path).load() == pmap()
+
+
+def test_invalid_assignment_is_ignored(tmp_path):
+    cache = AssignmentCache(tmp_path / "assignments.json")
+    cache.save(assignments)
+    cache_json = json.loads(cache.path.read_text())
+    cache_json["assignments"]["dev.plexo.Bar.pickle"]["multicast_ip"] = "not an ip"
+    cache.path.write_text(json.dumps(cache_json))
+
+    assert cache.load() == assignments.discard("dev.plexo.Bar.pickle")
+
+
+def test_wrong_version_is_ignored(tmp_path):
+    cache = AssignmentCache(tmp_path / "assignments.json")
+    cache.save(assignments)
+    cache_json = json.loads(cache.path.read_text())
+    cache_json["version"] = ASSIGNMENT_CACHE_VERSION + 1
+    cache.path.write_text(json.dumps(cache_json))
+
+    assert cache.load() == pmap()
+
+
+def test_save_replaces_atomically(tmp_path, monkeypatch):
+    cache = AssignmentCache(tmp_path / "assignments.json")
+    cache.save(assignments)
+    saved = cache.path.read_bytes()
+
+    def failing_dump(obj, fp, **kwargs):
+        fp.write('{"version": 1, "assign')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(assignment_cache.json, "dump", failing_dump)
+    with pytest.raises(OSError):
+        cache.save(assignments.discard("dev.plexo.Foo.pickle"))
+
+    # The previous cache is untouched and the partial write is cleaned up
+    assert cache.path.read_bytes() == saved
+    assert [path.name for path in tmp_path.iterdir()] == [cache.path.name]
@@ -0,0 +1,193 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import ipaddress
+
+import pytest
+import zmq
+import zmq.asyncio
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.synapse.zeromq_plexopubsub_epgm import SynapseZmqPlexoPubSubEPGM
+from plexo.synapse.zeromq_poller import ZmqPoller
+
+neuron = Neuron(int, Namespace(["test", "migration"]), PickleCodec())
+first_address = ipaddress.ip_address("239.0.0.40")
+second_address = ipaddress.ip_address("239.0.0.41")
+third_address = ipaddress.ip_address("239.0.0.42")
+
+
+class _InprocSynapse(SynapseZmqPlexoPubSubEPGM):
+    # Same migration logic over inproc sockets, epgm is rarely compiled in
+
+    def __init__(self, *args, **kwargs):
+        self.retired = []
+        super().__init__(*args, **kwargs)
+
+    def _endpoint(self):
+        return f"inproc://test_epgm_migration_{self.multicast_address}"
+
+    def _create_socket_pub(self):
+        self._socket_pub = self._zmq_context.socket(zmq.PUB)
+        self._socket_pub.bind(self._endpoint())
+
+    def _create_socket_sub(self):
+        self._socket_sub = self._zmq_context.socket(zmq.SUB)
+        self._socket_sub.setsockopt_string(zmq.SUBSCRIBE, self.neuron.name)
+        self._socket_sub.connect(self._endpoint())
+
+    def _retire(self, socket_pub, socket_sub, recv_loop_task):
+        self.retired.append(socket_pub)
+        super()._retire(socket_pub, socket_sub, recv_loop_task)
+
+
+async def _reactant(data, neuron, reaction_id=None):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_update_retires_old_sockets_after_grace():
+    context = zmq.asyncio.Context()
+    synapse = _InprocSynapse(
+        neuron,
+        first_address,
+        bind_interface="127.0.0.1",
+        reactants=(_reactant,),
+        zmq_context=context,
+        migration_grace_seconds=0.4,
+    )
+    first_pub, first_sub = synapse._socket_pub, synapse._socket_sub
+    first_task = synapse._recv_loop_task
+
+    try:
+        synapse.update(second_address)
+        second_pub, second_sub = synapse._socket_pub, synapse._socket_sub
+        await asyncio.sleep(0.2)
+        # Updated again within the grace period of the first update
+        synapse.update(third_address)
+
+        # The old subscriptions keep receiving during their grace period
+        assert not first_sub.closed and not second_sub.closed
+        assert not first_task.done()
+
+        await asyncio.sleep(0.3)
+        assert first_pub.closed and first_sub.closed
+        assert not second_pub.closed and not second_sub.closed
+        assert first_task.cancelled()
+
+        await asyncio.sleep(0.2)
+        assert second_pub.closed and second_sub.closed
+        assert synapse.retired == [first_pub, second_pub]
+        assert not synapse._socket_pub.closed
+    finally:
+        synapse.close()
+
+    # Nothing was left to retire on close
+    assert synapse.retired == [first_pub, second_pub]
+    context.term()
+
+
+@pytest.mark.asyncio
+async def test_close_retires_pending_sockets_once():
+    context = zmq.asyncio.Context()
+    synapse = _InprocSynapse(
+        neuron,
+        first_address,
+        bind_interface="127.0.0.1",
+        zmq_context=context,
+        migration_grace_seconds=0.1,
+    )
+    first_pub = synapse._socket_pub
+    synapse.update(second_address)
+
+    synapse.close()
+    # The pending retire ran on close and its timer was cancelled
+    assert first_pub.closed
+    assert synapse.retired == [first_pub]
+    await asyncio.sleep(0.15)
+    assert synapse.retired == [first_pub]
+    context.term()
+
+
+def test_update_without_a_running_loop_retires_immediately():
+    context = zmq.asyncio.Context()
+    synapse = _InprocSynapse(
+        neuron, first_address, bind_interface="127.0.0.1", zmq_context=context
+    )
+    first_pub = synapse._socket_pub
+
+    try:
+        synapse.update(second_address)
+
+        assert first_pub.closed
+        assert synapse.retired == [first_pub]
+        assert synapse.multicast_address == second_address
+    finally:
+        synapse.close()
+    context.term()
+
+
+@pytest.mark.asyncio
+async def test_migrated_synapse_leaves_no_poller_queue_behind():
+    context = zmq.asyncio.Context()
+    poller = ZmqPoller()
+    poll_task = asyncio.create_task(poller.poll_loop())
+    received = []
+
+    async def reactant(data, neuron, reaction_id=None):
+        received.append(data)
+
+    synapse = _InprocSynapse(
+        neuron,
+        first_address,
+        bind_interface="127.0.0.1",
+        reactants=(reactant,),
+        zmq_context=context,
+        zmq_poller=poller,
+        migration_grace_seconds=0.1,
+    )
+    first_sub = synapse._socket_sub
+
+    try:
+        await asyncio.sleep(0.05)
+        await synapse.transmit(neuron.encode(1))
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        assert received == [1]
+        workers = [
+            queue.worker
+            for (_, key), queue in poller._dispatcher._queues.items()
+            if key is first_sub
+        ]
+        assert workers
+
+        synapse.update(second_address)
+        await asyncio.sleep(0.2)
+
+        assert first_sub.closed
+        assert all(key is not first_sub for _, key in poller._dispatcher._queues)
+        assert all(worker.done() for worker in workers)
+    finally:
+        synapse.close()
+        poll_task.cancel()
+        await asyncio.gather(poll_task, return_exceptions=True)
+        poller.close()
+    context.term()
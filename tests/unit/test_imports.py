@@ -0,0 +1,77 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import subprocess  # nosec - runs the current interpreter on fixed snippets
+import sys
+
+import pytest
+
+import plexo
+import plexo.codec
+
+# Generous so it only catches an eagerly imported transport or codec
+IMPORT_BUDGET_SECONDS = 1.0
+
+HEAVY_MODULES = ("zmq", "capnpy", "python_jsonschema_objects")
+
+
+def _fresh_import(statement: str) -> dict:
+    # Each import is measured in a new interpreter, nothing is cached yet
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'elapsed': elapsed, 'modules': list(sys.modules)}))\n"
+    )
+    source = os.path.dirname(os.path.dirname(plexo.__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([source] + sys.path))
+    output = subprocess.run(  # nosec
+        [sys.executable, "-c", script],
+        check=True,
+        capture_output=True,
+        env=env,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import plexo.plexus",
+        "import plexo.axon",
+        "from plexo.ganglion import GanglionInproc",
+        "from plexo.codec import PickleCodec",
+    ],
+)
+def test_import_skips_transports_and_codecs(statement):
+    result = _fresh_import(statement)
+
+    loaded = {module.split(".")[0] for module in result["modules"]}
+    assert loaded.isdisjoint(HEAVY_MODULES)
+    assert result["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+def test_lazy_exports():
+    from plexo.codec.pickle_codec import PickleCodec
+
+    assert plexo.codec.PickleCodec is PickleCodec
+    assert "JsonCodec" in dir(plexo.codec)
+    with pytest.raises(AttributeError):
+        plexo.codec.MissingCodec
@@ -0,0 +1,126 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import ipaddress
+import itertools
+
+import pytest
+
+from plexo.exceptions import IpLeaseExists, IpNotFound, IpNotLeased, IpsExhausted
+from plexo.ip_lease import PAGE_SIZE, IpLeaseManager, IpLeaseStrategy
+
+test_cidr = ipaddress.ip_network("239.0.0.0/16")
+
+
+def test_lease_release():
+    ip_lease_manager = IpLeaseManager(test_cidr)
+    ip_address = ipaddress.ip_address("239.0.1.1")
+
+    assert not ip_lease_manager.address_is_leased(ip_address)
+    assert ip_lease_manager.lease_address(ip_address) == ip_address
+    assert ip_lease_manager.address_is_leased(ip_address)
+    with pytest.raises(IpLeaseExists):
+        ip_lease_manager.lease_address(ip_address)
+
+    assert ip_lease_manager.release_address(ip_address) == ip_address
+    assert not ip_lease_manager.address_is_leased(ip_address)
+    with pytest.raises(IpNotLeased):
+        ip_lease_manager.release_address(ip_address)
+
+    assert len(ip_lease_manager) == 0
+
+
+@pytest.mark.parametrize(
+    "ip_address",
+    (
+        ipaddress.ip_address("239.1.0.0"),
+        ipaddress.ip_address("238.255.255.255"),
+        ipaddress.ip_address("ff02::1"),
+    ),
+)
+def test_address_outside_cidr(ip_address):
+    ip_lease_manager = IpLeaseManager(test_cidr)
+
+    with pytest.raises(IpNotFound):
+        ip_lease_manager.lease_address(ip_address)
+    with pytest.raises(IpNotFound):
+        ip_lease_manager.address_is_leased(ip_address)
+
+
+def test_sequential_skips_leased_addresses():
+    ip_lease_manager = IpLeaseManager(test_cidr)
+    for offset in range(PAGE_SIZE + 3):
+        ip_lease_manager.lease_address(test_cidr[offset])
+
+    assert ip_lease_manager.get_address() == test_cidr[PAGE_SIZE + 3]
+    assert ip_lease_manager.get_address() == test_cidr[PAGE_SIZE + 4]
+
+
+@pytest.mark.parametrize("strategy", tuple(IpLeaseStrategy))
+def test_strategies_exhaust_cidr(strategy):
+    cidr = ipaddress.ip_network("239.0.0.0/28")
+    ip_lease_manager = IpLeaseManager(cidr, strategy=strategy)
+
+    leased = {ip_lease_manager.get_address(key=b"foo") for _ in range(16)}
+
+    assert leased == set(cidr)
+    with pytest.raises(IpsExhausted):
+        ip_lease_manager.get_address(key=b"foo")
+
+
+def test_hashed_is_deterministic():
+    first = IpLeaseManager(test_cidr).get_hashed_address(b"dev.plexo.Foo.pickle")
+    second = IpLeaseManager(test_cidr).get_hashed_address(b"dev.plexo.Foo.pickle")
+
+    assert first == second
+
+
+def test_hashed_address_skips_excluded():
+    key = b"dev.plexo.Foo.pickle"
+    ip_lease_manager = IpLeaseManager(test_cidr)
+    probes = list(itertools.islice(ip_lease_manager.hashed_addresses(key), 3))
+    # e.g. the addresses a ganglion reserves for itself
+    excluded = set(probes[:2])
+
+    assert ip_lease_manager.hashed_address(key) == probes[0]
+    assert ip_lease_manager.hashed_address(key, excluded) == probes[2]
+    assert ip_lease_manager.lease_hashed_address(key, excluded) == probes[2]
+    assert ip_lease_manager.address_is_leased(probes[2])
+    assert not ip_lease_manager.address_is_leased(probes[0])
+
+
+def test_hashed_collision_falls_back():
+    key = b"dev.plexo.Foo.pickle"
+    ip_lease_manager = IpLeaseManager(test_cidr)
+    hashed_address = ip_lease_manager.hashed_address(key)
+    ip_lease_manager.lease_address(hashed_address)
+
+    # The leased address is not probed past, the caller falls back to consensus
+    assert ip_lease_manager.lease_hashed_address(key) is None
+    assert len(ip_lease_manager) == 1
+    # which continues along the probe sequence
+    assert (
+        ip_lease_manager.get_hashed_address(key)
+        == list(itertools.islice(ip_lease_manager.hashed_addresses(key), 2))[1]
+    )
+
+
+def test_large_cidr():
+    ip_lease_manager = IpLeaseManager(ipaddress.ip_network("ff00::/8"))
+    ip_address = ip_lease_manager.get_address(IpLeaseStrategy.Random)
+
+    assert ip_lease_manager.address_is_leased(ip_address)
+    assert ip_lease_manager.available == 2**120 - 1
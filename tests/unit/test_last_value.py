@@ -0,0 +1,58 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import ipaddress
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.ganglion.tcp_pubsub import GanglionZmqTcpPubSub
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+
+localhost = ipaddress.ip_address("127.0.0.1")
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_receives_last_value():
+    neuron = Neuron(
+        dict, Namespace(["test", "last_value"]), PickleCodec(), last_value=True
+    )
+    publisher = GanglionZmqTcpPubSub("127.0.0.1", 26570, port_snapshot=26571)
+    await publisher.adapt(neuron)
+    await publisher.transmit({"value": 1}, neuron)
+    await publisher.transmit({"value": 2}, neuron)
+
+    received = []
+
+    async def reactant(data, neuron, reaction_id=None):
+        received.append(data)
+
+    subscriber = GanglionZmqTcpPubSub(
+        "127.0.0.1",
+        26572,
+        peers=[(localhost, 26570)],
+        snapshot_peers=[(localhost, 26571)],
+    )
+    await subscriber.adapt(neuron, reactants=(reactant,))
+    for _ in range(100):
+        if received:
+            break
+        await asyncio.sleep(0.01)
+
+    await asyncio.gather(subscriber.aclose(), publisher.aclose())
+    assert received == [{"value": 2}]
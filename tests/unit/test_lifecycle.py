@@ -0,0 +1,80 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import ipaddress
+import time
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.ganglion.inproc import GanglionInproc
+from plexo.ganglion.tcp_pubsub import GanglionZmqTcpPubSub
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.plexus import Plexus
+
+localhost = ipaddress.ip_address("127.0.0.1")
+neuron = Neuron(int, Namespace(["test", "lifecycle"]), PickleCodec())
+
+
+class _StuckGanglion(GanglionInproc):
+    closed = False
+
+    async def aclose(self, timeout: float = 10.0):
+        await asyncio.Event().wait()
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+@pytest.mark.asyncio
+async def test_plexus_async_context_closes_ganglia_in_parallel():
+    received = []
+
+    async def reactant(data, neuron, reaction_id=None):
+        received.append(data)
+
+    async with Plexus(
+        ganglia=(GanglionZmqTcpPubSub("127.0.0.1", 26580, [(localhost, 26581)]),)
+    ) as receiver, Plexus(
+        ganglia=(GanglionZmqTcpPubSub("127.0.0.1", 26581, [(localhost, 26580)]),)
+    ) as sender:
+        await receiver.adapt(neuron, reactants=(reactant,))
+        await sender.adapt(neuron)
+        await asyncio.sleep(0.2)
+        await sender.transmit(1, neuron)
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+
+    assert received == [1]
+
+
+@pytest.mark.asyncio
+async def test_plexus_aclose_is_bounded():
+    stuck = _StuckGanglion()
+    plexus = Plexus(ganglia=(stuck,))
+    await plexus.adapt(neuron)
+
+    start = time.perf_counter()
+    elapsed = await plexus.aclose(timeout=0.1)
+
+    assert 0.1 <= elapsed < 1
+    assert time.perf_counter() - start < 1
+    assert stuck.closed
@@ -0,0 +1,53 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from plexo import loop
+from plexo.exceptions import EventLoopNotAvailable
+
+
+class _RecordingPolicy(asyncio.DefaultEventLoopPolicy):
+    pass
+
+
+def test_event_loop_selected_by_environment(monkeypatch):
+    monkeypatch.setattr(loop, "_entry_points", lambda: ())
+    monkeypatch.setenv(loop.ENVIRONMENT_VARIABLE, "asyncio")
+    assert isinstance(loop.event_loop_policy(), asyncio.DefaultEventLoopPolicy)
+    assert "asyncio" in loop.available_event_loops()
+
+    monkeypatch.setenv(loop.ENVIRONMENT_VARIABLE, "missing")
+    with pytest.raises(EventLoopNotAvailable):
+        loop.event_loop_policy()
+
+
+def test_run_installs_the_policy(monkeypatch):
+    monkeypatch.setattr(
+        loop,
+        "event_loops",
+        lambda: {"recording": _RecordingPolicy},
+    )
+
+    async def policy_name():
+        return type(asyncio.get_event_loop_policy()).__name__
+
+    try:
+        assert loop.run(policy_name(), event_loop="recording") == "_RecordingPolicy"
+    finally:
+        asyncio.set_event_loop_policy(None)
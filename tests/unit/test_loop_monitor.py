@@ -0,0 +1,80 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.dendrite import Dendrite
+from plexo.loop_monitor import LoopMonitor, monitoring
+from plexo.metrics import MetricsRegistry
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+
+
+async def blocking_reactant(data, neuron, reaction_id=None):
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_blocking_reactant_is_attributed():
+    neuron = Neuron(str, Namespace(["test"]), PickleCodec())
+    dendrite = Dendrite(neuron, [blocking_reactant])
+    registry = MetricsRegistry()
+    monitor = LoopMonitor(
+        interval_seconds=0.01, block_threshold_seconds=0.1, registry=registry
+    )
+
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        await dendrite.transduce("data")
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    assert monitor.stalls == {f"reactant blocking_reactant on {neuron.name}": 1}
+    assert monitor.lag_histogram.max >= 0.25e9
+    assert registry.histogram("loop_blocked_ns", neuron=neuron.name).count == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_reactant_is_attributed_to_the_dispatching_neuron():
+    blocked = Neuron(str, Namespace(["test", "blocked"]), PickleCodec())
+    other = Neuron(str, Namespace(["test", "other"]), PickleCodec())
+    dendrite = Dendrite(blocked, [blocking_reactant])
+    # Registering the same function on a later neuron must not steal the blame
+    Dendrite(other, [blocking_reactant])
+    monitor = LoopMonitor(
+        interval_seconds=0.01,
+        block_threshold_seconds=0.1,
+        registry=MetricsRegistry(),
+    )
+
+    assert not monitoring()
+    monitor.start()
+    try:
+        assert monitoring()
+        await asyncio.sleep(0.05)
+        await dendrite.transduce("data")
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    assert not monitoring()
+    assert monitor.stalls == {f"reactant blocking_reactant on {blocked.name}": 1}
@@ -0,0 +1,101 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.dendrite import Dendrite
+from plexo.metrics import Histogram, MetricsRegistry, format_prometheus, metrics
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.rate_limit import RateLimit, RateLimitPolicy
+from plexo.transmitter import transmit_external
+
+neuron = Neuron(str, Namespace(["test", "metrics"]), PickleCodec())
+
+
+class _Synapse:
+    def __init__(self):
+        self.transmitted = []
+
+    async def transmit(self, data, reaction_id=None):
+        self.transmitted.append(data)
+
+
+async def _reactant(data, neuron, reaction_id=None):
+    pass
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+def test_histogram_percentiles_within_bucket_error():
+    histogram = Histogram(sub_bucket_bits=5)
+    for value in range(1, 100_001):
+        histogram.record(value)
+
+    assert histogram.count == 100_000
+    assert histogram.min == 1
+    assert histogram.max == 100_000
+    for percentile in (50, 90, 99):
+        expected = 100_000 * percentile / 100
+        assert abs(histogram.percentile(percentile) - expected) / expected < 1 / 16
+
+
+def test_prometheus_format():
+    registry = MetricsRegistry(enabled=True)
+    registry.counter("received_messages", "GanglionZmqTcpPubSub", "a.b").inc(3)
+    registry.histogram("decode_ns", neuron='a"b').record(10)
+
+    text = format_prometheus(registry)
+
+    assert (
+        'plexo_received_messages_total{ganglion="GanglionZmqTcpPubSub",neuron="a.b"} 3'
+        in text
+    )
+    assert 'plexo_decode_ns_count{ganglion="",neuron="a\\"b"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_dropped_transmits_are_not_counted(enabled_metrics):
+    synapse = _Synapse()
+    rate_limit = RateLimit(messages_per_second=1, policy=RateLimitPolicy.Drop)
+
+    for _ in range(3):
+        await transmit_external(
+            synapse, b"data", ganglion="G", neuron="n", rate_limit=rate_limit
+        )
+
+    assert synapse.transmitted == [b"data"]
+    assert enabled_metrics.counter("transmitted_messages", "G", "n").value == 1
+    assert enabled_metrics.counter("transmitted_bytes", "G", "n").value == 4
+    assert enabled_metrics.histogram("transmit_ns", "G", "n").count == 3
+
+
+@pytest.mark.asyncio
+async def test_dendrite_durations_carry_ganglion(enabled_metrics):
+    dendrite = Dendrite(neuron, [_reactant], ganglion="G")
+
+    await dendrite.transduce("data")
+
+    assert enabled_metrics.histogram("reactant_ns", "G", neuron.name).count == 1
+    assert enabled_metrics.histogram("reactant_ns", "", neuron.name).count == 0
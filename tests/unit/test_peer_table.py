@@ -0,0 +1,64 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from plexo.peer_table import PeerTable
+
+
+@pytest.mark.asyncio
+async def test_peer_table_join_and_leave():
+    joined = []
+    left = []
+
+    async def on_join(instance_id):
+        joined.append(instance_id)
+
+    async def on_leave(instance_id):
+        left.append(instance_id)
+
+    peer_table = PeerTable(expiry_seconds=10)
+    peer_table.add_join_listener(on_join)
+    peer_table.add_leave_listener(on_leave)
+
+    await peer_table.heartbeat(1, now=0)
+    await peer_table.heartbeat(2, now=5)
+    await peer_table.heartbeat(1, now=8)
+
+    assert joined == [1, 2]
+    assert len(peer_table) == 2
+
+    # The first heartbeat of 1 expires, but it has been renewed since
+    assert await peer_table.expire(now=12) == []
+    assert await peer_table.expire(now=16) == [2]
+    assert await peer_table.expire(now=18.5) == [1]
+    assert await peer_table.expire(now=30) == []
+
+    assert left == [2, 1]
+    assert len(peer_table) == 0
+
+
+@pytest.mark.asyncio
+async def test_peer_table_listener_errors_are_contained():
+    async def on_join(instance_id):
+        raise RuntimeError("listener failed")
+
+    peer_table = PeerTable(expiry_seconds=10)
+    peer_table.add_join_listener(on_join)
+
+    await peer_table.heartbeat(1, now=0)
+
+    assert 1 in peer_table
@@ -0,0 +1,397 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import ipaddress
+import threading
+
+import pytest
+import zmq
+from pyrsistent import pmap
+
+# The multicast messages are capnpy schemas compiled on first use
+pytest.importorskip("capnpy")
+
+from plexo.assignment_cache import AssignmentCache, CachedAssignment
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.ganglion import plexo_multicast
+from plexo.ganglion.plexo_multicast import (
+    HASHED_CLAIM_PROPOSAL_ID,
+    GanglionPlexoMulticast,
+    MulticastAddressAssignment,
+    is_hashed_claim,
+)
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.neuron.plexo_multicast_neuron import approval_neuron, promise_neuron
+from plexo.schema.plexo_multicast.plexo_approval import PlexoApproval
+from plexo.schema.plexo_multicast.plexo_promise import PlexoPromise
+from plexo.synapse.zeromq_plexopubsub_epgm import SynapseZmqPlexoPubSubEPGM
+
+PEER = 7
+OTHER_PEER = 8
+PROPOSAL_ID = 1_700_000_000_000_000_000
+namespace = Namespace(["test", "plexo_multicast"])
+# Ordered by name, the lowest name keeps a contested hashed address
+neuron_a = Neuron(int, namespace, PickleCodec(), type_name_alias="a")
+neuron_b = Neuron(int, namespace, PickleCodec(), type_name_alias="b")
+address_x = ipaddress.ip_address("239.0.1.10")
+address_y = ipaddress.ip_address("239.0.1.20")
+address_z = ipaddress.ip_address("239.0.1.30")
+
+
+class _InprocSynapse(SynapseZmqPlexoPubSubEPGM):
+    # The ganglion's synapses over inproc sockets, epgm is rarely compiled in
+
+    def _endpoint(self):
+        return f"inproc://test_plexo_multicast_{self.multicast_address}"
+
+    def _create_socket_pub(self):
+        self._socket_pub = self._zmq_context.socket(zmq.PUB)
+        self._socket_pub.bind(self._endpoint())
+
+    def _create_socket_sub(self):
+        self._socket_sub = self._zmq_context.socket(zmq.SUB)
+        self._socket_sub.setsockopt_string(zmq.SUBSCRIBE, self.neuron.name)
+        self._socket_sub.connect(self._endpoint())
+
+
+def _ganglion(monkeypatch, **kwargs):
+    monkeypatch.setattr(plexo_multicast, "SynapseZmqPlexoPubSubEPGM", _InprocSynapse)
+    ganglion = GanglionPlexoMulticast(
+        bind_interface="127.0.0.1", migration_grace_seconds=0, **kwargs
+    )
+    # Messages the ganglion sends to its peers
+    ganglion.sent = []
+
+    async def transmit(data, neuron, reaction_id=None):
+        ganglion.sent.append(data)
+
+    monkeypatch.setattr(ganglion, "transmit", transmit)
+    return ganglion
+
+
+@pytest.fixture
+def ganglion(monkeypatch):
+    ganglion = _ganglion(
+        monkeypatch, address_assignment=MulticastAddressAssignment.Hashed
+    )
+    yield ganglion
+    ganglion.close()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    # Written by an earlier run, neuron_a was assigned address_x
+    path = tmp_path / "assignments.json"
+    AssignmentCache(path).save(
+        pmap({neuron_a.name: CachedAssignment(address_x, PROPOSAL_ID, PEER)})
+    )
+    return path
+
+
+@pytest.fixture
+def cached_ganglion(monkeypatch, cache_path):
+    ganglion = _ganglion(monkeypatch, assignment_cache_path=cache_path)
+    yield ganglion
+    ganglion.close()
+
+
+def _consensus(ganglion, monkeypatch, address):
+    # Every consensus round agrees on address, the calls are recorded
+    calls = []
+
+    async def get_address_from_consensus(name, excluded=None, preferred=None):
+        calls.append((name, excluded, preferred))
+        return address
+
+    monkeypatch.setattr(
+        ganglion, "_get_address_from_consensus", get_address_from_consensus
+    )
+    return calls
+
+
+def _claim(neuron, address, instance_id=PEER):
+    return PlexoApproval(
+        instance_id=instance_id,
+        proposal_id=HASHED_CLAIM_PROPOSAL_ID,
+        type_name=neuron.name.encode("UTF-8"),
+        multicast_ip=address.packed,
+    )
+
+
+def _claims_sent(ganglion):
+    return [
+        (
+            approval.type_name.decode("UTF-8"),
+            ipaddress.ip_address(approval.multicast_ip),
+        )
+        for approval in ganglion.sent
+        if isinstance(approval, PlexoApproval) and is_hashed_claim(approval)
+    ]
+
+
+async def _settled(ganglion, *coroutines):
+    # Waits for whatever the coroutines started, the poll loop keeps running
+    running = set(ganglion._tasks)
+    for coroutine in coroutines:
+        await coroutine
+    await asyncio.gather(*(task for task in ganglion._tasks if task not in running))
+
+
+async def _react(ganglion, approval):
+    await _settled(ganglion, ganglion._approval_reaction(approval, approval_neuron))
+
+
+def _address_of(ganglion, neuron):
+    return ganglion._synapses[neuron.name].multicast_address
+
+
+@pytest.mark.asyncio
+async def test_claim_of_a_peer_is_leased_and_reused(ganglion):
+    address = ganglion._hashed_address(neuron_a.name)
+
+    await _react(ganglion, _claim(neuron_a, address))
+
+    assert ganglion._hashed_claims[address] == neuron_a.name
+    assert ganglion._ip_lease_manager.address_is_leased(address)
+    # Preparations for the type are promised the claimed address
+    proposal = ganglion._proposals[neuron_a.name.encode("UTF-8")]
+    assert proposal.multicast_ip == address.packed
+
+    # Adapting the type locally lands on the same address without a collision
+    assert await ganglion.acquire_address_for_type(neuron_a.name) == address
+    assert _claims_sent(ganglion) == [(neuron_a.name, address)]
+
+
+@pytest.mark.asyncio
+async def test_collision_winner_keeps_the_address(ganglion, monkeypatch):
+    calls = _consensus(ganglion, monkeypatch, address_y)
+    await ganglion.create_synapse_with_address(neuron_a, neuron_a.name, address_x)
+
+    await _react(ganglion, _claim(neuron_b, address_x))
+
+    # The peer is told about this node's claim and has to move instead
+    assert _claims_sent(ganglion) == [(neuron_a.name, address_x)]
+    assert _address_of(ganglion, neuron_a) == address_x
+    assert address_x not in ganglion._hashed_claims
+    assert not calls
+
+
+@pytest.mark.asyncio
+async def test_collision_loser_moves_through_consensus(ganglion, monkeypatch):
+    calls = _consensus(ganglion, monkeypatch, address_y)
+    await ganglion.create_synapse_with_address(neuron_b, neuron_b.name, address_x)
+
+    await _react(ganglion, _claim(neuron_a, address_x))
+
+    # The consensus round never re-proposes the contested address
+    assert calls == [(neuron_b.name, address_x, None)]
+    assert _address_of(ganglion, neuron_b) == address_y
+    assert ganglion._synapses_by_address[address_y].neuron == neuron_b
+    assert address_x not in ganglion._synapses_by_address
+    # The winner's address stays leased so consensus never hands it out
+    assert ganglion._hashed_claims[address_x] == neuron_a.name
+    assert ganglion._ip_lease_manager.address_is_leased(address_x)
+    assert not _claims_sent(ganglion)
+
+
+@pytest.mark.asyncio
+async def test_type_on_two_addresses_converges_on_the_lowest(ganglion):
+    await ganglion.create_synapse_with_address(neuron_a, neuron_a.name, address_y)
+
+    # A peer's claim of a higher address is answered with this node's claim
+    await _react(ganglion, _claim(neuron_a, address_z))
+    assert _claims_sent(ganglion) == [(neuron_a.name, address_y)]
+    assert _address_of(ganglion, neuron_a) == address_y
+
+    # A lower one is joined
+    await _react(ganglion, _claim(neuron_a, address_x))
+    assert _address_of(ganglion, neuron_a) == address_x
+    assert not ganglion._ip_lease_manager.address_is_leased(address_y)
+
+
+@pytest.mark.asyncio
+async def test_own_and_out_of_range_claims_are_ignored(ganglion):
+    own_claim = _claim(neuron_a, address_x, ganglion.instance_id)
+    outside = ipaddress.ip_address("239.1.0.10")
+    reserved = ganglion._reserved_addresses[0]
+
+    for claim in (
+        own_claim,
+        _claim(neuron_a, outside),
+        _claim(neuron_a, reserved),
+    ):
+        await _react(ganglion, claim)
+
+    assert not ganglion._hashed_claims
+    assert not ganglion._ip_lease_manager.address_is_leased(address_x)
+
+
+def _approval(neuron, address, instance_id=PEER):
+    return PlexoApproval(
+        instance_id=instance_id,
+        proposal_id=PROPOSAL_ID + 1,
+        type_name=neuron.name.encode("UTF-8"),
+        multicast_ip=address.packed,
+    )
+
+
+def _promise(neuron, address):
+    # A peer's promise to another peer, overheard on the promise group
+    return PlexoPromise(
+        instance_id=OTHER_PEER,
+        proposal_id=PROPOSAL_ID + 1,
+        type_name=neuron.name.encode("UTF-8"),
+        accepted_instance_id=PEER,
+        accepted_proposal_id=PROPOSAL_ID,
+        multicast_ip=address.packed,
+    )
+
+
+async def _with_peers(ganglion):
+    # Enough peers that a single approval is no quorum
+    for instance_id in (PEER, OTHER_PEER, 9):
+        await ganglion._peers.heartbeat(instance_id)
+
+
+@pytest.mark.asyncio
+async def test_cached_address_is_trusted_on_restart(cached_ganglion, monkeypatch):
+    calls = _consensus(cached_ganglion, monkeypatch, address_y)
+    await _with_peers(cached_ganglion)
+
+    await cached_ganglion._create_synapse(neuron_a)
+    assert not cached_ganglion._validations
+    # Peers agreeing with the cache don't cause a round either
+    await _settled(
+        cached_ganglion,
+        cached_ganglion._approval_reaction(
+            _approval(neuron_a, address_x), approval_neuron
+        ),
+        cached_ganglion._promise_reaction(
+            _promise(neuron_a, address_x), promise_neuron
+        ),
+    )
+
+    assert _address_of(cached_ganglion, neuron_a) == address_x
+    assert not calls
+
+
+@pytest.mark.asyncio
+async def test_conflicting_approval_revalidates_the_cache(cached_ganglion, monkeypatch):
+    calls = _consensus(cached_ganglion, monkeypatch, address_y)
+    await _with_peers(cached_ganglion)
+    await cached_ganglion._create_synapse(neuron_a)
+
+    await _react(cached_ganglion, _approval(neuron_a, address_y))
+
+    # One round preferring the cached address, peers settled on another one
+    assert calls == [(neuron_a.name, None, address_x)]
+    assert _address_of(cached_ganglion, neuron_a) == address_y
+
+
+@pytest.mark.asyncio
+async def test_conflicting_promises_revalidate_the_cache_once(
+    cached_ganglion, monkeypatch
+):
+    calls = _consensus(cached_ganglion, monkeypatch, address_x)
+    await cached_ganglion._create_synapse(neuron_a)
+
+    # Another type on the cached address, heard twice while validating
+    await _settled(
+        cached_ganglion,
+        *(
+            cached_ganglion._promise_reaction(
+                _promise(neuron_b, address_x), promise_neuron
+            )
+            for _ in range(2)
+        ),
+    )
+
+    assert calls == [(neuron_a.name, None, address_x)]
+    assert _address_of(cached_ganglion, neuron_a) == address_x
+
+
+@pytest.mark.asyncio
+async def test_peers_joining_after_startup_revalidate_unconfirmed_types(
+    cached_ganglion, monkeypatch
+):
+    calls = _consensus(cached_ganglion, monkeypatch, address_x)
+    await cached_ganglion._create_synapse(neuron_a)
+
+    # Heard during startup, these are the peers the cache was written with
+    await _settled(cached_ganglion, cached_ganglion._peers.heartbeat(PEER))
+    assert not calls
+
+    cached_ganglion._startup_done = True
+    await _settled(cached_ganglion, cached_ganglion._peers.heartbeat(OTHER_PEER))
+    assert calls == [(neuron_a.name, None, address_x)]
+
+    # Once a quorum agreed on the type, new peers leave it alone
+    cached_ganglion._cache_assignment(_approval(neuron_a, address_x))
+    await _settled(cached_ganglion, cached_ganglion._peers.heartbeat(9))
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    "neuron, address, leased",
+    [
+        # Peers moved the type, its cached address is free again
+        (neuron_a, address_y, False),
+        # Peers use the cached address for another type
+        (neuron_b, address_x, True),
+    ],
+)
+@pytest.mark.asyncio
+async def test_contradicted_unused_cache_entry_is_dropped(
+    cached_ganglion, monkeypatch, cache_path, neuron, address, leased
+):
+    calls = _consensus(cached_ganglion, monkeypatch, address_y)
+    assert cached_ganglion._ip_lease_manager.address_is_leased(address_x)
+
+    await cached_ganglion._promise_reaction(_promise(neuron, address), promise_neuron)
+    await cached_ganglion._flush()
+
+    assert not cached_ganglion._cached_assignments
+    assert cached_ganglion._ip_lease_manager.address_is_leased(address_x) is leased
+    assert AssignmentCache(cache_path).load() == pmap()
+    assert not calls
+
+
+@pytest.mark.asyncio
+async def test_cache_writes_are_batched_off_the_loop(
+    cached_ganglion, monkeypatch, cache_path
+):
+    cache = cached_ganglion._assignment_cache
+    save = cache.save
+    writes = []
+
+    def recording_save(assignments):
+        writes.append(threading.get_ident())
+        save(assignments)
+
+    monkeypatch.setattr(cache, "save", recording_save)
+
+    for neuron, address in ((neuron_a, address_y), (neuron_b, address_z)):
+        cached_ganglion._cache_assignment(_approval(neuron, address))
+    await cached_ganglion._flush()
+
+    assert len(writes) == 1
+    assert writes[0] != threading.get_ident()
+    assert {
+        name: assignment.multicast_address
+        for name, assignment in AssignmentCache(cache_path).load().items()
+    } == {neuron_a.name: address_y, neuron_b.name: address_z}
@@ -0,0 +1,192 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from plexo.priority import (
+    Priority,
+    PriorityDispatcher,
+    PriorityLanes,
+    PrioritySender,
+)
+
+
+@pytest.mark.asyncio
+async def test_lanes_hand_out_most_urgent_first():
+    lanes: PriorityLanes[str] = PriorityLanes()
+    await lanes.put(Priority.Bulk, "bulk")
+    await lanes.put(Priority.Normal, "normal")
+    await lanes.put(Priority.Control, "control")
+
+    assert [await lanes.get() for _ in range(3)] == [
+        (Priority.Control, "control"),
+        (Priority.Normal, "normal"),
+        (Priority.Bulk, "bulk"),
+    ]
+    assert lanes.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_control_is_dispatched_ahead_of_a_data_backlog():
+    dispatcher = PriorityDispatcher()
+    handled = []
+
+    async def handle(item):
+        handled.append(item)
+        await asyncio.sleep(0)
+
+    try:
+        for i in range(50):
+            await dispatcher.dispatch(Priority.Bulk, handle, f"data{i}")
+        await dispatcher.dispatch(Priority.Control, handle, "heartbeat")
+        await asyncio.sleep(0.1)
+    finally:
+        dispatcher.close()
+
+    assert len(handled) == 51
+    assert handled.index("heartbeat") <= 1
+
+
+@pytest.mark.asyncio
+async def test_queued_items_are_conflated_per_key():
+    dispatcher = PriorityDispatcher()
+    handled = []
+    release = asyncio.Event()
+
+    async def handle(item):
+        await release.wait()
+        handled.append(item)
+
+    try:
+        # The first item is taken by the worker, the rest queue up behind it
+        await dispatcher.dispatch(Priority.Normal, handle, "a0", conflation_key="a")
+        await asyncio.sleep(0)
+        for item, key in (("a1", "a"), ("b1", "b"), ("a2", "a"), ("b2", "b")):
+            await dispatcher.dispatch(Priority.Normal, handle, item, conflation_key=key)
+        release.set()
+        await asyncio.sleep(0.05)
+    finally:
+        dispatcher.close()
+
+    assert handled == ["a0", "a2", "b2"]
+    assert dispatcher.conflated == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_ordering_key_does_not_hold_up_others():
+    dispatcher = PriorityDispatcher()
+    handled = []
+    release = asyncio.Event()
+
+    async def slow(item):
+        await release.wait()
+        handled.append(item)
+
+    async def fast(item):
+        handled.append(item)
+
+    try:
+        await dispatcher.dispatch(Priority.Normal, slow, "a0", ordering_key="a")
+        await dispatcher.dispatch(Priority.Normal, fast, "a1", ordering_key="a")
+        for i in range(3):
+            await dispatcher.dispatch(Priority.Normal, fast, f"b{i}", ordering_key="b")
+        await asyncio.sleep(0.05)
+
+        # b runs while a is stuck, and a1 still waits for a0
+        assert handled == ["b0", "b1", "b2"]
+
+        release.set()
+        await asyncio.sleep(0.05)
+    finally:
+        dispatcher.close()
+
+    assert handled == ["b0", "b1", "b2", "a0", "a1"]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_nowait_drops_when_full():
+    dispatcher = PriorityDispatcher(max_pending=2)
+    release = asyncio.Event()
+
+    async def stuck(item):
+        await release.wait()
+
+    try:
+        results = [
+            dispatcher.dispatch_nowait(Priority.Bulk, stuck, i) for i in range(4)
+        ]
+    finally:
+        dispatcher.close()
+
+    assert results == [True, True, False, False]
+    assert dispatcher.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_discarded_ordering_key_drains_and_leaves_nothing_behind():
+    dispatcher = PriorityDispatcher()
+    handled = []
+    release = asyncio.Event()
+
+    async def slow(item):
+        await release.wait()
+        handled.append(item)
+
+    try:
+        await dispatcher.dispatch(Priority.Normal, slow, "a0", ordering_key="a")
+        await dispatcher.dispatch(Priority.Normal, slow, "a1", ordering_key="a")
+        await dispatcher.dispatch(Priority.High, slow, "b0", ordering_key="b")
+        await asyncio.sleep(0.01)
+        workers = [queue.worker for queue in dispatcher._queues.values()]
+
+        dispatcher.discard("a")
+        dispatcher.discard("unknown")
+        release.set()
+        await asyncio.sleep(0.05)
+
+        # Queued items still ran, then only the live key is left
+        assert handled == ["b0", "a0", "a1"]
+        assert list(dispatcher._queues) == [(Priority.High, "b")]
+
+        dispatcher.discard("b")
+        await asyncio.sleep(0.01)
+        assert not dispatcher._queues
+        assert all(worker.done() for worker in workers)
+    finally:
+        dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_closing_the_sender_releases_queued_transmits():
+    release = asyncio.Event()
+
+    async def send(frames):
+        await release.wait()
+
+    sender = PrioritySender(send)
+    sending = [
+        asyncio.ensure_future(sender.send(Priority.Normal, [b"%d" % i]))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0.01)
+
+    sender.close()
+    done, pending = await asyncio.wait(sending, timeout=1)
+
+    assert not pending
+    assert all(future.cancelled() for future in done)
@@ -0,0 +1,76 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.plexus import Plexus
+from plexo.producer import ThreadSafeProducer
+
+
+@pytest.mark.asyncio
+async def test_threads_transmit_through_batched_wakeups():
+    neuron = Neuron(tuple, Namespace(["test", "producer"]), PickleCodec())
+    plexus = Plexus()
+    received = []
+
+    async def reactant(data, neuron, reaction_id=None):
+        received.append(data)
+
+    await plexus.adapt(neuron, reactants=(reactant,))
+    producer = plexus.producer(neuron)
+
+    def drive(thread_num):
+        for i in range(2500):
+            producer.put((thread_num, i))
+
+    threads = [threading.Thread(target=drive, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads) or producer.pending:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+    producer.close()
+
+    assert len(received) == 10_000
+    for thread_num in range(4):
+        assert [i for n, i in received if n == thread_num] == list(range(2500))
+    assert producer.wakeups < len(received)
+
+
+@pytest.mark.asyncio
+async def test_bounded_producer_counts_drops_and_drains_on_close():
+    transmitted = []
+
+    async def transmit(data):
+        transmitted.append(data)
+
+    producer = ThreadSafeProducer(transmit, max_pending=3)
+    # The loop doesn't run in between, so the oldest items are pushed out
+    for i in range(5):
+        producer.put(i)
+
+    assert producer.dropped == 2
+    await producer.aclose()
+
+    # What was pending when closed is still transmitted
+    assert transmitted == [2, 3, 4]
+    assert producer.pending == 0
@@ -0,0 +1,60 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from plexo.profiling import Profiler
+
+
+@pytest.mark.asyncio
+async def test_profile_separates_wall_and_cpu_time():
+    profiler = Profiler(sample_rate=1.0, slow_call_seconds=0.01)
+
+    async def sleeper():
+        await asyncio.sleep(0.05)
+        return "slept"
+
+    async def spinner():
+        total = 0
+        for i in range(200_000):
+            total += i
+        return total
+
+    results = await asyncio.gather(
+        profiler.profile("reactant", "sleeper", sleeper()),
+        profiler.profile("reactant", "spinner", spinner()),
+    )
+
+    assert results[0] == "slept"
+    (_, _, slowest), *_ = profiler.top(1)
+    assert slowest.slow_calls == 1
+    stats = {name: stats for _, name, stats in profiler.top()}
+    # The sleeper's CPU time excludes the spinner running while it was suspended
+    assert stats["sleeper"].cpu_ns < stats["spinner"].cpu_ns
+    assert stats["sleeper"].wall_ns > stats["sleeper"].cpu_ns
+
+
+def test_sample_rate_bounds():
+    profiler = Profiler()
+    assert not profiler.enabled
+
+    profiler.sample_rate = 0.5
+    assert profiler.enabled
+
+    with pytest.raises(ValueError):
+        profiler.sample_rate = 2.0
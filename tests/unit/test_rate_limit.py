@@ -0,0 +1,100 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.ganglion.log import GanglionLog
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.rate_limit import RateLimit, RateLimitPolicy
+
+
+@pytest.mark.asyncio
+async def test_wait_spreads_messages_at_the_rate():
+    sent = []
+
+    async def send(data):
+        sent.append(data)
+
+    rate_limit = RateLimit(messages_per_second=100, burst_seconds=0.01)
+    start = time.monotonic()
+    await asyncio.gather(*(rate_limit.submit(send, i) for i in range(11)))
+
+    assert sorted(sent) == list(range(11))
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_drop_and_coalesce_over_the_byte_limit():
+    sent = []
+
+    async def send(data):
+        sent.append(data)
+
+    dropping = RateLimit(bytes_per_second=10, policy=RateLimitPolicy.Drop)
+    for data in (b"12345678", b"abcdefgh"):
+        await dropping.submit(send, data, len(data))
+    assert sent == [b"12345678"]
+    assert dropping.dropped == 1
+
+    sent.clear()
+    coalescing = RateLimit(
+        bytes_per_second=100, policy=RateLimitPolicy.Coalesce, burst_seconds=0.1
+    )
+    for data in (b"0" * 10, b"1" * 10, b"2" * 10, b"3" * 10):
+        await coalescing.submit(send, data, len(data), key="neuron")
+    await asyncio.sleep(0.2)
+
+    assert sent == [b"0" * 10, b"3" * 10]
+    assert coalescing.coalesced == 2
+
+
+@pytest.mark.asyncio
+async def test_ganglion_flushes_and_closes_its_rate_limits(tmp_path):
+    neuron = Neuron(int, Namespace(["test", "rate_limit"]), PickleCodec())
+    rate_limit = RateLimit(
+        messages_per_second=20, policy=RateLimitPolicy.Coalesce, burst_seconds=0.05
+    )
+    ganglion = GanglionLog(tmp_path, rate_limit=rate_limit)
+    await ganglion.adapt(neuron)
+
+    for i in range(3):
+        await ganglion.transmit(i, neuron)
+    assert rate_limit._flusher is not None
+
+    await ganglion.aclose(timeout=1)
+
+    assert rate_limit._flusher is None
+    log = GanglionLog(tmp_path)
+    assert [neuron.decode(record.payload) for record in log.log.read()] == [0, 2]
+    log.close()
+
+    # Closing without flushing cancels whatever is still coalesced
+    ganglion = GanglionLog(tmp_path / "closed", rate_limit=rate_limit)
+    await ganglion.adapt(neuron)
+    for i in range(3):
+        await ganglion.transmit(i, neuron)
+    flusher = rate_limit._flusher
+
+    ganglion.close()
+    await asyncio.sleep(0)
+
+    assert flusher.cancelled()
+    assert not rate_limit._pending
@@ -0,0 +1,100 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+import time
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.dendrite import Dendrite
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.reactant import ExecutionPolicy, SyncReactant
+
+neuron = Neuron(str, Namespace(["test"]), PickleCodec())
+
+
+@pytest.mark.asyncio
+async def test_plain_callables_run_off_the_loop_thread():
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def sink(data, neuron, reaction_id=None):
+        time.sleep(0.1)
+        threads.append(threading.get_ident())
+        return data
+
+    def other_sink(data, neuron, reaction_id=None):
+        time.sleep(0.1)
+        threads.append(threading.get_ident())
+
+    dendrite = Dendrite(neuron, [sink])
+    await dendrite.add_reactants([other_sink])
+
+    start = time.monotonic()
+    results = await dendrite.transduce("data")
+
+    assert "data" in results
+    assert time.monotonic() - start < 0.19
+    assert loop_thread not in threads
+
+    await dendrite.remove_reactants([sink, other_sink])
+    assert not dendrite.reactants
+
+
+@pytest.mark.asyncio
+async def test_dedicated_thread_with_bounded_concurrency():
+    threads = set()
+
+    def sink(data, neuron, reaction_id=None):
+        threads.add(threading.current_thread().name)
+
+    reactant = SyncReactant(sink, ExecutionPolicy.DedicatedThread, max_concurrency=1)
+    try:
+        for _ in range(3):
+            await reactant("data", neuron)
+    finally:
+        reactant.close()
+
+    assert len(threads) == 1
+    assert threads.pop().startswith("plexo-sink")
+
+
+@pytest.mark.asyncio
+async def test_dendrite_closes_dedicated_threads():
+    def sink(data, neuron, reaction_id=None):
+        pass
+
+    def other_sink(data, neuron, reaction_id=None):
+        pass
+
+    removed = SyncReactant(sink, ExecutionPolicy.DedicatedThread)
+    kept = SyncReactant(other_sink, ExecutionPolicy.DedicatedThread)
+    dendrite = Dendrite(neuron, [removed, kept])
+    await dendrite.transduce("data")
+    executors = [removed._executor, kept._executor]
+
+    await dendrite.remove_reactants([sink])
+
+    assert removed._executor is None
+    assert executors[0]._shutdown
+    assert kept._executor is executors[1]
+
+    dendrite.close()
+
+    assert kept._executor is None
+    assert executors[1]._shutdown
@@ -0,0 +1,79 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+import plexo.replay
+from plexo.ganglion.log import GanglionLog
+from plexo.replay import raw_neuron, replay
+from plexo.segmented_log import SegmentedLog
+
+
+def test_raw_neuron_keeps_the_captured_name():
+    neuron = raw_neuron("com.example.test.Point.json")
+    assert neuron.name == "com.example.test.Point.json"
+    assert neuron.decode(b"{}") == b"{}"
+
+
+@pytest.mark.asyncio
+async def test_replay_at_max_speed(tmp_path):
+    capture = SegmentedLog(tmp_path / "capture")
+    for i in range(100):
+        capture.append("com.example.test.Point.json", b"%d" % i, 1_000 + i)
+
+    target = GanglionLog(tmp_path / "replayed")
+    report = await replay(capture.read(), target, speed=0)
+
+    assert report.messages == 100
+    assert report.elapsed_seconds < 10
+    assert [record.payload for record in target.log.read()] == [
+        b"%d" % i for i in range(100)
+    ]
+    target.close()
+    capture.close()
+
+
+@pytest.mark.asyncio
+async def test_run_starts_and_closes_the_ganglion(tmp_path, monkeypatch):
+    capture = SegmentedLog(tmp_path / "capture")
+    capture.append("com.example.test.Point.json", b"{}")
+    capture.close()
+
+    events = []
+
+    class _Ganglion(GanglionLog):
+        async def start(self):
+            events.append("start")
+
+        async def adapt(self, *args, **kwargs):
+            # Multicast would wait here until startup is done
+            assert events == ["start"]
+            return await super().adapt(*args, **kwargs)
+
+        async def aclose(self, timeout: float = 10.0):
+            events.append("aclose")
+            await super().aclose(timeout)
+
+    monkeypatch.setattr(
+        plexo.replay, "create_ganglion", lambda args: _Ganglion(tmp_path / "target")
+    )
+    args = plexo.replay._parser().parse_args(
+        ["replay", str(tmp_path / "capture"), "--speed", "max", "--warmup", "0"]
+    )
+
+    await plexo.replay._run(args)
+
+    assert events == ["start", "aclose"]
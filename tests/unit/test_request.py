@@ -0,0 +1,64 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from plexo.axon import Axon
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.exceptions import RequestTimeout
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.plexus import Plexus
+from plexo.request import Correlated, CorrelatedCodec, correlated
+
+namespace = Namespace(["test", "request"])
+question_neuron = correlated(Neuron(int, namespace, PickleCodec()))
+answer_neuron = correlated(Neuron(str, namespace, PickleCodec()))
+
+
+def test_correlated_codec_round_trip():
+    codec = CorrelatedCodec(PickleCodec())
+    message = Correlated(uuid4(), {"value": 1})
+
+    assert codec.decode(codec.encode(message)) == message
+    assert question_neuron.name == "test.request.int.correlated_pickle"
+
+
+@pytest.mark.asyncio
+async def test_pipelined_requests_get_their_own_replies():
+    plexus = Plexus()
+    requester = Axon(question_neuron, plexus, max_outstanding_requests=8)
+    responder = Axon(question_neuron, plexus)
+
+    async def answer(question: int):
+        await asyncio.sleep(0.01 * (question % 3))
+        return str(question * 2)
+
+    await responder.respond(answer, answer_neuron)
+
+    replies = await asyncio.gather(
+        *(requester.request(i, answer_neuron, timeout=5) for i in range(50))
+    )
+    assert replies == [str(i * 2) for i in range(50)]
+    assert requester._pending_requests.outstanding == 0
+
+    with pytest.raises(RequestTimeout):
+        await Axon(correlated(Neuron(bytes, namespace, PickleCodec())), plexus).request(
+            b"unanswered", answer_neuron, timeout=0.05
+        )
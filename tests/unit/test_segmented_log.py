@@ -0,0 +1,105 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from plexo.exceptions import LogRecordTooLarge
+from plexo.ganglion.log import GanglionLog
+from plexo.replay import raw_neuron
+from plexo.segmented_log import SegmentedLog
+
+
+def test_read_by_offset_and_time_across_segments(tmp_path):
+    log = SegmentedLog(tmp_path, segment_bytes=4096, index_interval_bytes=256)
+    for i in range(500):
+        assert log.append("test.neuron", b"payload%d" % i, 1_000 + 2 * i) == i
+
+    assert len(list(tmp_path.glob("*.log"))) > 1
+    assert [record.offset for record in log.read(123)] == list(range(123, 500))
+    assert log.offset_for_time(1_501) == 251
+    assert next(log.read_from_time(1_500)).payload == b"payload250"
+    assert log.offset_for_time(10_000) == 500
+
+    with pytest.raises(LogRecordTooLarge):
+        log.append("test.neuron", bytes(4096))
+    log.close()
+
+
+def test_recovers_after_a_torn_write(tmp_path):
+    log = SegmentedLog(tmp_path, segment_bytes=1 << 16, index_interval_bytes=64)
+    for i in range(100):
+        log.append("test.neuron", b"payload%d" % i)
+    log.close()
+
+    # Corrupt the last record and drop part of the index, as a crash might
+    log_path = next(tmp_path.glob("*.log"))
+    index_path = next(tmp_path.glob("*.index"))
+    data = bytearray(log_path.read_bytes())
+    last = data.rindex(b"payload99")
+    data[last] ^= 0xFF
+    log_path.write_bytes(bytes(data))
+    index_path.write_bytes(index_path.read_bytes()[:-20])
+
+    log = SegmentedLog(tmp_path, segment_bytes=1 << 16, index_interval_bytes=64)
+    assert log.next_offset == 99
+    assert log.append("test.neuron", b"replacement") == 99
+    assert [record.payload for record in log.read(97)] == [
+        b"payload97",
+        b"payload98",
+        b"replacement",
+    ]
+    log.close()
+
+
+def test_flush_is_due_every_n_messages(tmp_path):
+    log = SegmentedLog(tmp_path, segment_bytes=1 << 16, flush_messages=3)
+    segment = log._segments[-1]
+
+    log.append("test.neuron", b"payload0")
+    log.append("test.neuron", b"payload1")
+    assert not log.flush_due
+
+    log.append("test.neuron", b"payload2")
+    assert log.flush_due
+    # append never syncs by itself
+    assert segment.flushed_position == 0
+
+    log.flush()
+    assert not log.flush_due
+    assert segment.flushed_position == segment.position
+
+    log.close()
+    log.flush()
+
+
+@pytest.mark.asyncio
+async def test_ganglion_syncs_rolled_segments_off_the_loop(tmp_path):
+    ganglion = GanglionLog(tmp_path, segment_bytes=4096)
+    neuron = raw_neuron("test.log.Point.raw")
+    await ganglion.adapt(neuron)
+
+    for i in range(200):
+        await ganglion.transmit_encoded(b"payload%d" % i, neuron)
+
+    segments = ganglion.log._segments
+    assert len(segments) > 1
+    assert all(
+        segment.flushed_position == segment.position for segment in segments[:-1]
+    )
+
+    await ganglion.flush()
+    assert segments[-1].flushed_position == segments[-1].position
+    await ganglion.aclose()
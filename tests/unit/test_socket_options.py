@@ -0,0 +1,87 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+import zmq
+
+import plexo.replay
+from plexo.ganglion.tcp_pubsub import GanglionZmqTcpPubSub
+from plexo.socket_options import (
+    HIGH_THROUGHPUT,
+    LOSSY_MULTICAST,
+    LOW_LATENCY,
+    TCP_DEFAULT,
+    ZmqSocketOptions,
+    presets,
+)
+
+
+def test_unset_options_keep_the_zmq_defaults():
+    context = zmq.Context()
+    socket = context.socket(zmq.PUB)
+    try:
+        default_hwm = socket.getsockopt(zmq.SNDHWM)
+        ZmqSocketOptions(rcvhwm=10).apply(socket)
+
+        assert socket.getsockopt(zmq.SNDHWM) == default_hwm
+        assert socket.getsockopt(zmq.RCVHWM) == 10
+    finally:
+        socket.close()
+        context.term()
+
+
+def test_presets_apply():
+    assert LOSSY_MULTICAST.rate > 100
+    for options in presets.values():
+        context = zmq.Context()
+        socket = context.socket(zmq.PUB)
+        try:
+            options.apply(socket)
+        finally:
+            socket.close()
+            context.term()
+
+
+def test_ganglion_socket_options():
+    ganglion = GanglionZmqTcpPubSub("127.0.0.1", 26590, socket_options=HIGH_THROUGHPUT)
+    try:
+        assert ganglion._socket_pub.getsockopt(zmq.SNDHWM) == HIGH_THROUGHPUT.sndhwm
+        assert ganglion._socket_pub.getsockopt(zmq.SNDBUF) == HIGH_THROUGHPUT.sndbuf
+        assert ganglion._socket_pub.getsockopt(zmq.LINGER) == 0
+    finally:
+        ganglion.close()
+
+    ganglion = GanglionZmqTcpPubSub("127.0.0.1", 26591, socket_options=LOW_LATENCY)
+    try:
+        assert ganglion.socket_sub.getsockopt(zmq.RCVHWM) == LOW_LATENCY.rcvhwm
+        assert ganglion.socket_sub.getsockopt(zmq.HEARTBEAT_IVL) == 1_000
+    finally:
+        ganglion.close()
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [([], TCP_DEFAULT), (["--socket-options", "low-latency"], LOW_LATENCY)],
+)
+def test_replay_passes_the_chosen_preset(argv, expected):
+    args = plexo.replay._parser().parse_args(
+        ["replay", "log", "--ganglion", "tcp-pubsub", "--port", "26998", *argv]
+    )
+    ganglion = plexo.replay.create_ganglion(args)
+    try:
+        assert ganglion.socket_options == expected
+    finally:
+        ganglion.close()
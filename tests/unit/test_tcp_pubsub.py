@@ -0,0 +1,114 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import ipaddress
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.ganglion.tcp_pubsub import GanglionZmqTcpPubSub
+from plexo.metrics import metrics
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+
+localhost = ipaddress.ip_address("127.0.0.1")
+namespace = Namespace(["test", "tcp_pubsub"])
+
+
+class _VersionedCodec(PickleCodec):
+    @property
+    def name(self) -> str:
+        return "pickle_v2"
+
+
+neuron = Neuron(int, namespace, PickleCodec())
+# Named with neuron's name as a prefix
+prefixed_neuron = Neuron(int, namespace, _VersionedCodec())
+other_neuron = Neuron(str, namespace, PickleCodec())
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+@pytest.mark.asyncio
+async def test_subscription_matches_neuron_names_exactly(enabled_metrics):
+    assert prefixed_neuron.name.startswith(neuron.name)
+
+    publisher = GanglionZmqTcpPubSub("127.0.0.1", 26580)
+    await publisher.adapt(neuron)
+    await publisher.adapt(prefixed_neuron)
+
+    received = []
+
+    async def reactant(data, neuron, reaction_id=None):
+        received.append(data)
+
+    subscriber = GanglionZmqTcpPubSub("127.0.0.1", 26581, peers=[(localhost, 26580)])
+    await subscriber.adapt(neuron, reactants=(reactant,))
+
+    try:
+        # Published until the subscription has reached the publisher
+        for i in range(200):
+            await publisher.transmit(i, prefixed_neuron)
+            await publisher.transmit(i, neuron)
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+
+        assert received
+        # The publisher never sent the prefixed topic to this subscriber
+        assert (
+            "received_messages",
+            "GanglionZmqTcpPubSub",
+            prefixed_neuron.name,
+        ) not in dict(metrics.counters())
+    finally:
+        await asyncio.gather(subscriber.aclose(), publisher.aclose())
+
+
+@pytest.mark.asyncio
+async def test_synapses_created_later_are_subscribed():
+    publisher = GanglionZmqTcpPubSub("127.0.0.1", 26582)
+    await publisher.adapt(neuron)
+    await publisher.adapt(other_neuron)
+
+    received = []
+
+    async def reactant(data, neuron, reaction_id=None):
+        received.append(data)
+
+    subscriber = GanglionZmqTcpPubSub("127.0.0.1", 26583, peers=[(localhost, 26582)])
+    await subscriber.adapt(neuron)
+    await subscriber.adapt(other_neuron, reactants=(reactant,))
+
+    try:
+        for _ in range(200):
+            await publisher.transmit("late", other_neuron)
+            if received:
+                break
+            await asyncio.sleep(0.01)
+
+        assert received[0] == "late"
+    finally:
+        await asyncio.gather(subscriber.aclose(), publisher.aclose())
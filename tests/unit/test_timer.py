@@ -0,0 +1,71 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from plexo.timer import Timer, TimerWheel
+
+
+@pytest.mark.asyncio
+async def test_timer_wheel_batches_and_cancels():
+    timer_wheel = TimerWheel(resolution_seconds=0.05)
+    fired = []
+
+    timer_wheel.call_later(0.01, fired.append, 1)
+    timer_wheel.call_later(0.02, fired.append, 2)
+    cancelled = timer_wheel.call_later(0.02, fired.append, 3)
+    cancelled.cancel()
+
+    await asyncio.sleep(0.1)
+
+    assert fired == [1, 2]
+    timer_wheel.close()
+
+
+@pytest.mark.asyncio
+async def test_timer_wheel_periodic():
+    timer_wheel = TimerWheel(resolution_seconds=0.01)
+    fired = []
+
+    async def callback():
+        fired.append(None)
+
+    periodic = timer_wheel.call_periodic(0.02, callback, initial_delay=0)
+    await asyncio.sleep(0.09)
+    periodic.cancel()
+    # A callback fired just before cancel may still be running
+    await asyncio.sleep(0)
+    fired_num = len(fired)
+    await asyncio.sleep(0.05)
+
+    assert fired_num >= 3
+    assert len(fired) == fired_num
+    timer_wheel.close()
+
+
+@pytest.mark.asyncio
+async def test_timer_wait_and_cancel():
+    timer = Timer(0.01)
+    timer.start()
+    await timer.wait()
+
+    timer = Timer(10)
+    timer.start()
+    timer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await timer.wait()
@@ -0,0 +1,69 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+from time import perf_counter_ns
+from uuid import uuid4
+
+import pytest
+
+from plexo.codec.pickle_codec import PickleCodec
+from plexo.namespace.namespace import Namespace
+from plexo.neuron.neuron import Neuron
+from plexo.synapse.base import SynapseExternalBase
+from plexo.tracing import Tracer, tracer
+
+
+class _Synapse(SynapseExternalBase):
+    async def transmit(self, data, reaction_id=None):
+        pass
+
+
+async def _reactant(data, neuron, reaction_id=None):
+    pass
+
+
+def test_trace_events_are_grouped_by_reaction_and_bounded():
+    tracer = Tracer(capacity=3, enabled=True)
+    reaction_id = uuid4()
+
+    tracer.record("dropped", "test", perf_counter_ns())
+    for name in ("encode", "send", "decode"):
+        tracer.record(name, "test", perf_counter_ns(), reaction_id, neuron="a")
+
+    spans = [event for event in tracer.trace_events() if event["ph"] == "X"]
+
+    assert [span["name"] for span in spans] == ["encode", "send", "decode"]
+    assert {span["tid"] for span in spans} == {1}
+    assert spans[0]["args"] == {"neuron": "a", "reaction_id": str(reaction_id)}
+
+
+@pytest.mark.asyncio
+async def test_received_message_spans_share_a_reaction_id():
+    neuron = Neuron(str, Namespace(["test", "tracing"]), PickleCodec())
+    synapse = _Synapse(neuron, reactants=[_reactant])
+
+    tracer.clear()
+    tracer.enable()
+    try:
+        await synapse.transduce(neuron.encode("data"))
+    finally:
+        tracer.disable()
+
+    spans = [event for event in tracer.trace_events() if event["ph"] == "X"]
+    tracer.clear()
+
+    assert {span["cat"] for span in spans} == {"synapse", "codec", "reactant"}
+    assert len({span["args"]["reaction_id"] for span in spans}) == 1
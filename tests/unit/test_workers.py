@@ -0,0 +1,77 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import multiprocessing
+import os
+import signal
+
+from plexo.workers import Supervisor, rendezvous_owner
+
+names = [f"test.workers.Type{i}.pickle" for i in range(24)]
+
+
+class _Neuron:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_rendezvous_owner_only_moves_keys_of_removed_workers():
+    keys = [f"key{i}" for i in range(1000)]
+    before = {key: rendezvous_owner(key, range(4)) for key in keys}
+    after = {key: rendezvous_owner(key, (0, 1, 3)) for key in keys}
+
+    assert set(before.values()) == {0, 1, 2, 3}
+    assert all(after[key] == owner for key, owner in before.items() if owner != 2)
+
+
+def test_supervisor_rebalances_dropped_workers():
+    adapted = multiprocessing.get_context("fork").Queue()
+
+    class RecordingGanglion:
+        def __init__(self, worker_id):
+            self.worker_id = worker_id
+
+        async def adapt(self, neuron, reactants=None):
+            adapted.put((self.worker_id, neuron.name))
+
+    async def worker(context):
+        ganglion = RecordingGanglion(context.worker_id)
+        for name in names:
+            await context.adapt(ganglion, _Neuron(name))
+        await asyncio.Event().wait()
+
+    def collect(count):
+        return [adapted.get(timeout=10) for _ in range(count)]
+
+    supervisor = Supervisor(worker, num_workers=3, max_restarts=0)
+    supervisor.start()
+    try:
+        owners = dict((name, worker_id) for worker_id, name in collect(len(names)))
+        assert sorted(owners) == sorted(names)
+        assert set(owners.values()) == {0, 1, 2}
+
+        os.kill(supervisor._processes[1].pid, signal.SIGKILL)
+        supervisor.poll(timeout=10)
+        assert supervisor.workers == (0, 2)
+
+        orphaned = sorted(name for name, owner in owners.items() if owner == 1)
+        readapted = collect(len(orphaned))
+    finally:
+        supervisor.stop()
+
+    assert sorted(name for _, name in readapted) == orphaned
+    assert {worker_id for worker_id, _ in readapted} <= {0, 2}
@@ -0,0 +1,210 @@
+#  pyplexo
+#  Copyright © 2018-2023  Alecks Gates
+#
+#  pyplexo is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  pyplexo is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with pyplexo.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import contextlib
+import itertools
+
+import pytest
+import zmq
+import zmq.asyncio
+
+from plexo.priority import Priority
+from plexo.synapse.zeromq_poller import ZmqPoller
+
+_endpoints = itertools.count()
+
+
+@contextlib.contextmanager
+def _pub_sub(context):
+    endpoint = f"inproc://test_zeromq_poller_{next(_endpoints)}"
+    pub = context.socket(zmq.PUB)
+    pub.bind(endpoint)
+    sub = context.socket(zmq.SUB)
+    sub.setsockopt(zmq.SUBSCRIBE, b"")
+    sub.connect(endpoint)
+    try:
+        yield pub, sub
+    finally:
+        pub.close(linger=0)
+        sub.close(linger=0)
+
+
+@contextlib.asynccontextmanager
+async def _running(poller):
+    task = asyncio.create_task(poller.poll_loop())
+    try:
+        yield task
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        poller.close()
+
+
+async def _wait_for(condition, timeout=1.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+def _recorder(received):
+    async def receiver(frames):
+        received.append(frames[0])
+
+    return receiver
+
+
+@pytest.mark.asyncio
+async def test_register_interrupts_a_running_poll():
+    context = zmq.asyncio.Context()
+    poller = ZmqPoller()
+    first, second = [], []
+    with _pub_sub(context) as (pub_a, sub_a), _pub_sub(context) as (pub_b, sub_b):
+        poller.register(sub_a, _recorder(first))
+        async with _running(poller):
+            # The loop is now waiting on sub_a only
+            await asyncio.sleep(0.05)
+            poller.register(sub_b, _recorder(second))
+            await asyncio.sleep(0.05)
+            await pub_b.send(b"b")
+
+            await _wait_for(lambda: second == [b"b"])
+            assert first == []
+    context.term()
+
+
+@pytest.mark.asyncio
+async def test_unregister_during_poll_stops_delivery():
+    context = zmq.asyncio.Context()
+    poller = ZmqPoller()
+    first, second = [], []
+    with _pub_sub(context) as (pub_a, sub_a), _pub_sub(context) as (pub_b, sub_b):
+        poller.register(sub_a, _recorder(first))
+        poller.register(sub_b, _recorder(second))
+        async with _running(poller):
+            await asyncio.sleep(0.05)
+            poller.unregister(sub_a)
+            await pub_a.send(b"a")
+            await pub_b.send(b"b")
+
+            await _wait_for(lambda: second == [b"b"])
+            await asyncio.sleep(0.05)
+            assert first == []
+            assert sub_a not in poller._receivers
+    context.term()
+
+
+@pytest.mark.asyncio
+async def test_receive_drains_at_most_max_batch():
+    context = zmq.asyncio.Context()
+    poller = ZmqPoller(max_batch=3)
+    received = []
+    receiver = _recorder(received)
+    with _pub_sub(context) as (pub, sub):
+        await asyncio.sleep(0.05)
+        for i in range(10):
+            await pub.send(b"%d" % i)
+        await asyncio.sleep(0.05)
+
+        try:
+            await poller._receive(sub, receiver, Priority.Normal, None, "", "")
+            await _wait_for(lambda: len(received) == 3)
+            await asyncio.sleep(0.05)
+            # The rest is left for later polls, so other sockets get a turn
+            assert received == [b"0", b"1", b"2"]
+
+            poller.register(sub, receiver)
+            async with _running(poller):
+                await _wait_for(lambda: len(received) == 10)
+        finally:
+            poller.close()
+    context.term()
+
+
+@pytest.mark.asyncio
+async def test_closed_socket_is_unregistered():
+    context = zmq.asyncio.Context()
+    poller = ZmqPoller()
+    received = []
+    with _pub_sub(context) as (pub_a, sub_a), _pub_sub(context) as (pub_b, sub_b):
+        poller.register(sub_a, _recorder([]))
+        poller.register(sub_b, _recorder(received))
+        async with _running(poller) as task:
+            await asyncio.sleep(0.05)
+            # Closed without unregistering, as a synapse torn down mid poll would
+            sub_a.close(linger=0)
+            # Wake the poll so it trips over the closed socket
+            await pub_b.send(b"b")
+
+            await _wait_for(lambda: sub_a not in poller._receivers)
+            await _wait_for(lambda: received == [b"b"])
+            await pub_b.send(b"c")
+            await _wait_for(lambda: received == [b"b", b"c"])
+            assert not task.done()
+    context.term()
+
+
+@pytest.mark.asyncio
+async def test_saturated_data_socket_does_not_delay_control():
+    context = zmq.asyncio.Context()
+    poller = ZmqPoller(max_pending=4)
+    release = asyncio.Event()
+    control = []
+
+    async def stuck(frames):
+        await release.wait()
+
+    with _pub_sub(context) as (pub_data, sub_data), _pub_sub(context) as (
+        pub_control,
+        sub_control,
+    ):
+        poller.register(sub_data, stuck, Priority.Normal)
+        poller.register(sub_control, _recorder(control), Priority.Control)
+        async with _running(poller):
+            await asyncio.sleep(0.05)
+            for i in range(20):
+                await pub_data.send(b"%d" % i)
+            await _wait_for(lambda: poller._dispatcher.dropped)
+
+            await pub_control.send(b"heartbeat")
+            await _wait_for(lambda: control == [b"heartbeat"], timeout=0.2)
+            release.set()
+    context.term()
+
+
+@pytest.mark.asyncio
+async def test_unregister_releases_the_socket_queue():
+    context = zmq.asyncio.Context()
+    poller = ZmqPoller()
+    received = []
+    with _pub_sub(context) as (pub, sub):
+        poller.register(sub, _recorder(received))
+        async with _running(poller):
+            await asyncio.sleep(0.05)
+            await pub.send(b"a")
+            await _wait_for(lambda: received == [b"a"])
+            workers = [queue.worker for queue in poller._dispatcher._queues.values()]
+            assert workers
+
+            poller.unregister(sub)
+            await asyncio.sleep(0.01)
+
+            assert not poller._dispatcher._queues
+            assert all(worker.done() for worker in workers)
+    context.term()